@@ -0,0 +1,593 @@
+"""Persistent job queue and worker pool for tile generation.
+
+Admin routes enqueue jobs in an SQLite table under data/ instead of starting
+threads. A bounded pool of worker threads runs them by priority. A job for
+an operation that is already queued or running (e.g. the same region) is
+not queued twice, and no two jobs of the same province run at once, since
+they share its OSM extracts, feature store and node cache. Jobs left
+running by a server that stopped are queued again on the next start;
+region jobs then resume from their journal. Cancelling a running job stops
+it between tiles. A scheduler thread also queues the most requested missing
+tiles (see tile_generation.missing_tiles) in batches.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from datetime import datetime
+
+from flask import current_app
+
+from tile_generation.builder import TileBuilder, REGION_PROVINCES
+from admin.shared_state import active_operations
+from tile_generation.events import publish
+from tile_generation.missing_tiles import MissingTileStore, grid_region, tile_name, TILE_SIZE
+
+# Job priorities; higher runs first
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Seconds between progress writes to the database per job
+PROGRESS_INTERVAL = 1.0
+
+
+class JobCancelled(Exception):
+    """Raised by a job handler that stopped because the job was cancelled."""
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def job_scope(params):
+    """Get the province whose OSM data a job works on."""
+    return params.get('province') or REGION_PROVINCES.get(params.get('region_name'), 'ontario')
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """SQLite-backed queue of generation jobs."""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    operation TEXT NOT NULL,
+                    scope TEXT,
+                    params TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    worker_pid INTEGER,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_operation ON jobs (operation, status)')
+
+            # Queues created before jobs had a scope
+            if 'scope' not in {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}:
+                conn.execute('ALTER TABLE jobs ADD COLUMN scope TEXT')
+            for row in conn.execute("SELECT id, params FROM jobs WHERE scope IS NULL AND "
+                                    "status IN ('queued', 'running')").fetchall():
+                conn.execute('UPDATE jobs SET scope = ? WHERE id = ?',
+                             (job_scope(json.loads(row['params'])), row['id']))
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        return _Connection(conn)
+
+    def _job(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        for key in ('params', 'progress', 'result'):
+            job[key] = json.loads(job[key]) if job[key] else ({} if key != 'result' else None)
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def enqueue(self, kind, operation, params, priority=PRIORITY_NORMAL):
+        """Queue a job; return (job, created).
+
+        operation names what the job works on (a region, or a province's
+        changes). If a job for it is already queued or running, that job is
+        returned instead, with its priority raised if this one is higher.
+        """
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE operation = ? AND status IN ('queued', 'running') "
+                "AND cancel_requested = 0 ORDER BY id LIMIT 1", (operation,)).fetchone()
+            if row:
+                if priority > row['priority']:
+                    conn.execute('UPDATE jobs SET priority = ? WHERE id = ?', (priority, row['id']))
+                conn.execute('COMMIT')
+                return self.get(row['id']), False
+
+            cursor = conn.execute(
+                'INSERT INTO jobs (kind, operation, scope, params, priority, status, created_at) '
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                (kind, operation, job_scope(params), json.dumps(params), priority, _now()))
+            conn.execute('COMMIT')
+            return self.get(cursor.lastrowid), True
+
+    def claim(self):
+        """Mark the highest-priority queued job as running in this process and return it.
+
+        Jobs of a province that already has a job running wait for it to finish.
+        """
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND scope NOT IN "
+                "(SELECT scope FROM jobs WHERE status = 'running' AND scope IS NOT NULL) "
+                'ORDER BY priority DESC, id LIMIT 1').fetchone()
+            if not row:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ?, attempts = attempts + 1 "
+                'WHERE id = ?', (os.getpid(), _now(), row['id']))
+            conn.execute('COMMIT')
+        return self.get(row['id'])
+
+    def update_progress(self, job_id, progress):
+        with self._connect() as conn:
+            conn.execute('UPDATE jobs SET progress = ? WHERE id = ?', (json.dumps(progress, default=str), job_id))
+
+    def finish(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?',
+                (status, json.dumps(result, default=str) if result is not None else None, error, _now(), job_id))
+
+    def cancel(self, job_id):
+        """Cancel a job: a queued job at once, a running one at its next check. Returns the job."""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('UPDATE jobs SET cancel_requested = 1 WHERE id = ?', (job_id,))
+            conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                         (_now(), job_id))
+            conn.execute('COMMIT')
+        return self.get(job_id)
+
+    def cancel_requested(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            return self._job(conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone())
+
+    def active_job(self, operation):
+        """Get the queued or running job for an operation, if any."""
+        with self._connect() as conn:
+            return self._job(conn.execute(
+                "SELECT * FROM jobs WHERE operation = ? AND status IN ('queued', 'running') "
+                'ORDER BY id LIMIT 1', (operation,)).fetchone())
+
+    def latest_job(self, operation):
+        """Get the most recent job for an operation, if any."""
+        with self._connect() as conn:
+            return self._job(conn.execute(
+                'SELECT * FROM jobs WHERE operation = ? ORDER BY id DESC LIMIT 1', (operation,)).fetchone())
+
+    def list_jobs(self, statuses=None, limit=50):
+        """Get jobs, running first, then queued by priority, then the most recent others."""
+        query = 'SELECT * FROM jobs'
+        args = []
+        if statuses:
+            query += f" WHERE status IN ({','.join('?' * len(statuses))})"
+            args.extend(statuses)
+        query += (" ORDER BY CASE status WHEN 'running' THEN 0 WHEN 'queued' THEN 1 ELSE 2 END, "
+                  "CASE WHEN status = 'queued' THEN -priority ELSE 0 END, id DESC LIMIT ?")
+        args.append(limit)
+        with self._connect() as conn:
+            return [self._job(row) for row in conn.execute(query, args).fetchall()]
+
+    def recover(self):
+        """Queue again the running jobs of server processes that are gone; return how many."""
+        recovered = 0
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute("SELECT * FROM jobs WHERE status = 'running'").fetchall()
+            for row in rows:
+                if row['worker_pid'] and row['worker_pid'] != os.getpid() and _process_alive(row['worker_pid']):
+                    continue
+                if row['cancel_requested']:
+                    conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ?",
+                                 (_now(), row['id']))
+                    continue
+                params = json.loads(row['params'])
+                if row['kind'] == 'generate_region':
+                    params['resume'] = True
+                conn.execute("UPDATE jobs SET status = 'queued', params = ?, worker_pid = NULL WHERE id = ?",
+                             (json.dumps(params), row['id']))
+                recovered += 1
+            conn.execute('COMMIT')
+        return recovered
+
+
+class _Connection:
+    """sqlite3 connection closed at the end of a with block."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] and self.conn.in_transaction:
+            self.conn.execute('ROLLBACK')
+        self.conn.close()
+
+
+class JobContext:
+    """What a running job handler uses to report progress and check for cancellation."""
+
+    def __init__(self, queue, job, builder_config):
+        self.queue = queue
+        self.job = job
+        self.builder_config = builder_config
+        self.operation = job['operation']
+        self._last_write = 0
+        self._cancelled = False
+
+        # Mirror progress in active_operations for the dashboard's progress polling
+        active_operations[self.operation] = {
+            'status': 'initializing',
+            'region': job['params'].get('region_name', self.operation),
+            'total_tiles': 0,
+            'completed_tiles': 0,
+            'current_tile': None,
+            'start_time': datetime.now().isoformat(),
+            'operation_type': job['params'].get('operation_type', job['kind']),
+            'job_id': job['id']
+        }
+        publish('job', operation=self.operation, job_id=job['id'], kind=job['kind'], status='running',
+                region=job['params'].get('region_name', self.operation))
+
+    def progress(self, current_progress):
+        """Progress callback for TileBuilder."""
+        current_progress.pop('start_time', None)
+        current_progress.pop('region', None)
+        operation = active_operations.setdefault(self.operation, {})
+        operation.update(current_progress)
+
+        if time.monotonic() - self._last_write >= PROGRESS_INTERVAL:
+            self._last_write = time.monotonic()
+            self.queue.update_progress(self.job['id'], operation)
+
+    def cancelled(self):
+        """Check whether the job was cancelled (TileBuilder's cancel_check)."""
+        if not self._cancelled:
+            self._cancelled = self.queue.cancel_requested(self.job['id'])
+        return self._cancelled
+
+    def finish(self, status, result=None, error=None):
+        operation = active_operations.get(self.operation, {})
+        operation['status'] = status
+        if error:
+            operation['error'] = error
+        self.queue.update_progress(self.job['id'], operation)
+        self.queue.finish(self.job['id'], status, result, error)
+        publish('job', operation=self.operation, job_id=self.job['id'], kind=self.job['kind'], status=status,
+                region=self.job['params'].get('region_name', self.operation), error=error)
+
+        # Keep the final state for the dashboard for 5 minutes
+        job_id = self.job['id']
+
+        def cleanup():
+            time.sleep(300)
+            if active_operations.get(self.operation, {}).get('job_id') == job_id:
+                del active_operations[self.operation]
+
+        threading.Thread(target=cleanup, daemon=True).start()
+
+
+def run_generate_region(params, context):
+    """Generate (or resume) the tiles of one region."""
+    builder = TileBuilder(context.builder_config)
+    result = builder.generate_tiles_for_region(params['region_name'], params['bounds'], {
+        'resume': params.get('resume', False),
+        'progress_callback': context.progress,
+        'cancel_check': context.cancelled
+    })
+
+    operation = active_operations.get(context.operation, {})
+    operation['completed_tiles'] = result.get('successful_tiles', 0)
+    operation['changed_tiles'] = result.get('changed_tiles', 0)
+    operation['unchanged_tiles'] = result.get('unchanged_tiles', 0)
+    operation['resumed_tiles'] = result.get('resumed_tiles', 0)
+    return result
+
+
+def run_update_changed(params, context):
+    """Re-render the tiles touched by OSM changes in a province."""
+    builder = TileBuilder(context.builder_config)
+    result = builder.generate_changed_tiles(params['province'], params.get('change_file'), {
+        'progress_callback': context.progress,
+        'cancel_check': context.cancelled
+    })
+
+    operation = active_operations.get(context.operation, {})
+    operation['updated_tiles'] = result.get('updated_tiles', 0)
+    operation['changes'] = result.get('changes')
+    return result
+
+
+def run_render_missing(params, context):
+    """Render a batch of missing tiles that clients asked for in one region."""
+    builder = TileBuilder(context.builder_config)
+    tiles = [tuple(tile) for tile in params['tiles']]
+    result = builder.generate_tiles_for_region(params['region_name'], params['bounds'], {
+        'tiles': [(row * TILE_SIZE, col * TILE_SIZE) for row, col in tiles],
+        'progress_callback': context.progress,
+        'cancel_check': context.cancelled
+    })
+
+    # Tiles that now exist leave the demand table; the rest can be scheduled again
+    region_dir = builder.tiles_dir / 'regions' / params['region_name']
+    store = MissingTileStore(builder.data_dir / 'missing_tiles.db')
+    store.resolve([tile for tile in tiles if (region_dir / tile_name(*tile)).exists()])
+    store.release(context.job['id'])
+    return result
+
+
+JOB_HANDLERS = {
+    'generate_region': run_generate_region,
+    'update_changed': run_update_changed,
+    'render_missing': run_render_missing,
+}
+
+
+def schedule_missing_tiles(queue, store, regions, batch_size=50, min_requests=1):
+    """Queue the most requested missing tiles for generation; return how many were queued.
+
+    Tiles are grouped by the region whose grid holds them, one job per
+    region. Every tile examined leaves the candidates, so tiles that cannot
+    be scheduled never crowd out the rest: tiles outside every region are
+    dropped from the table, and tiles of a region with a batch already
+    queued or running are parked on that job until it releases them.
+    """
+    # Tiles of cancelled or lost jobs are due again
+    batch_jobs = {job['params'].get('region_name'): job
+                  for job in queue.list_jobs(ACTIVE_STATUSES, limit=1000) if job['kind'] == 'render_missing'}
+    store.release_inactive(job['id'] for job in batch_jobs.values())
+
+    batches = {}
+    parked = {}
+    outside = []
+    queued_tiles = 0
+    for tile in store.hottest(limit=batch_size * 4, min_requests=min_requests):
+        row, col = tile['tile_row'], tile['tile_col']
+        region = grid_region(regions, row, col, tile['region'])
+        if region is None:
+            outside.append((row, col))
+        elif region['name'] in batch_jobs:
+            parked.setdefault(batch_jobs[region['name']]['id'], []).append((row, col))
+        elif queued_tiles < batch_size:
+            batches.setdefault(region['name'], (region, []))[1].append((row, col))
+            queued_tiles += 1
+
+    store.resolve(outside)
+    for job_id, tiles in parked.items():
+        store.mark_scheduled(tiles, job_id)
+
+    scheduled = 0
+    for region_name, (region, tiles) in batches.items():
+        job, created = queue.enqueue('render_missing', f'{region_name}-missing', {
+            'region_name': region_name,
+            'bounds': region['bounds'],
+            'tiles': tiles,
+            'operation_type': 'missing_tiles'
+        })
+        # A batch queued since the jobs were listed holds these tiles until it ends
+        store.mark_scheduled(tiles, job['id'])
+        if created:
+            publish('job', operation=job['operation'], job_id=job['id'], kind=job['kind'],
+                    status='queued', region=region_name)
+            scheduled += len(tiles)
+    return scheduled
+
+
+class MissingTileScheduler:
+    """Thread that periodically queues the hottest missing tiles."""
+
+    def __init__(self, queue, store, builder_config, interval=300, batch_size=50, min_requests=1, pool=None):
+        self.queue = queue
+        self.store = store
+        self.builder_config = builder_config
+        self.interval = interval
+        self.batch_size = batch_size
+        self.min_requests = min_requests
+        self.pool = pool
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='missing-tile-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run_once(self):
+        regions = TileBuilder(self.builder_config).get_available_regions()
+        scheduled = schedule_missing_tiles(self.queue, self.store, regions, self.batch_size, self.min_requests)
+        if scheduled:
+            print(f"🧩 Queued {scheduled} missing tiles for generation")
+            if self.pool:
+                self.pool.notify()
+        return scheduled
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Missing tile scheduler error: {e}")
+
+
+class JobWorkerPool:
+    """Fixed number of worker threads running queued jobs."""
+
+    def __init__(self, queue, builder_config, workers=1, poll_interval=5, handlers=None):
+        self.queue = queue
+        self.builder_config = builder_config
+        self.workers = max(1, int(workers))
+        self.poll_interval = poll_interval
+        self.handlers = handlers or JOB_HANDLERS
+        self._wake = threading.Condition()
+        self._stopping = False
+        self._threads = []
+
+    def start(self):
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"🔁 Re-queued {recovered} jobs interrupted by a server restart")
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'job-worker-{i + 1}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Stop the workers once their current jobs finish."""
+        with self._wake:
+            self._stopping = True
+            self._wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def notify(self):
+        """Wake an idle worker to pick up a new job."""
+        with self._wake:
+            self._wake.notify()
+
+    def notify_all(self):
+        with self._wake:
+            self._wake.notify_all()
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                job = self.queue.claim()
+            except Exception as e:
+                print(f"Job queue error: {e}")
+                job = None
+
+            if job is None:
+                with self._wake:
+                    if not self._stopping:
+                        self._wake.wait(self.poll_interval)
+                continue
+
+            self.run_job(job)
+            # Jobs of the same province may have been waiting for this one
+            self.notify_all()
+
+    def run_job(self, job):
+        """Run one claimed job and record its outcome."""
+        context = JobContext(self.queue, job, self.builder_config)
+        handler = self.handlers.get(job['kind'])
+        print(f"Starting job {job['id']} ({job['kind']} {job['operation']})")
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job kind {job['kind']!r}")
+            result = handler(job['params'], context)
+            status = result.get('status', 'completed')
+            if status == 'cancelled' or context.cancelled():
+                context.finish('cancelled', result)
+            elif status == 'error':
+                context.finish('error', result, result.get('error', 'Unknown error'))
+            else:
+                context.finish('completed', result)
+            print(f"Finished job {job['id']} ({job['operation']}): {status}")
+        except JobCancelled:
+            context.finish('cancelled')
+        except Exception as e:
+            print(f"❌ Job {job['id']} ({job['operation']}) failed: {e}")
+            context.finish('error', error=str(e))
+
+
+def init_job_queue(app, builder_config):
+    """Create the app's job queue and start its worker pool and missing tile scheduler.
+
+    They are not started for testing apps, when JOB_WORKERS is 0, or in
+    the watcher process of Flask's debug reloader (only the serving child
+    runs jobs).
+    """
+    queue = JobQueue(Path(app.config['DATA_DIR']) / 'jobs.db')
+    app.extensions['job_queue'] = queue
+    app.extensions['job_pool'] = None
+    app.extensions['missing_tile_scheduler'] = None
+    store = app.extensions.setdefault(
+        'missing_tiles', MissingTileStore(Path(app.config['DATA_DIR']) / 'missing_tiles.db'))
+
+    workers = app.config.get('JOB_WORKERS', 1)
+    if app.testing or not workers:
+        return queue
+    if app.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return queue
+
+    pool = JobWorkerPool(queue, builder_config, workers)
+    pool.start()
+    app.extensions['job_pool'] = pool
+
+    interval = app.config.get('MISSING_TILE_INTERVAL', 300)
+    if interval:
+        scheduler = MissingTileScheduler(queue, store, builder_config, interval,
+                                         app.config.get('MISSING_TILE_BATCH', 50),
+                                         app.config.get('MISSING_TILE_MIN_REQUESTS', 1), pool)
+        scheduler.start()
+        app.extensions['missing_tile_scheduler'] = scheduler
+    return queue
+
+
+def get_job_queue():
+    """Get the current app's job queue."""
+    return current_app.extensions['job_queue']
+
+
+def submit_job(kind, operation, params, priority=PRIORITY_NORMAL):
+    """Queue a job in the current app and wake a worker; return (job, created)."""
+    job, created = get_job_queue().enqueue(kind, operation, params, priority)
+    if created:
+        publish('job', operation=operation, job_id=job['id'], kind=kind, status='queued',
+                region=params.get('region_name', operation))
+    pool = current_app.extensions.get('job_pool')
+    if pool:
+        pool.notify()
+    return job, created
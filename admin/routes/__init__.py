@@ -1 +1,19 @@
-"""Admin route handlers."""
\ No newline at end of file
+"""Admin route handlers."""
+
+from flask import current_app
+
+from tile_generation.node_index import MAX_NODE_ID
+
+
+def builder_config(config=None):
+    """Get the TileBuilder options for generating tiles from the app config."""
+    config = config if config is not None else current_app.config
+    return {
+        'workers': config.get('RENDER_WORKERS', 1),
+        'node_index': config.get('NODE_INDEX', 'auto'),
+        'node_cache': config.get('NODE_CACHE', True),
+        'node_cache_max_node_id': config.get('NODE_CACHE_MAX_NODE_ID', MAX_NODE_ID),
+        'extract_buffer': config.get('EXTRACT_BUFFER', 0.005),
+        'extract_timeout': config.get('EXTRACT_TIMEOUT'),
+        'tile_archive': config.get('TILE_ARCHIVE', False)
+    }
@@ -1,15 +1,21 @@
 """Admin dashboard routes."""
 
-from flask import Blueprint, render_template, current_app, request, flash, redirect, url_for, jsonify
+from flask import Blueprint, render_template, current_app, request, flash, redirect, url_for, jsonify, Response
 from pathlib import Path
 from admin.siteground_upload import SiteGroundUploader
 from tile_generation.builder import TileBuilder
+from admin.routes import builder_config
+from admin.jobs import submit_job, get_job_queue, PRIORITY_HIGH, PRIORITY_LOW
+from tile_generation.events import event_bus, format_sse
+from tile_generation.catalog import get_tile_catalog
 import json
-import threading
 from datetime import datetime
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# Seconds between keepalive comments on an idle event stream
+SSE_KEEPALIVE = 15
+
 # Import shared state
 from admin.shared_state import active_operations
 
@@ -74,61 +80,109 @@ def update_tiles(region_name):
             flash(f'No bounds found for region {region_name}', 'error')
             return redirect(url_for('dashboard.index'))
         
-        # Start tile generation in background thread
-        builder = TileBuilder()
-        thread = threading.Thread(
-            target=background_tile_generation,
-            args=(builder, region_name, bounds, 'update')
-        )
-        thread.daemon = True
-        thread.start()
+        # Queue tile generation; resume skips tiles an interrupted run
+        # already finished against the same OSM data
+        resume = request.form.get('resume') == '1'
+        job, created = submit_job('generate_region', region_name, {
+            'region_name': region_name,
+            'bounds': bounds,
+            'operation_type': 'resume' if resume else 'update',
+            'resume': resume
+        })
+        if not created:
+            flash(f'Tiles for {region_name} are already {job["status"]} (job {job["id"]})', 'info')
+            return redirect(url_for('dashboard.index'))
         
-        flash(f'Started updating tiles for {region_name}. Check back for progress.', 'info')
+        flash(f'Queued tile update for {region_name} (job {job["id"]}). Check back for progress.', 'info')
         return redirect(url_for('dashboard.index'))
         
     except Exception as e:
         flash(f'Error starting tile update: {str(e)}', 'error')
         return redirect(url_for('dashboard.index'))
 
+@dashboard_bp.route('/update-changed-tiles/<province>', methods=['POST'])
+def update_changed_tiles(province):
+    """Re-render only the tiles touched by OSM changes in a province."""
+    try:
+        builder = TileBuilder(builder_config())
+        
+        # An uploaded change file is applied to the cached data; without one
+        # the cached data is compared with the previous download
+        change_file = None
+        upload = request.files.get('change_file')
+        if upload and upload.filename:
+            suffix = next((s for s in ('.osc.gz', '.osc.bz2', '.osc') if upload.filename.endswith(s)), None)
+            if not suffix:
+                flash('Change file must be an OSM change file (.osc, .osc.gz or .osc.bz2)', 'error')
+                return redirect(url_for('dashboard.index'))
+            change_file = builder.data_dir / 'osm_cache' / f"{province}-changes{suffix}"
+            upload.save(change_file)
+        elif not builder.get_previous_osm_file(province).exists():
+            flash(f'No previous {province} OSM data to compare with. Update OSM data or upload a change file.', 'error')
+            return redirect(url_for('dashboard.index'))
+        
+        job, created = submit_job('update_changed', f'{province}-changes', {
+            'province': province,
+            'change_file': str(change_file) if change_file else None,
+            'operation_type': 'incremental_update'
+        }, PRIORITY_HIGH)
+        if not created:
+            flash(f'A changed-tile update for {province} is already {job["status"]} (job {job["id"]})', 'warning')
+            return redirect(url_for('dashboard.index'))
+        
+        flash(f'Queued changed-tile update for {province} (job {job["id"]}). Check back for progress.', 'info')
+        return redirect(url_for('dashboard.index'))
+        
+    except Exception as e:
+        flash(f'Error starting incremental update: {str(e)}', 'error')
+        return redirect(url_for('dashboard.index'))
+
+@dashboard_bp.route('/events')
+def events():
+    """Stream generation events (optionally for ?region=) as server-sent events."""
+    region = request.args.get('region') or None
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    subscription = event_bus.subscribe(region, last_event_id)
+    
+    def stream():
+        try:
+            # Tell the browser to wait 5 seconds before reconnecting
+            yield 'retry: 5000\n\n'
+            while True:
+                event = subscription.get(timeout=SSE_KEEPALIVE)
+                if event is None:
+                    # Comment line so proxies keep the idle connection open
+                    yield ': keepalive\n\n'
+                else:
+                    yield format_sse(event)
+        finally:
+            subscription.close()
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @dashboard_bp.route('/progress/<region_name>')
 def get_progress(region_name):
     """Get tile generation progress for a region."""
     try:
         # Check global progress storage first
         if region_name in active_operations:
+            # The builder keeps estimated_completion up to date as tiles finish
             progress = active_operations[region_name]
-            
-            # Calculate estimated completion time
-            if progress.get('status') == 'processing' and progress.get('start_time'):
-                start_time = datetime.fromisoformat(progress['start_time'])
-                elapsed = (datetime.now() - start_time).total_seconds()
-                completed = progress.get('completed_tiles', 0)
-                total = progress.get('total_tiles', 1)
-                
-                if completed > 0:
-                    avg_time_per_tile = elapsed / completed
-                    remaining_tiles = total - completed
-                    eta_seconds = remaining_tiles * avg_time_per_tile
-                    
-                    if eta_seconds < 60:
-                        progress['estimated_completion'] = f"{int(eta_seconds)}s"
-                    elif eta_seconds < 3600:
-                        progress['estimated_completion'] = f"{int(eta_seconds/60)}m"
-                    else:
-                        progress['estimated_completion'] = f"{int(eta_seconds/3600)}h {int((eta_seconds%3600)/60)}m"
-                else:
-                    progress['estimated_completion'] = "Calculating..."
-            
             return jsonify(progress)
         
-        # Fallback to builder progress for backward compatibility
-        builder = TileBuilder()
-        progress = builder.get_generation_progress()
-        
-        if progress and progress.get('region') == region_name:
+        # Queued jobs, and jobs of an earlier server process
+        job = get_job_queue().latest_job(region_name)
+        if job and (job['status'] in ('queued', 'running') or job['progress']):
+            progress = {**job['progress'], 'region': region_name, 'job_id': job['id']}
+            if job['status'] != 'running':
+                progress['status'] = job['status']
             return jsonify(progress)
-        else:
-            return jsonify({'status': 'not_running', 'region': region_name})
+        
+        return jsonify({'status': 'not_running', 'region': region_name})
             
     except Exception as e:
         return jsonify({'status': 'error', 'error': str(e)})
@@ -154,15 +208,17 @@ def update_all_regions():
             flash('No regions found with existing tiles to update', 'warning')
             return redirect(url_for('dashboard.index'))
         
-        # Start background thread to update all regions
-        thread = threading.Thread(
-            target=background_update_all_regions,
-            args=(regions_to_update,)
-        )
-        thread.daemon = True
-        thread.start()
-        
-        flash(f'Started updating tiles for {len(regions_to_update)} regions. Check back for progress.', 'info')
+        # One job per region; regions already queued are not queued again
+        queued = 0
+        for region in regions_to_update:
+            job, created = submit_job('generate_region', region['name'], {
+                'region_name': region['name'],
+                'bounds': region['bounds'],
+                'operation_type': 'bulk_update'
+            }, PRIORITY_LOW)
+            queued += created
+        
+        flash(f'Queued tile updates for {queued} of {len(regions_to_update)} regions. Check back for progress.', 'info')
         return redirect(url_for('dashboard.index'))
         
     except Exception as e:
@@ -172,7 +228,6 @@ def update_all_regions():
 def get_dashboard_stats():
     """Calculate dashboard statistics including SiteGround server status."""
     tiles_dir = Path(current_app.config['TILES_DIR'])
-    regions_dir = tiles_dir / 'regions'
     
     stats = {
         'total_regions': 0,
@@ -195,46 +250,42 @@ def get_dashboard_stats():
             print(f"Error checking SiteGround server: {e}")
     
     # Check local regions
-    if regions_dir.exists():
-        for region_dir in regions_dir.iterdir():
-            if region_dir.is_dir():
-                region_name = region_dir.name
-                
-                # Count local tiles
-                tile_files = list(region_dir.glob('*.svg.gz'))
-                local_tile_count = len(tile_files)
-                
-                if local_tile_count > 0:  # Only show regions with actual tiles
-                    # Calculate size
-                    total_size = sum(f.stat().st_size for f in tile_files)
-                    size_mb = total_size / (1024 * 1024)
-                    
-                    # Check server status
-                    server_tile_count = 0
+    for region in get_tile_catalog(tiles_dir).regions():
+        region_name = region['name']
+        
+        # Count local tiles
+        local_tile_count = region['tile_count']
+        
+        if local_tile_count > 0:  # Only show regions with actual tiles
+            # Calculate size
+            size_mb = region['size_bytes'] / (1024 * 1024)
+            
+            # Check server status
+            server_tile_count = 0
+            server_status = 'local_only'
+            
+            if region_name in server_regions:
+                server_tile_count = server_regions[region_name]['tile_count']
+                if server_tile_count == local_tile_count:
+                    server_status = 'synced'
+                elif server_tile_count > 0:
+                    server_status = 'partial'
+                else:
                     server_status = 'local_only'
-                    
-                    if region_name in server_regions:
-                        server_tile_count = server_regions[region_name]['tile_count']
-                        if server_tile_count == local_tile_count:
-                            server_status = 'synced'
-                        elif server_tile_count > 0:
-                            server_status = 'partial'
-                        else:
-                            server_status = 'local_only'
-                    
-                    region_stats = {
-                        'name': region_name.replace('-', ' ').title(),
-                        'region_id': region_name,
-                        'local_tile_count': local_tile_count,
-                        'server_tile_count': server_tile_count,
-                        'size_mb': size_mb,
-                        'status': server_status
-                    }
-                    
-                    stats['regions'].append(region_stats)
-                    stats['total_tiles'] += local_tile_count
-                    stats['total_size_mb'] += size_mb
-                    stats['total_regions'] += 1
+            
+            region_stats = {
+                'name': region_name.replace('-', ' ').title(),
+                'region_id': region_name,
+                'local_tile_count': local_tile_count,
+                'server_tile_count': server_tile_count,
+                'size_mb': size_mb,
+                'status': server_status
+            }
+            
+            stats['regions'].append(region_stats)
+            stats['total_tiles'] += local_tile_count
+            stats['total_size_mb'] += size_mb
+            stats['total_regions'] += 1
     
     # Add server-only regions (regions that exist on server but not locally)
     for server_region_name, server_data in server_regions.items():
@@ -273,126 +324,6 @@ def get_region_metadata(region_name):
     except Exception:
         return None
 
-def background_tile_generation(builder, region_name, bounds, operation_type):
-    """Background thread function for tile generation."""
-    try:
-        # Initialize progress tracking
-        active_operations[region_name] = {
-            'status': 'initializing',
-            'region': region_name,
-            'total_tiles': 0,
-            'completed_tiles': 0,
-            'current_tile': None,
-            'start_time': datetime.now().isoformat(),
-            'operation_type': operation_type
-        }
-        
-        print(f"Starting {operation_type} for region {region_name}")
-        
-        # Custom progress callback to update global storage
-        def progress_callback(current_progress):
-            if region_name in active_operations:
-                active_operations[region_name].update(current_progress)
-        
-        # Run tile generation and monitor progress
-        result = builder.generate_tiles_for_region(region_name, bounds)
-        
-        # Monitor the builder's internal progress and update our global progress
-        def monitor_progress():
-            import time
-            while region_name in active_operations and active_operations[region_name]['status'] not in ['completed', 'error']:
-                builder_progress = builder.get_generation_progress()
-                if builder_progress and builder_progress.get('region') == region_name:
-                    active_operations[region_name].update(builder_progress)
-                time.sleep(1)  # Check every second
-        
-        monitor_thread = threading.Thread(target=monitor_progress, daemon=True)
-        monitor_thread.start()
-        
-        # Update final status
-        if region_name in active_operations:
-            active_operations[region_name]['status'] = result.get('status', 'completed')
-            active_operations[region_name]['completed_tiles'] = result.get('successful_tiles', 0)
-            if result.get('status') == 'error':
-                active_operations[region_name]['error'] = result.get('error', 'Unknown error')
-        
-        print(f"Completed {operation_type} for region {region_name}: {result}")
-        
-        # Clean up after 5 minutes
-        def cleanup():
-            import time
-            time.sleep(300)  # 5 minutes
-            if region_name in active_operations:
-                del active_operations[region_name]
-        
-        threading.Thread(target=cleanup, daemon=True).start()
-        
-    except Exception as e:
-        print(f"Error in background tile generation: {e}")
-        if region_name in active_operations:
-            active_operations[region_name]['status'] = 'error'
-            active_operations[region_name]['error'] = str(e)
-
-def background_update_all_regions(regions_to_update):
-    """Background thread function for updating all regions."""
-    try:
-        # Initialize progress for bulk operation
-        active_operations['all'] = {
-            'status': 'initializing',
-            'region': 'all',
-            'total_regions': len(regions_to_update),
-            'completed_regions': 0,
-            'current_region': None,
-            'start_time': datetime.now().isoformat(),
-            'operation_type': 'bulk_update'
-        }
-        
-        builder = TileBuilder()
-        print(f"Starting bulk update for {len(regions_to_update)} regions")
-        
-        for i, region_info in enumerate(regions_to_update):
-            region_name = region_info['name']
-            bounds = region_info['bounds']
-            
-            try:
-                # Update progress
-                active_operations['all'].update({
-                    'status': 'processing',
-                    'current_region': region_name,
-                    'completed_regions': i
-                })
-                
-                print(f"Updating region {i+1}/{len(regions_to_update)}: {region_name}")
-                result = builder.generate_tiles_for_region(region_name, bounds)
-                print(f"Completed {region_name}: {result}")
-            except Exception as e:
-                print(f"Error updating region {region_name}: {e}")
-                continue
-        
-        # Mark as completed
-        active_operations['all'].update({
-            'status': 'completed',
-            'completed_regions': len(regions_to_update),
-            'current_region': None
-        })
-        
-        print("Bulk region update completed")
-        
-        # Clean up after 5 minutes
-        def cleanup():
-            import time
-            time.sleep(300)  # 5 minutes
-            if 'all' in active_operations:
-                del active_operations['all']
-        
-        threading.Thread(target=cleanup, daemon=True).start()
-        
-    except Exception as e:
-        print(f"Error in bulk region update: {e}")
-        if 'all' in active_operations:
-            active_operations['all']['status'] = 'error'
-            active_operations['all']['error'] = str(e)
-
 @dashboard_bp.route('/osm-cache-status')
 def osm_cache_status():
     """Get OSM cache status for display."""
@@ -3,8 +3,10 @@
 from flask import Blueprint, render_template, current_app, request, flash, redirect, url_for, jsonify
 from pathlib import Path
 from tile_generation.builder import TileBuilder
+from tile_generation.node_index import clear_node_caches
+from admin.jobs import get_job_queue, schedule_missing_tiles, ACTIVE_STATUSES
+from api.missing import get_missing_tile_store
 import json
-import threading
 from datetime import datetime
 
 generation_bp = Blueprint('generation', __name__)
@@ -28,16 +30,19 @@ def index():
         # Check for active operations
         from admin.shared_state import active_operations
         active_ops = dict(active_operations)  # Copy to avoid race conditions
+        active_jobs = get_job_queue().list_jobs(ACTIVE_STATUSES)
         
         stats = {
             'total_regions': total_regions,
             'total_tiles': total_tiles,
             'osm_provinces': len([p for p in osm_cache.values() if p['exists']]),
             'osm_size_gb': round(sum(p['size_mb'] for p in osm_cache.values() if p['exists']) / 1024, 1),
-            'active_operations': len(active_ops),
+            'active_operations': len(active_jobs),
             'osm_cache': osm_cache,
             'regions': regions,
-            'active_ops': active_ops
+            'active_ops': active_ops,
+            'missing_tiles': get_missing_tile_store().stats(),
+            'hottest_missing': get_missing_tile_store().hottest(limit=10, unscheduled=False)
         }
         
         return render_template('admin/generation.html', stats=stats)
@@ -52,22 +57,30 @@ def queue_status():
     try:
         from admin.shared_state import active_operations
         
-        # Get active operations
+        # Queued and running jobs first, then the most recent finished ones
         active_ops = []
-        for region_id, operation in active_operations.items():
+        for job in get_job_queue().list_jobs(limit=50):
+            # Running jobs report live progress through active_operations
+            operation = job['progress']
+            if job['status'] == 'running':
+                operation = active_operations.get(job['operation'], operation)
+            
             active_ops.append({
-                'region_id': region_id,
-                'region_name': region_id.replace('-', ' ').title() if region_id != 'all' else 'All Regions',
-                'status': operation.get('status', 'unknown'),
-                'operation_type': operation.get('operation_type', 'unknown'),
+                'region_id': job['operation'],
+                'job_id': job['id'],
+                'region_name': job['operation'].replace('-', ' ').title(),
+                'status': operation.get('status', job['status']) if job['status'] == 'running' else job['status'],
+                'operation_type': job['params'].get('operation_type', job['kind']),
+                'priority': job['priority'],
                 'progress': {
-                    'completed': operation.get('completed_tiles', operation.get('completed_regions', 0)),
-                    'total': operation.get('total_tiles', operation.get('total_regions', 1)),
+                    'completed': operation.get('completed_tiles', 0),
+                    'total': operation.get('total_tiles', 0),
                     'percentage': 0
                 },
-                'start_time': operation.get('start_time'),
-                'current_item': operation.get('current_tile', operation.get('current_region')),
-                'estimated_completion': operation.get('estimated_completion')
+                'start_time': job['started_at'] or job['created_at'],
+                'current_item': operation.get('current_tile'),
+                'estimated_completion': operation.get('estimated_completion'),
+                'error': job['error']
             })
             
             # Calculate percentage
@@ -151,7 +164,13 @@ def clear_cache():
         
         # Delete files
         for file in cache_files + filtered_files:
-            file.unlink()
+            if file.exists():
+                file.unlink()
+        
+        # Node location caches belong to the deleted PBF files
+        node_cache_files, node_cache_size = clear_node_caches(builder.data_dir / 'node_index')
+        total_files += node_cache_files
+        total_size += node_cache_size
         
         flash(f'Cleared cache: {total_files} files, {total_size / (1024**2):.1f}MB freed', 'success')
         return redirect(url_for('generation.tools'))
@@ -160,18 +179,43 @@ def clear_cache():
         flash(f'Error clearing cache: {str(e)}', 'error')
         return redirect(url_for('generation.tools'))
 
+@generation_bp.route('/schedule-missing', methods=['POST'])
+def schedule_missing():
+    """Queue the most requested missing tiles now instead of at the next interval."""
+    try:
+        regions = TileBuilder().get_available_regions()
+        scheduled = schedule_missing_tiles(get_job_queue(), get_missing_tile_store(), regions,
+                                           current_app.config.get('MISSING_TILE_BATCH', 50),
+                                           current_app.config.get('MISSING_TILE_MIN_REQUESTS', 1))
+        pool = current_app.extensions.get('job_pool')
+        if pool:
+            pool.notify()
+        
+        if scheduled:
+            flash(f'Queued {scheduled} missing tiles for generation', 'success')
+        else:
+            flash('No missing tiles inside a region are waiting to be generated', 'info')
+        return redirect(url_for('generation.queue'))
+        
+    except Exception as e:
+        flash(f'Error scheduling missing tiles: {str(e)}', 'error')
+        return redirect(url_for('generation.index'))
+
 @generation_bp.route('/cancel/<operation_id>', methods=['POST'])
 def cancel_operation(operation_id):
     """Cancel an active generation operation."""
     try:
-        from admin.shared_state import active_operations
+        queue = get_job_queue()
         
-        if operation_id in active_operations:
-            # Mark as cancelled (the background thread should check this)
-            active_operations[operation_id]['status'] = 'cancelled'
-            active_operations[operation_id]['cancelled_at'] = datetime.now().isoformat()
-            
-            flash(f'Cancelled operation for {operation_id}', 'success')
+        # operation_id is a job id or the operation (region) a job runs
+        job = queue.get(int(operation_id)) if operation_id.isdigit() else queue.active_job(operation_id)
+        
+        if job and job['status'] in ACTIVE_STATUSES:
+            job = queue.cancel(job['id'])
+            if job['status'] == 'cancelled':
+                flash(f'Cancelled queued job for {job["operation"]}', 'success')
+            else:
+                flash(f'Cancelling {job["operation"]}; it stops after the tile in progress', 'success')
         else:
             flash(f'Operation {operation_id} not found or already completed', 'warning')
         
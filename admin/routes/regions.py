@@ -1,8 +1,12 @@
 """Regions management routes."""
 
-from flask import Blueprint, render_template, current_app, request, flash, redirect, url_for, jsonify
+from flask import Blueprint, render_template, current_app, request, flash, redirect, url_for, jsonify, send_file
 from pathlib import Path
 from tile_generation.builder import TileBuilder
+from admin.jobs import submit_job, PRIORITY_HIGH
+from admin.shared_state import active_operations
+from tile_generation.archive import archive_path, export_region, import_region, open_archive
+from tile_generation.catalog import get_tile_catalog
 import json
 
 regions_bp = Blueprint('regions', __name__)
@@ -11,25 +15,15 @@ regions_bp = Blueprint('regions', __name__)
 def index():
     """Regions management page."""
     try:
-        builder = TileBuilder()
-        regions = builder.get_available_regions()
-        
-        # Get detailed stats for each region
-        for region in regions:
-            region_name = region.get('name')
-            if region_name:
-                # Count tiles
-                tiles_dir = Path(current_app.config['TILES_DIR'])
-                region_dir = tiles_dir / 'regions' / region_name
-                if region_dir.exists():
-                    tile_files = list(region_dir.glob('*.svg.gz'))
-                    region['actual_tile_count'] = len(tile_files)
-                    # Calculate size
-                    total_size = sum(f.stat().st_size for f in tile_files)
-                    region['size_mb'] = round(total_size / (1024 * 1024), 1)
-                else:
-                    region['actual_tile_count'] = 0
-                    region['size_mb'] = 0
+        regions = []
+        
+        # Regions with metadata, with the tile counts and sizes from the catalog
+        for summary in get_tile_catalog(current_app.config['TILES_DIR']).regions():
+            region = summary['metadata']
+            if region:
+                region['actual_tile_count'] = summary['tile_count']
+                region['size_mb'] = round(summary['size_bytes'] / (1024 * 1024), 1)
+                regions.append(region)
         
         return render_template('admin/regions.html', regions=regions)
     except Exception as e:
@@ -69,14 +63,17 @@ def create_region():
             'west': west
         }
         
-        # Start tile generation for new region
-        builder = TileBuilder()
-        result = builder.generate_tiles_for_region(name, bounds)
+        # Queue tile generation for the new region ahead of routine updates
+        job, created = submit_job('generate_region', name, {
+            'region_name': name,
+            'bounds': bounds,
+            'operation_type': 'create'
+        }, PRIORITY_HIGH)
         
-        if result.get('status') == 'completed':
-            flash(f'Successfully created region "{display_name}" with {result.get("successful_tiles", 0)} tiles', 'success')
+        if created:
+            flash(f'Created region "{display_name}"; tile generation is queued (job {job["id"]})', 'success')
         else:
-            flash(f'Region creation failed: {result.get("error", "Unknown error")}', 'error')
+            flash(f'Tiles for "{display_name}" are already {job["status"]} (job {job["id"]})', 'warning')
         
         return redirect(url_for('regions.index'))
         
@@ -92,31 +89,36 @@ def region_detail(region_name):
     """Show details for a specific region."""
     try:
         tiles_dir = Path(current_app.config['TILES_DIR'])
-        metadata_file = tiles_dir / 'regions' / region_name / 'metadata.json'
+        catalog = get_tile_catalog(tiles_dir)
+        summary = catalog.region(region_name)
         
-        if not metadata_file.exists():
+        if not summary or not summary['metadata']:
             flash(f'Region "{region_name}" not found', 'error')
             return redirect(url_for('regions.index'))
         
-        # Load metadata
-        with metadata_file.open('r') as f:
-            metadata = json.load(f)
-        
-        # Get tile files
-        region_dir = tiles_dir / 'regions' / region_name
-        tile_files = list(region_dir.glob('*.svg.gz'))
-        
-        # Calculate stats
-        total_size = sum(f.stat().st_size for f in tile_files)
-        
         region_stats = {
-            'metadata': metadata,
-            'tile_count': len(tile_files),
-            'size_mb': round(total_size / (1024 * 1024), 1),
-            'tiles': [f.name for f in sorted(tile_files)]
+            'metadata': summary['metadata'],
+            'tile_count': summary['tile_count'],
+            'size_mb': round(summary['size_bytes'] / (1024 * 1024), 1),
+            'tiles': [tile['filename'] for tile in catalog.tiles(region_name)]
         }
         
-        return render_template('admin/region_detail.html', region_name=region_name, stats=region_stats)
+        archive_file = archive_path(tiles_dir, region_name)
+        archive = open_archive(tiles_dir, region_name)
+        if archive:
+            region_stats['archive'] = {
+                'tile_count': archive.tile_count(),
+                'size_mb': round(archive_file.stat().st_size / (1024 * 1024), 1),
+                'exported_at': archive.metadata().get('exported_at', '')
+            }
+        
+        # A run that stopped without finishing (e.g. the server was restarted)
+        interrupted_run = None
+        if region_name not in active_operations:
+            interrupted_run = TileBuilder().get_interrupted_run(region_name)
+        
+        return render_template('admin/region_detail.html', region_name=region_name, stats=region_stats,
+                               interrupted_run=interrupted_run)
         
     except Exception as e:
         flash(f'Error loading region details: {str(e)}', 'error')
@@ -134,16 +136,71 @@ def delete_region(region_name):
             return redirect(url_for('regions.index'))
         
         # Count tiles before deletion
-        tile_files = list(region_dir.glob('*.svg.gz'))
-        tile_count = len(tile_files)
+        catalog = get_tile_catalog(tiles_dir)
+        tile_count = (catalog.region(region_name) or {}).get('tile_count', 0)
         
         # Delete the entire region directory
         import shutil
         shutil.rmtree(region_dir)
+        catalog.remove_region(region_name)
         
         flash(f'Successfully deleted region "{region_name}" and {tile_count} tiles', 'success')
         return redirect(url_for('regions.index'))
         
     except Exception as e:
         flash(f'Error deleting region: {str(e)}', 'error')
-        return redirect(url_for('regions.index'))
\ No newline at end of file
+        return redirect(url_for('regions.index'))
+
+@regions_bp.route('/<region_name>/archive')
+def download_archive(region_name):
+    """Download a region's single-file tile archive."""
+    archive_file = archive_path(current_app.config['TILES_DIR'], region_name)
+    if not archive_file.exists():
+        flash(f'Region "{region_name}" has no archive', 'error')
+        return redirect(url_for('regions.region_detail', region_name=region_name))
+    return send_file(archive_file.resolve(), as_attachment=True, download_name=archive_file.name)
+
+@regions_bp.route('/<region_name>/archive/export', methods=['POST'])
+def export_archive(region_name):
+    """Pack a region's tiles into its single-file archive."""
+    try:
+        tiles_dir = Path(current_app.config['TILES_DIR'])
+        region_dir = tiles_dir / 'regions' / region_name
+        
+        if not (region_dir / 'metadata.json').exists():
+            flash(f'Region "{region_name}" not found', 'error')
+            return redirect(url_for('regions.index'))
+        
+        counts = export_region(region_dir, archive_path(tiles_dir, region_name))
+        flash(f'Archived "{region_name}": {counts["written"]} tiles written, '
+              f'{counts["unchanged"]} unchanged, {counts["removed"]} removed', 'success')
+        
+    except Exception as e:
+        flash(f'Error exporting archive: {str(e)}', 'error')
+    return redirect(url_for('regions.region_detail', region_name=region_name))
+
+@regions_bp.route('/<region_name>/archive/import', methods=['POST'])
+def import_archive(region_name):
+    """Unpack a region's archive (uploaded, or the one in tiles/archives) into its tiles."""
+    try:
+        tiles_dir = Path(current_app.config['TILES_DIR'])
+        archive_file = archive_path(tiles_dir, region_name)
+        
+        upload = request.files.get('archive')
+        if upload and upload.filename:
+            archive_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = archive_file.with_name(archive_file.name + '.upload')
+            upload.save(temp_file)
+            temp_file.replace(archive_file)
+        
+        if not archive_file.exists():
+            flash(f'Region "{region_name}" has no archive to import', 'error')
+            return redirect(url_for('regions.index'))
+        
+        tile_count = import_region(archive_file, tiles_dir / 'regions' / region_name)
+        get_tile_catalog(tiles_dir).scan_region(region_name)
+        flash(f'Imported {tile_count} tiles into "{region_name}" from its archive', 'success')
+        
+    except Exception as e:
+        flash(f'Error importing archive: {str(e)}', 'error')
+    return redirect(url_for('regions.region_detail', region_name=region_name))
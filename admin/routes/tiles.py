@@ -1,51 +1,32 @@
 """Tiles browser routes."""
 
-from flask import Blueprint, render_template, current_app, send_file, abort
+from flask import Blueprint, render_template, current_app, send_file, abort, jsonify
 from pathlib import Path
 import gzip
 
+from admin.tile_cache import TileCache
+from api.tile_response import tile_response, archived_tile_response, accepts_gzip
+from tile_generation.archive import open_archive
+from tile_generation.catalog import get_tile_catalog
+
 tiles_bp = Blueprint('tiles', __name__)
 
 @tiles_bp.route('/')
 def index():
     """Tiles browser main page."""
     try:
-        tiles_dir = Path(current_app.config['TILES_DIR'])
-        regions_dir = tiles_dir / 'regions'
-        
         regions = []
         
-        if regions_dir.exists():
-            for region_dir in regions_dir.iterdir():
-                if region_dir.is_dir():
-                    # Count tiles
-                    tile_files = list(region_dir.glob('*.svg.gz'))
-                    
-                    if tile_files:  # Only show regions with tiles
-                        # Calculate size
-                        total_size = sum(f.stat().st_size for f in tile_files)
-                        
-                        # Load metadata if available
-                        metadata_file = region_dir / 'metadata.json'
-                        metadata = None
-                        if metadata_file.exists():
-                            import json
-                            try:
-                                with metadata_file.open('r') as f:
-                                    metadata = json.load(f)
-                            except:
-                                pass
-                        
-                        regions.append({
-                            'name': region_dir.name,
-                            'display_name': region_dir.name.replace('-', ' ').title(),
-                            'tile_count': len(tile_files),
-                            'size_mb': round(total_size / (1024 * 1024), 1),
-                            'metadata': metadata
-                        })
-        
-        # Sort by name
-        regions.sort(key=lambda x: x['name'])
+        # Catalog regions come sorted by name
+        for region in get_tile_catalog(current_app.config['TILES_DIR']).regions():
+            if region['tile_count']:  # Only show regions with tiles
+                regions.append({
+                    'name': region['name'],
+                    'display_name': region['name'].replace('-', ' ').title(),
+                    'tile_count': region['tile_count'],
+                    'size_mb': round(region['size_bytes'] / (1024 * 1024), 1),
+                    'metadata': region['metadata']
+                })
         
         return render_template('admin/tiles.html', regions=regions)
         
@@ -56,16 +37,16 @@ def index():
 def region_tiles(region_name):
     """Browse tiles for a specific region."""
     try:
-        tiles_dir = Path(current_app.config['TILES_DIR'])
-        region_dir = tiles_dir / 'regions' / region_name
+        catalog = get_tile_catalog(current_app.config['TILES_DIR'])
+        summary = catalog.region(region_name)
         
-        if not region_dir.exists():
+        if summary is None:
             abort(404, f"Region '{region_name}' not found")
         
-        # Get all tile files
-        tile_files = list(region_dir.glob('*.svg.gz'))
+        # Tiles with their coordinates parsed once, when catalogued
+        tile_entries = catalog.tiles(region_name)
         
-        if not tile_files:
+        if not tile_entries:
             return render_template('admin/region_tiles.html', 
                                  region_name=region_name, 
                                  tiles=[], 
@@ -73,39 +54,17 @@ def region_tiles(region_name):
         
         # Process tile information
         tiles = []
-        for tile_file in sorted(tile_files):
-            # Extract coordinates from filename (e.g., "43.650_-79.380.svg.gz")
-            filename = tile_file.stem.replace('.svg', '')  # Remove .svg from .svg.gz
-            try:
-                lat_str, lng_str = filename.split('_')
-                lat = float(lat_str)
-                lng = float(lng_str)
-                
-                # Get file info
-                size_kb = round(tile_file.stat().st_size / 1024, 1)
-                
-                tiles.append({
-                    'filename': tile_file.name,
-                    'display_name': f"Tile {lat:.3f}, {lng:.3f}",
-                    'lat': lat,
-                    'lng': lng,
-                    'size_kb': size_kb,
-                    'url': f"/tiles/regions/{region_name}/{tile_file.name}"
-                })
-            except (ValueError, IndexError):
-                # Skip files that don't match expected pattern
-                continue
-        
-        # Load metadata
-        metadata_file = region_dir / 'metadata.json'
-        metadata = None
-        if metadata_file.exists():
-            import json
-            try:
-                with metadata_file.open('r') as f:
-                    metadata = json.load(f)
-            except:
-                pass
+        for tile in tile_entries:
+            tiles.append({
+                'filename': tile['filename'],
+                'display_name': f"Tile {tile['lat']:.3f}, {tile['lng']:.3f}",
+                'lat': tile['lat'],
+                'lng': tile['lng'],
+                'size_kb': round(tile['size_bytes'] / 1024, 1),
+                'url': f"/tiles/regions/{region_name}/{tile['filename']}"
+            })
+        
+        metadata = summary['metadata']
         
         # Calculate total size
         total_size = sum(t['size_kb'] for t in tiles)
@@ -135,16 +94,21 @@ def serve_tile(region_name, tile_filename):
         tile_path = tiles_dir / 'regions' / region_name / tile_filename
         
         if not tile_path.exists():
+            archive = open_archive(tiles_dir, region_name)
+            tile = archive.get(tile_filename) if archive else None
+            if tile:
+                return archived_tile_response(tile)
             abort(404, f"Tile '{tile_filename}' not found in region '{region_name}'")
         
         # Check if it's a compressed file
         if tile_filename.endswith('.svg.gz'):
-            # Serve decompressed SVG
-            with gzip.open(tile_path, 'rt', encoding='utf-8') as f:
-                content = f.read()
+            # Browsers that accept gzip get the file as stored
+            if accepts_gzip():
+                return tile_response(tile_path)
             
+            # Serve decompressed SVG, decompressing each tile version once
             from flask import Response
-            return Response(content, mimetype='image/svg+xml')
+            return Response(get_tile_cache().get(tile_path), mimetype='image/svg+xml')
         else:
             # Serve file directly
             return send_file(tile_path)
@@ -152,6 +116,19 @@ def serve_tile(region_name, tile_filename):
     except Exception as e:
         abort(500, f"Error serving tile: {str(e)}")
 
+@tiles_bp.route('/cache-stats')
+def cache_stats():
+    """Hit, miss and eviction counts of the decompressed tile cache."""
+    return jsonify(get_tile_cache().stats())
+
+def get_tile_cache():
+    """Get the app's cache of decompressed tiles."""
+    cache = current_app.extensions.get('admin_tile_cache')
+    if cache is None:
+        cache = TileCache(current_app.config.get('ADMIN_TILE_CACHE_MB', 64) * 1024 * 1024)
+        current_app.extensions['admin_tile_cache'] = cache
+    return cache
+
 @tiles_bp.route('/regions/<region_name>/<tile_filename>/raw')
 def serve_tile_raw(region_name, tile_filename):
     """Serve a tile file in its raw compressed format."""
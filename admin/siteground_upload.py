@@ -1,9 +1,12 @@
 """SiteGround file upload utilities."""
 import ftplib
 import os
+import json
 from pathlib import Path
 import logging
 
+from tile_generation.tile_hashes import HASHES_FILE, tile_hash
+
 logger = logging.getLogger(__name__)
 
 class SiteGroundUploader:
@@ -40,8 +43,15 @@ class SiteGroundUploader:
         except Exception as e:
             return False, f"Failed to upload .htaccess: {str(e)}"
 
-    def upload_region_tiles(self, region_name):
-        """Upload all tiles for a specific region to SiteGround."""
+    def upload_region_tiles(self, region_name, changed_only=True):
+        """Upload a region's tiles to SiteGround.
+        
+        With changed_only, tiles whose content hash (tile_hashes.json, written
+        by the tile builder) matches the hash recorded at their last upload
+        are skipped, as long as the server still holds a file of the tile's
+        name and size; tiles deleted or truncated on the server are uploaded
+        again.
+        """
         if not self._check_credentials():
             return False, "SiteGround credentials not configured"
             
@@ -60,18 +70,50 @@ class SiteGroundUploader:
                 remote_tiles_dir = f"{self.remote_tiles_path.rstrip('/')}"
                 self._create_remote_directory(ftp, remote_tiles_dir)
                 
-                # Upload all tiles to flat structure
+                # Upload changed tiles to flat structure
                 uploaded_count = 0
-                tile_files = list(local_region_path.glob('*.svg.gz'))
+                # Only hashes that still match their tile's size and mtime count
+                recorded_hashes = self._load_hashes(local_region_path / HASHES_FILE)
+                tile_hashes = {}
+                for tile_file in local_region_path.glob('*.svg.gz'):
+                    sha256 = tile_hash(recorded_hashes, tile_file)
+                    if sha256:
+                        tile_hashes[tile_file.name] = sha256
+                uploaded_hashes = self._load_hashes(local_region_path / 'uploaded_hashes.json')
+                tile_files = [
+                    tile_file for tile_file in local_region_path.glob('*.svg.gz')
+                    if not changed_only or tile_file.name not in tile_hashes or
+                    tile_hashes[tile_file.name] != uploaded_hashes.get(tile_file.name)
+                ]
+                if changed_only:
+                    # The local record may be stale, so check the unchanged tiles on the server
+                    remote_sizes = self._remote_sizes(ftp, remote_tiles_dir)
+                    uploading = set(tile_files)
+                    for tile_file in local_region_path.glob('*.svg.gz'):
+                        if tile_file in uploading:
+                            continue
+                        if remote_sizes is not None:
+                            remote_size = remote_sizes.get(tile_file.name)
+                        else:
+                            remote_size = self._remote_size(ftp, f"{remote_tiles_dir}/{tile_file.name}")
+                        if remote_size != tile_file.stat().st_size:
+                            tile_files.append(tile_file)
+                skipped_count = len(list(local_region_path.glob('*.svg.gz'))) - len(tile_files)
                 
-                for tile_file in tile_files:
-                    # Upload directly to /tiles/ directory (flat structure)
-                    remote_file_path = f"{remote_tiles_dir}/{tile_file.name}"
-                    
-                    with open(tile_file, 'rb') as f:
-                        ftp.storbinary(f'STOR {remote_file_path}', f)
-                    
-                    uploaded_count += 1
+                try:
+                    for tile_file in tile_files:
+                        # Upload directly to /tiles/ directory (flat structure)
+                        remote_file_path = f"{remote_tiles_dir}/{tile_file.name}"
+                        
+                        with open(tile_file, 'rb') as f:
+                            ftp.storbinary(f'STOR {remote_file_path}', f)
+                        
+                        uploaded_count += 1
+                        if tile_file.name in tile_hashes:
+                            uploaded_hashes[tile_file.name] = tile_hashes[tile_file.name]
+                finally:
+                    # Record what reached the server, even if the upload stopped early
+                    self._save_hashes(local_region_path / 'uploaded_hashes.json', uploaded_hashes)
                 
                 # Upload region metadata to a separate metadata directory for management
                 metadata_dir = f"{self.remote_tiles_path.rstrip('/')}_metadata"
@@ -94,7 +136,8 @@ class SiteGroundUploader:
                     server_uploaded_count = len([f for f in server_files if f in uploaded_tile_names])
                     
                     if server_uploaded_count == uploaded_count:
-                        return True, f"Successfully uploaded and verified {uploaded_count} tiles for {region_name} to flat structure"
+                        return True, (f"Successfully uploaded and verified {uploaded_count} tiles for {region_name} "
+                                      f"to flat structure ({skipped_count} unchanged tiles skipped)")
                     else:
                         return False, f"Upload incomplete: uploaded {uploaded_count} but found {server_uploaded_count} on server"
                         
@@ -110,6 +153,38 @@ class SiteGroundUploader:
             logger.error(error_msg)
             return False, error_msg
     
+    def _remote_sizes(self, ftp, remote_dir):
+        """Get {file name: size} of a remote directory, or None if the server cannot list sizes (no MLSD)."""
+        try:
+            return {name: int(facts['size']) for name, facts in ftp.mlsd(remote_dir, facts=['type', 'size'])
+                    if facts.get('type') == 'file' and 'size' in facts}
+        except (ftplib.error_perm, ValueError):
+            return None
+    
+    def _remote_size(self, ftp, remote_path):
+        """Get the size of a remote file, or None if it does not exist."""
+        try:
+            ftp.voidcmd('TYPE I')
+            return ftp.size(remote_path)
+        except ftplib.error_perm:
+            return None
+    
+    def _load_hashes(self, hashes_file):
+        """Load a {tile filename: SHA-256} file, or an empty dict."""
+        try:
+            with open(hashes_file) as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    
+    def _save_hashes(self, hashes_file, hashes):
+        """Save a {tile filename: SHA-256} file."""
+        try:
+            with open(hashes_file, 'w') as f:
+                json.dump(hashes, f, indent=2, sort_keys=True)
+        except Exception as e:
+            logger.error(f"Error saving {hashes_file}: {e}")
+    
     def upload_single_tile(self, region_name, tile_filename):
         """Upload a single tile file to SiteGround."""
         if not self._check_credentials():
@@ -142,7 +217,7 @@ class SiteGroundUploader:
             logger.error(f"Error uploading {tile_filename}: {e}")
             return False, f"Upload failed: {e}"
     
-    def sync_all_regions(self):
+    def sync_all_regions(self, changed_only=True):
         """Upload all local regions to SiteGround."""
         if not self._check_credentials():
             return False, "SiteGround credentials not configured"
@@ -156,7 +231,7 @@ class SiteGroundUploader:
         results = {}
         for region_dir in regions_dir.iterdir():
             if region_dir.is_dir():
-                success, message = self.upload_region_tiles(region_dir.name)
+                success, message = self.upload_region_tiles(region_dir.name, changed_only)
                 results[region_dir.name] = {'success': success, 'message': message}
         
         total_regions = len(results)
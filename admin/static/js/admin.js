@@ -23,4 +23,37 @@ document.addEventListener('DOMContentLoaded', function() {
             console.log('Region selected:', card.querySelector('h3')?.textContent);
         });
     });
-});
\ No newline at end of file
+});
+
+/**
+ * Live generation events pushed by the server (/admin/events).
+ *
+ * TileEvents.subscribe(region, handlers) opens an EventSource for one
+ * region (or every region when region is null) and calls handlers[type]
+ * with the parsed data of each event: progress, tile_started,
+ * tile_finished, stage, region_finished, error and job. It returns a
+ * function that closes the stream. The browser reconnects on its own and
+ * the server replays the events missed in between.
+ */
+const TileEvents = {
+    supported: typeof window.EventSource !== 'undefined',
+
+    subscribe(region, handlers) {
+        const url = region ? `/admin/events?region=${encodeURIComponent(region)}` : '/admin/events';
+        const source = new EventSource(url);
+
+        Object.keys(handlers).forEach(type => {
+            source.addEventListener(type, event => {
+                try {
+                    handlers[type](JSON.parse(event.data));
+                } catch (error) {
+                    console.error(`Error handling ${type} event:`, error);
+                }
+            });
+        });
+
+        return () => source.close();
+    }
+};
+
+window.TileEvents = TileEvents;
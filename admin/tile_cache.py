@@ -0,0 +1,70 @@
+"""Size-bounded LRU cache of decompressed tiles for the admin tile browser."""
+
+import gzip
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class TileCache:
+    """Decompressed SVG bytes of .svg.gz tiles, least recently used evicted first.
+
+    Entries are keyed by path, mtime and size, so a regenerated tile is
+    read again and its old entry ages out.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, tile_path):
+        """Get a tile's decompressed SVG, reading it only if it is not cached."""
+        tile_path = Path(tile_path)
+        stat = tile_path.stat()
+        key = (str(tile_path), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return content
+            self.misses += 1
+
+        with gzip.open(tile_path, 'rb') as f:
+            content = f.read()
+
+        # Tiles bigger than the whole cache are served but not kept
+        if len(content) <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = content
+                    self.size += len(content)
+                while self.size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+                    self.evictions += 1
+        return content
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_mb': round(self.size / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / requests, 3) if requests else None
+            }
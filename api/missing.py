@@ -1,8 +1,12 @@
 """API endpoints for missing tile reporting."""
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from pathlib import Path
 from datetime import datetime
 
+from tile_generation.missing_tiles import MissingTileStore, grid_region, point_tile_key, tile_name, TILE_SIZE
+from tile_generation.catalog import get_tile_catalog
+
 missing_api_bp = Blueprint('missing_api', __name__)
 
 @missing_api_bp.route('/missing-tile', methods=['POST'])
@@ -20,21 +24,35 @@ def report_missing_tile():
         if lat is None or lng is None:
             return jsonify({'error': 'lat and lng are required'}), 400
         
-        # Round to tile boundaries
-        tile_lat = round(float(lat), 2)
-        tile_lng = round(float(lng), 2)
+        # The tile containing the point, by its south-west corner
+        row, col = point_tile_key(float(lat), float(lng))
+        tile_lat = round(row * TILE_SIZE, 3)
+        tile_lng = round(col * TILE_SIZE, 3)
+        
+        # Only tiles on a region's grid can be generated, so no others are counted
+        regions = [region['metadata'] for region in get_tile_catalog(current_app.config['TILES_DIR']).regions()
+                   if region['metadata']]
+        region = grid_region(regions, row, col, data.get('region'))
+        if region is None:
+            return jsonify({
+                'status': 'ignored',
+                'message': 'Tile is outside every region',
+                'tile_coordinates': {'lat': tile_lat, 'lng': tile_lng}
+            })
         
         # Store missing tile request
         missing_tile_data = {
             'lat': tile_lat,
             'lng': tile_lng,
+            'row': row,
+            'col': col,
+            'region': region['name'],
             'requested_at': datetime.now().isoformat(),
             'context': data.get('context', {}),
             'user_location': data.get('user_location'),
             'timestamp': data.get('timestamp')
         }
         
-        # TODO: Store in database for batch processing
         store_missing_tile_request(missing_tile_data)
         
         return jsonify({
@@ -46,13 +64,36 @@ def report_missing_tile():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def get_missing_tile_store():
+    """Get the app's missing tile demand table."""
+    store = current_app.extensions.get('missing_tiles')
+    if store is None:
+        store = MissingTileStore(Path(current_app.config['DATA_DIR']) / 'missing_tiles.db')
+        current_app.extensions['missing_tiles'] = store
+    return store
+
 def store_missing_tile_request(tile_data):
-    """Store missing tile request for later processing."""
-    # For now, just log it
-    print(f"Missing tile request: {tile_data['lat']}, {tile_data['lng']} at {tile_data['requested_at']}")
-    
-    # TODO: Implement database storage
-    # - Check if already in queue
-    # - Increment request count if exists
-    # - Add to generation queue if high priority
-    pass
\ No newline at end of file
+    """Count a missing tile request; the hottest tiles are scheduled for generation."""
+    get_missing_tile_store().record(tile_data['row'], tile_data['col'], tile_data.get('region'))
+
+@missing_api_bp.route('/missing-tiles')
+def list_missing_tiles():
+    """List the most requested missing tiles."""
+    try:
+        limit = min(int(request.args.get('limit', 50)), 1000)
+        store = get_missing_tile_store()
+        tiles = [{
+            'tile': tile_name(tile['tile_row'], tile['tile_col']),
+            'lat': round(tile['tile_row'] * TILE_SIZE, 3),
+            'lng': round(tile['tile_col'] * TILE_SIZE, 3),
+            'region': tile['region'],
+            'request_count': tile['request_count'],
+            'first_seen': tile['first_seen'],
+            'last_seen': tile['last_seen'],
+            'job_id': tile['job_id']
+        } for tile in store.hottest(limit=limit, unscheduled=False)]
+        
+        return jsonify({'tiles': tiles, 'stats': store.stats()})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
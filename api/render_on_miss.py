@@ -0,0 +1,134 @@
+"""Synchronous rendering of missing tiles for the tile API (RENDER_ON_MISS).
+
+A request for a tile that does not exist renders it from the province
+feature store, when that is up to date (see
+TileBuilder.render_tile_on_demand), instead of returning 404. Without one
+the tile is reported missing and left to the missing tile jobs.
+Concurrent requests for the same cold tile wait on one render. A request
+waits at most RENDER_ON_MISS_BUDGET seconds; a render that takes longer
+keeps going in the background and the request gets a 404.
+"""
+
+import re
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from tile_generation.builder import TileBuilder
+
+TILE_NAME = re.compile(r'^(-?\d+\.\d{3})_(-?\d+\.\d{3})\.svg\.gz$')
+
+# Cold render latencies kept for the metrics percentiles
+LATENCY_SAMPLES = 500
+
+
+class RenderMetrics:
+    """Counters and recent latencies of cold renders."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {
+            'requests': 0,      # misses that asked for a render
+            'renders': 0,       # renders started
+            'joined': 0,        # requests that waited on a render already running
+            'rendered': 0,      # renders that wrote the tile
+            'failed': 0,        # renders that raised or produced nothing
+            'no_source': 0,     # tiles without prepared data to render from
+            'timeouts': 0       # requests answered 404 after the time budget
+        }
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.sources = {}
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def record_render(self, seconds, source):
+        with self._lock:
+            self.counts['rendered'] += 1
+            self.latencies.append(seconds)
+            self.sources[source] = self.sources.get(source, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            snapshot = {**self.counts, 'sources': dict(self.sources), 'latency_ms': None}
+        if latencies:
+            def percentile(p):
+                return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+            snapshot['latency_ms'] = {
+                'samples': len(latencies),
+                'mean': round(sum(latencies) / len(latencies) * 1000, 1),
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+                'max': round(latencies[-1] * 1000, 1)
+            }
+        return snapshot
+
+
+class TileRenderer:
+    """Single-flight, time-budgeted rendering of missing tiles."""
+
+    def __init__(self, budget=10.0, workers=2, builder_factory=TileBuilder):
+        self.budget = budget
+        self.builder_factory = builder_factory
+        self.metrics = RenderMetrics()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render-on-miss')
+        # Reentrant: a render that already finished runs its done callback at once
+        self._lock = threading.RLock()
+        self._inflight = {}
+
+    def render(self, region_name, tile_name):
+        """Render a missing tile and return its path, or None if it cannot be served in time."""
+        match = TILE_NAME.match(tile_name)
+        if not match:
+            return None
+        tile_lat, tile_lng = float(match.group(1)), float(match.group(2))
+
+        self.metrics.count('requests')
+        key = (region_name, tile_name)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future:
+                self.metrics.count('joined')
+            else:
+                self.metrics.count('renders')
+                future = self._executor.submit(self._render, region_name, tile_lat, tile_lng)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _: self._forget(key))
+
+        try:
+            return future.result(timeout=self.budget)
+        except FutureTimeoutError:
+            self.metrics.count('timeouts')
+            return None
+
+    def _forget(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _render(self, region_name, tile_lat, tile_lng):
+        started = time.monotonic()
+        try:
+            builder = self.builder_factory()
+            render = builder.render_tile_on_demand(region_name, tile_lat, tile_lng)
+        except FileNotFoundError:
+            self.metrics.count('no_source')
+            return None
+        except Exception as e:
+            print(f"On-demand render of {region_name} {tile_lat:.3f}_{tile_lng:.3f} failed: {e}")
+            self.metrics.count('failed')
+            return None
+
+        if render is None:
+            self.metrics.count('no_source')
+            return None
+        if not render.get('path'):
+            self.metrics.count('failed')
+            return None
+
+        seconds = time.monotonic() - started
+        self.metrics.record_render(seconds, render['source'])
+        print(f"🧊 Cold render {region_name} {tile_lat:.3f}_{tile_lng:.3f} in {seconds:.2f}s ({render['source']})")
+        return render['path']
@@ -0,0 +1,126 @@
+"""HTTP responses for precompressed .svg.gz tiles.
+
+Tiles are stored gzipped, so clients that accept gzip get the file bytes
+as they are with Content-Encoding: gzip; other clients get the SVG
+decompressed as it streams. Responses carry a strong ETag from the tile's
+SVG hash (tile_hashes.json, written by the builder) while the tile still
+has the size and mtime recorded with it, else from its size and mtime,
+plus Last-Modified and Cache-Control; conditional requests are answered
+with 304.
+"""
+
+import io
+import gzip
+import json
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+from flask import Response, request, current_app
+
+from tile_generation.tile_hashes import HASHES_FILE, verified_hash
+
+# Bytes read per chunk when decompressing for clients without gzip
+STREAM_CHUNK = 64 * 1024
+
+_hash_cache = {}
+_hash_lock = threading.Lock()
+
+
+def region_tile_hashes(region_dir):
+    """Get a region's tile hashes ({tile filename: entry}), re-read only when the file changes."""
+    hashes_file = Path(region_dir) / HASHES_FILE
+    try:
+        mtime = hashes_file.stat().st_mtime_ns
+    except OSError:
+        return {}
+
+    with _hash_lock:
+        cached = _hash_cache.get(hashes_file)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    try:
+        with open(hashes_file) as f:
+            hashes = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    with _hash_lock:
+        _hash_cache[hashes_file] = (mtime, hashes)
+    return hashes
+
+
+def accepts_gzip():
+    """Check whether the request's Accept-Encoding allows gzip."""
+    return request.accept_encodings.quality('gzip') > 0
+
+
+def tile_etag(tile_path, stat=None):
+    """Get the tile's entity tag: its SVG hash, or its size and mtime if the hash is unknown or stale."""
+    tile_path = Path(tile_path)
+    stat = stat or tile_path.stat()
+    sha256 = verified_hash(region_tile_hashes(tile_path.parent).get(tile_path.name), stat)
+    if sha256:
+        return sha256[:32]
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def _not_modified(etags, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.if_none_match
+    if if_none_match:
+        return if_none_match.star_tag or any(if_none_match.contains_weak(tag) for tag in etags)
+    if_modified_since = request.if_modified_since
+    return bool(if_modified_since and last_modified.replace(microsecond=0) <= if_modified_since)
+
+
+def tile_response(tile_path, max_age=None):
+    """Respond with a .svg.gz tile, or 304 if the client's copy is current."""
+    tile_path = Path(tile_path)
+    stat = tile_path.stat()
+
+    def decompress():
+        with gzip.open(tile_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(STREAM_CHUNK), b''):
+                yield chunk
+
+    return _gzip_tile_response(tile_etag(tile_path, stat), stat.st_mtime,
+                               tile_path.read_bytes, decompress, max_age)
+
+
+def archived_tile_response(tile, max_age=None):
+    """Respond with a tile read from a region archive (TileArchive.get)."""
+    data, sha256, modified = tile
+    etag = sha256[:32] if sha256 else f"{int(modified * 1e9):x}-{len(data):x}"
+
+    def decompress():
+        with gzip.GzipFile(fileobj=io.BytesIO(data)) as f:
+            for chunk in iter(lambda: f.read(STREAM_CHUNK), b''):
+                yield chunk
+
+    return _gzip_tile_response(etag, modified, lambda: data, decompress, max_age)
+
+
+def _gzip_tile_response(etag, mtime, read_gzipped, decompress, max_age):
+    if max_age is None:
+        max_age = current_app.config.get('TILE_CACHE_MAX_AGE', 86400)
+
+    gzipped = accepts_gzip()
+    # Each encoding is its own representation, with its own strong tag
+    response_etag = f"{etag}.gz" if gzipped else etag
+    last_modified = datetime.fromtimestamp(mtime, tz=timezone.utc)
+
+    if _not_modified((etag, f"{etag}.gz"), last_modified):
+        response = Response(status=304)
+    elif gzipped:
+        response = Response(read_gzipped(), mimetype='image/svg+xml')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(decompress(), mimetype='image/svg+xml')
+
+    response.set_etag(response_etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = f"public, max-age={max_age}"
+    response.vary.add('Accept-Encoding')
+    return response
@@ -1,79 +1,173 @@
 """API endpoints for tile serving."""
 
-from flask import Blueprint, jsonify, send_file, request, current_app
+from flask import Blueprint, Response, jsonify, send_file, request, current_app
 from pathlib import Path
+import os
+import re
 import json
+import math
+import secrets
+
+from tile_generation.missing_tiles import tile_key, region_contains
+from api.missing import get_missing_tile_store
+from api.render_on_miss import TileRenderer, TILE_NAME
+from api.tile_response import tile_response, archived_tile_response, region_tile_hashes
+from tile_generation.tile_hashes import verified_hash
+from tile_generation.archive import open_archive
+from tile_generation.catalog import get_tile_catalog
+from tile_generation.builder import TileBuilder
 
 tiles_api_bp = Blueprint('tiles_api', __name__)
 
+REGION_NAME = re.compile(r'^[\w-]+$')
+
 @tiles_api_bp.route('/tile/<region>/<tile_name>')
 def serve_tile(region, tile_name):
     """Serve a specific tile file."""
     tile_path = Path(current_app.config['TILES_DIR']) / 'regions' / region / tile_name
     
     if tile_path.exists():
-        return send_file(tile_path, mimetype='image/svg+xml')
-    else:
-        # Report missing tile
-        lat_lng = tile_name.replace('.svg.gz', '').split('_')
-        if len(lat_lng) == 2:
-            try:
-                lat, lng = float(lat_lng[0]), float(lat_lng[1])
-                report_missing_tile(lat, lng, region)
-            except ValueError:
-                pass
+        return tile_response(tile_path)
+    
+    # Regions deployed as a single-file archive
+    archive = open_archive(current_app.config['TILES_DIR'], region)
+    if archive:
+        tile = archive.get(tile_name)
+        if tile:
+            return archived_tile_response(tile)
+    
+    # Render the tile now if enabled and it is on the region's grid
+    if current_app.config.get('RENDER_ON_MISS') and in_region_grid(region, tile_name):
+        rendered = get_tile_renderer().render(region, tile_name)
+        if rendered:
+            return tile_response(rendered)
+    
+    # Report the missing tile if the region could generate it
+    if in_region_grid(region, tile_name):
+        match = TILE_NAME.match(tile_name)
+        report_missing_tile(float(match.group(1)), float(match.group(2)), region)
+    
+    return jsonify({'error': 'Tile not found'}), 404
+
+@tiles_api_bp.route('/tiles')
+def serve_viewport_tiles():
+    """Serve every tile of a region covering a bounding box in one multipart response.
+    
+    Query: region, bbox=west,south,east,north and optionally report_missing=1
+    to count the region's missing tiles as requested. Each present tile is a
+    part holding the stored .svg.gz bytes (Content-Encoding: gzip) with its
+    Content-Location and ETag; a final application/json part lists the tiles
+    sent and the missing ones. Tiles are not rendered on request here.
+    """
+    region = request.args.get('region', '')
+    try:
+        west, south, east, north = (float(value) for value in request.args.get('bbox', '').split(','))
+    except ValueError:
+        return jsonify({'error': 'bbox must be west,south,east,north'}), 400
+    if not all(math.isfinite(value) for value in (west, south, east, north)):
+        return jsonify({'error': 'bbox values must be finite numbers'}), 400
+    if not REGION_NAME.match(region):
+        return jsonify({'error': 'a valid region is required'}), 400
+    if west >= east or south >= north:
+        return jsonify({'error': 'bbox must have west < east and south < north'}), 400
+    
+    summary = get_tile_catalog(current_app.config['TILES_DIR']).region(region)
+    if not summary:
+        return jsonify({'error': 'Region not found'}), 404
+    
+    bounds = {'west': west, 'south': south, 'east': east, 'north': north}
+    limit = current_app.config.get('TILE_BATCH_LIMIT', 64)
+    
+    # Tiles of the bbox, by the same grid math the builder generates them with;
+    # the exact count only rules out huge boxes before the grid is listed
+    tiles = get_grid_builder().calculate_tile_grid(bounds) if tile_grid_size(bounds) <= limit else None
+    if tiles is None or len(tiles) > limit:
+        return jsonify({'error': f'bbox covers more than {limit} tiles'}), 400
+    
+    region_dir = Path(current_app.config['TILES_DIR']) / 'regions' / region
+    archive = open_archive(current_app.config['TILES_DIR'], region)
+    region_bounds = (summary['metadata'] or {}).get('bounds')
+    present, missing = [], []
+    for tile_lat, tile_lng in tiles:
+        name = f"{tile_lat:.3f}_{tile_lng:.3f}.svg.gz"
+        tile_path = region_dir / name
+        archived = None if tile_path.exists() or not archive else archive.get(name)
+        if archived or tile_path.exists():
+            present.append((name, tile_path, archived))
+        elif region_bounds and region_contains(region_bounds, *tile_key(tile_lat, tile_lng)):
+            missing.append(name)
+    
+    if request.args.get('report_missing') in ('1', 'true', 'yes'):
+        for name in missing:
+            lat, lng = name[:-len('.svg.gz')].split('_')
+            report_missing_tile(float(lat), float(lng), region)
+    
+    boundary = secrets.token_hex(16)
+    hashes = region_tile_hashes(region_dir)
+    
+    def generate():
+        sent = []
+        for name, tile_path, archived in present:
+            if archived:
+                data, sha256, _ = archived
+            else:
+                try:
+                    with open(tile_path, 'rb') as f:
+                        data = f.read()
+                        sha256 = verified_hash(hashes.get(name), os.fstat(f.fileno()))
+                except OSError:
+                    missing.append(name)
+                    continue
+            sent.append(name)
+            headers = ['Content-Type: image/svg+xml', 'Content-Encoding: gzip',
+                       f'Content-Location: /api/tile/{region}/{name}', f'Content-Length: {len(data)}']
+            if sha256:
+                headers.append(f'ETag: "{sha256[:32]}.gz"')
+            yield (f"--{boundary}\r\n" + ''.join(header + '\r\n' for header in headers) + '\r\n').encode()
+            yield data
+            yield b'\r\n'
         
-        return jsonify({'error': 'Tile not found'}), 404
+        # Trailer part: what was sent and what is missing
+        trailer = json.dumps({'region': region, 'tiles': sent, 'missing': missing}).encode()
+        yield (f"--{boundary}\r\nContent-Type: application/json\r\n"
+               f"Content-Length: {len(trailer)}\r\n\r\n").encode()
+        yield trailer
+        yield f"\r\n--{boundary}--\r\n".encode()
+    
+    return Response(generate(), mimetype=f'multipart/mixed; boundary={boundary}')
+
+@tiles_api_bp.route('/render-on-miss/metrics')
+def render_on_miss_metrics():
+    """Counts and latencies of tiles rendered on request."""
+    return jsonify({
+        'enabled': bool(current_app.config.get('RENDER_ON_MISS')),
+        'budget_seconds': current_app.config.get('RENDER_ON_MISS_BUDGET', 10),
+        **get_tile_renderer().metrics.snapshot()
+    })
 
 @tiles_api_bp.route('/regions')
 def list_available_regions():
     """List all available regions and their coverage."""
     regions = []
-    regions_dir = Path(current_app.config['TILES_DIR']) / 'regions'
-    
-    if regions_dir.exists():
-        for region_dir in regions_dir.iterdir():
-            if region_dir.is_dir():
-                metadata_file = region_dir / 'metadata.json'
-                if metadata_file.exists():
-                    try:
-                        with open(metadata_file) as f:
-                            metadata = json.load(f)
-                        
-                        # Add tile count
-                        tile_files = list(region_dir.glob('*.svg.gz'))
-                        metadata['available_tiles'] = len(tile_files)
-                        regions.append(metadata)
-                        
-                    except Exception as e:
-                        print(f"Error reading metadata for {region_dir}: {e}")
+    
+    for region in get_tile_catalog(current_app.config['TILES_DIR']).regions():
+        if region['metadata']:
+            metadata = region['metadata']
+            metadata['available_tiles'] = region['tile_count']
+            regions.append(metadata)
     
     return jsonify({'regions': regions})
 
 @tiles_api_bp.route('/region/<region_name>/tiles')
 def list_region_tiles(region_name):
     """List all tiles in a specific region."""
-    region_dir = Path(current_app.config['TILES_DIR']) / 'regions' / region_name
+    catalog = get_tile_catalog(current_app.config['TILES_DIR'])
     
-    if not region_dir.exists():
+    if catalog.region(region_name) is None:
         return jsonify({'error': 'Region not found'}), 404
     
-    tiles = []
-    for tile_file in region_dir.glob('*.svg.gz'):
-        # Parse coordinates from filename
-        name_parts = tile_file.stem.split('_')
-        if len(name_parts) == 2:
-            try:
-                lat, lng = float(name_parts[0]), float(name_parts[1])
-                tiles.append({
-                    'filename': tile_file.name,
-                    'lat': lat,
-                    'lng': lng,
-                    'size_bytes': tile_file.stat().st_size,
-                    'url': f'/api/tile/{region_name}/{tile_file.name}'
-                })
-            except ValueError:
-                continue
+    tiles = [{**tile, 'url': f"/api/tile/{region_name}/{tile['filename']}"}
+             for tile in catalog.tiles(region_name)]
     
     return jsonify({
         'region': region_name,
@@ -82,10 +176,43 @@ def list_region_tiles(region_name):
     })
 
 def report_missing_tile(lat, lng, region):
-    """Report a missing tile request."""
-    # This would store the missing tile request in database
-    # For now, just log it
-    print(f"Missing tile requested: {lat}, {lng} in region {region}")
+    """Count a request for a missing tile on the region's grid in the demand table."""
+    row, col = tile_key(lat, lng)
+    get_missing_tile_store().record(row, col, region)
+
+def get_tile_renderer():
+    """Get the app's on-demand tile renderer."""
+    renderer = current_app.extensions.get('tile_renderer')
+    if renderer is None:
+        renderer = TileRenderer(current_app.config.get('RENDER_ON_MISS_BUDGET', 10),
+                                current_app.config.get('RENDER_ON_MISS_WORKERS', 2))
+        current_app.extensions['tile_renderer'] = renderer
+    return renderer
+
+def in_region_grid(region, tile_name):
+    """Check whether a tile name is a tile of a region's grid."""
+    match = TILE_NAME.match(tile_name)
+    summary = get_tile_catalog(current_app.config['TILES_DIR']).region(region)
+    if not match or not summary or not summary['metadata']:
+        return False
+    bounds = summary['metadata'].get('bounds')
+    return bool(bounds) and region_contains(bounds, *tile_key(float(match.group(1)), float(match.group(2))))
+
+def get_grid_builder():
+    """Get a TileBuilder kept for its tile grid math."""
+    builder = current_app.extensions.get('tile_grid_builder')
+    if builder is None:
+        builder = TileBuilder()
+        current_app.extensions['tile_grid_builder'] = builder
+    return builder
+
+def tile_grid_size(bounds):
+    """Count the grid cells bounds covers, without listing them.
     
-    # TODO: Store in database for batch processing
-    pass
\ No newline at end of file
+    calculate_tile_grid steps in floats and can return an extra row or
+    column, never fewer, so a count over the limit means the grid is too.
+    """
+    tile_size = get_grid_builder().tile_size
+    rows = math.ceil(bounds['north'] / tile_size) - math.floor(bounds['south'] / tile_size)
+    cols = math.ceil(bounds['east'] / tile_size) - math.floor(bounds['west'] / tile_size)
+    return rows * cols
@@ -1,6 +1,7 @@
 """Main Flask application for the tile generation server."""
 
-from flask import Flask, send_from_directory, jsonify, render_template
+from flask import Flask, send_from_directory, jsonify, render_template, abort
+from werkzeug.security import safe_join
 from pathlib import Path
 import os
 import json
@@ -20,6 +21,15 @@ def create_app(config_name='default'):
     # Register blueprints
     register_blueprints(app)
     
+    # Tile catalog, loaded once for the region and tile listings
+    from tile_generation.catalog import get_tile_catalog
+    get_tile_catalog(app.config['TILES_DIR'])
+    
+    # Generation job queue and its workers
+    from admin.jobs import init_job_queue
+    from admin.routes import builder_config
+    init_job_queue(app, builder_config(app.config))
+    
     # Main routes
     @app.route('/')
     def index():
@@ -59,10 +69,17 @@ def register_blueprints(app):
     app.register_blueprint(missing_api_bp, url_prefix='/api')
     
     # Direct tile serving (high performance)
+    from api.tile_response import tile_response
+    
     @app.route('/tiles/<path:filepath>')
     def serve_tile(filepath):
         """Serve tile files directly."""
         tiles_dir = Path(app.config['TILES_DIR'])
+        if filepath.endswith('.svg.gz'):
+            tile_path = safe_join(str(tiles_dir), filepath)
+            if not tile_path or not Path(tile_path).is_file():
+                abort(404)
+            return tile_response(tile_path)
         return send_from_directory(tiles_dir, filepath)
 
 if __name__ == '__main__':
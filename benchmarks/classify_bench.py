@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Per-element OSM tag classification microbenchmark.
+
+Samples tagged nodes, ways and areas from a PBF (the cached Ontario extract by
+default) and times classifying them with the compiled tag rule indexes against
+a linear scan of the same rules, which is what the old if/elif chains did.
+
+Usage:
+    python benchmarks/classify_bench.py [PBF] [--limit N] [--repeat R]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import osmium
+
+from tile_generation.tag_rules import ANY, NODE_RULES, WAY_RULES, AREA_RULES, NODE_INDEX, WAY_INDEX, AREA_INDEX
+
+DEFAULT_PBF = Path(__file__).parent.parent / 'data' / 'osm_cache' / 'ontario-latest.osm.pbf'
+
+
+class TagSampler(osmium.SimpleHandler):
+    """Collect tag dicts of the first `limit` tagged elements of each type."""
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.node_count = 0
+        self.untagged_nodes = 0
+        self.samples = {'node': [], 'way': [], 'area': []}
+
+    def node(self, n):
+        self.node_count += 1
+        if not n.tags:
+            self.untagged_nodes += 1
+        elif len(self.samples['node']) < self.limit:
+            self.samples['node'].append({t.k: t.v for t in n.tags})
+
+    def way(self, w):
+        if w.tags and len(self.samples['way']) < self.limit:
+            self.samples['way'].append({t.k: t.v for t in w.tags})
+
+    def relation(self, r):
+        # Multipolygon relations stand in for areas without assembling geometry
+        if r.tags and len(self.samples['area']) < self.limit:
+            self.samples['area'].append({t.k: t.v for t in r.tags})
+
+
+def _linear_terms_match(terms, tags):
+    for key, values in terms.items():
+        if values is ANY:
+            if key in tags:
+                return True
+        elif tags.get(key) in list(values):
+            return True
+    return False
+
+
+def _linear_all_match(terms, tags):
+    return all((key in tags) if values is ANY else (tags.get(key) in list(values))
+               for key, values in terms.items())
+
+
+def classify_linear(chains, tags):
+    """Reference classifier: walk every rule in order, like the old elif chains."""
+    matched = []
+    for chain in chains:
+        for rule in chain:
+            if not _linear_terms_match(rule['match'], tags):
+                continue
+            if rule.get('require') and not _linear_all_match(rule['require'], tags):
+                continue
+            if rule.get('exclude') and _linear_all_match(rule['exclude'], tags):
+                continue
+            matched.append(rule)
+            break
+    return matched
+
+
+def time_per_element(function, samples, repeat):
+    """Best-of-repeat time per element in nanoseconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for tags in samples:
+            function(tags)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / max(len(samples), 1) * 1e9
+
+
+def run_benchmark(pbf_file, limit=200000, repeat=3):
+    """Sample pbf_file and benchmark both classifiers. Returns a result dict per element type."""
+    sampler = TagSampler(limit)
+    sampler.apply_file(str(pbf_file))
+
+    cases = {
+        'node': (NODE_RULES, NODE_INDEX.match),
+        'way': ((WAY_RULES,), lambda tags: [rule for rule in (WAY_INDEX.first(tags),) if rule]),
+        'area': ((AREA_RULES,), lambda tags: [rule for rule in (AREA_INDEX.first(tags),) if rule]),
+    }
+
+    results = {}
+    for element_type, (chains, compiled) in cases.items():
+        samples = sampler.samples[element_type]
+        if not samples:
+            continue
+
+        # Both classifiers must agree before their timings mean anything
+        for tags in samples:
+            if classify_linear(chains, tags) != compiled(tags):
+                raise AssertionError(f"Classifier mismatch for {element_type} tags {tags}")
+
+        linear_ns = time_per_element(lambda tags: classify_linear(chains, tags), samples, repeat)
+        compiled_ns = time_per_element(compiled, samples, repeat)
+        results[element_type] = {
+            'elements': len(samples),
+            'linear_ns': round(linear_ns, 1),
+            'compiled_ns': round(compiled_ns, 1),
+            'speedup': round(linear_ns / compiled_ns, 1)
+        }
+
+    results['untagged_nodes'] = {
+        'nodes': sampler.node_count,
+        'untagged': sampler.untagged_nodes,
+        'share': round(sampler.untagged_nodes / max(sampler.node_count, 1), 3)
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('pbf', nargs='?', default=str(DEFAULT_PBF), help='OSM PBF file to sample')
+    parser.add_argument('--limit', type=int, default=200000, help='tagged elements sampled per type')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    if not Path(args.pbf).exists():
+        print(f"❌ OSM file not found: {args.pbf}")
+        print("Update OSM data from the admin dashboard or pass a PBF path.")
+        return 1
+
+    print(f"Sampling tags from {args.pbf}...")
+    results = run_benchmark(args.pbf, args.limit, args.repeat)
+
+    untagged = results.pop('untagged_nodes')
+    print(f"Untagged nodes (fast exit): {untagged['untagged']:,} of {untagged['nodes']:,} ({untagged['share']:.1%})")
+    print(f"{'type':<6} {'elements':>10} {'linear ns':>11} {'compiled ns':>12} {'speedup':>8}")
+    for element_type, result in results.items():
+        print(f"{element_type:<6} {result['elements']:>10,} {result['linear_ns']:>11.1f} "
+              f"{result['compiled_ns']:>12.1f} {result['speedup']:>7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
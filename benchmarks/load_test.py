@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Load test for the standalone tile server.
+
+Renders the tiles of a synthetic fixture (see synthetic_osm.py), or uses the
+tiles in --tiles-dir, starts tile_server.py on them and requests random tiles
+over keep-alive connections from client processes for a fixed time, then
+reports requests per second and latency percentiles. With --flask the same
+load is also run against the Flask app (app.py on werkzeug's threaded
+server) for comparison.
+
+Usage:
+    python benchmarks/load_test.py [--duration S] [--connections N] [--clients P]
+                                   [--processes N] [--tiles-dir DIR] [--flask]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tile_generation.builder import TileBuilder
+
+from synthetic_osm import DENSITIES, fixture_bounds, get_fixture
+from run_benchmarks import FIXTURES_DIR, REGION, ingest, render_svg, write_gzip
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+# Seconds at the start of a run whose requests are not counted
+WARMUP = 1.0
+
+FLASK_SERVER = '''
+import sys
+sys.path.insert(0, {project!r})
+from app import create_app
+app = create_app('development')
+app.config['TILES_DIR'] = {tiles_dir!r}
+app.run(host='127.0.0.1', port={port}, threaded=True, debug=False, use_reloader=False)
+'''
+
+
+def build_tiles(tiles_dir, density):
+    """Render a fixture density's tiles into tiles_dir the way the benchmark suite does."""
+    builder = TileBuilder({'workers': 1})
+    region_dir = Path(tiles_dir) / 'regions' / REGION
+    region_dir.mkdir(parents=True, exist_ok=True)
+    bounds = fixture_bounds(density)
+    tiles = builder.calculate_tile_grid(bounds)
+    features = ingest(builder, get_fixture(FIXTURES_DIR, density), bounds)
+    write_gzip(region_dir, render_svg(builder, tiles, builder.bin_features_by_tile(features, tiles)))
+
+
+def tile_paths(tiles_dir):
+    """Get the request path of every tile under tiles_dir."""
+    return [f"/api/tile/{tile_file.parent.name}/{tile_file.name}"
+            for tile_file in sorted(Path(tiles_dir).glob('regions/*/*.svg.gz'))]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def read_response(sock, buffer):
+    """Read one response from sock; return (status, keep_alive, leftover bytes)."""
+    while b'\r\n\r\n' not in buffer:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError('connection closed mid-response')
+        buffer += chunk
+    head, _, buffer = buffer.partition(b'\r\n\r\n')
+    lines = head.split(b'\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(b':')
+        headers[name.strip().lower()] = value.strip().lower()
+
+    keep_alive = headers.get(b'connection') != b'close' and lines[0].startswith(b'HTTP/1.1')
+    length = headers.get(b'content-length')
+    if length is None:
+        # No length: the body runs to the end of the connection
+        while sock.recv(65536):
+            pass
+        return status, False, b''
+    length = int(length)
+    while len(buffer) < length:
+        chunk = sock.recv(max(65536, length - len(buffer)))
+        if not chunk:
+            raise ConnectionError('connection closed mid-body')
+        buffer += chunk
+    return status, keep_alive, buffer[length:]
+
+
+def connection_worker(port, paths, start, deadline, seed, results):
+    """Send requests on one connection (reopened when the server closes it) until deadline."""
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    sock = None
+    buffer = b''
+    while time.monotonic() < deadline:
+        try:
+            if sock is None:
+                sock = socket.create_connection(('127.0.0.1', port))
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                buffer = b''
+            request = (f"GET {rng.choice(paths)} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+                       f"Accept-Encoding: gzip\r\n\r\n").encode()
+            sent = time.monotonic()
+            sock.sendall(request)
+            status, keep_alive, buffer = read_response(sock, buffer)
+            finished = time.monotonic()
+            if sent >= start:
+                if status == 200:
+                    latencies.append(finished - sent)
+                else:
+                    errors += 1
+            if not keep_alive:
+                sock.close()
+                sock = None
+        except OSError:
+            errors += 1
+            if sock:
+                sock.close()
+            sock = None
+    if sock:
+        sock.close()
+    results.append((latencies, errors))
+
+
+def client_process(port, paths, connections, start, deadline, seed, queue):
+    """Run connections threads in this process; put (latencies, errors) on queue."""
+    results = []
+    threads = [threading.Thread(target=connection_worker,
+                                args=(port, paths, start, deadline, seed * 1000 + i, results))
+               for i in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.put(([latency for latencies, _ in results for latency in latencies],
+               sum(errors for _, errors in results)))
+
+
+def run_load(port, paths, duration, connections, clients):
+    """Load a server from client processes; return the measured results."""
+    # The warm-up and run windows are monotonic-clock times shared by the clients
+    start = time.monotonic() + WARMUP
+    deadline = start + duration
+    queue = multiprocessing.Queue()
+    per_client = max(1, connections // clients)
+    processes = [multiprocessing.Process(target=client_process,
+                                         args=(port, paths, per_client, start, deadline, seed, queue))
+                 for seed in range(clients)]
+    for process in processes:
+        process.start()
+    outcomes = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = sorted(latency for client_latencies, _ in outcomes for latency in client_latencies)
+    errors = sum(errors for _, errors in outcomes)
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2) if latencies else None
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / duration, 1),
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'connections': per_client * clients
+    }
+
+
+def load_server(command, port, paths, args, env=None):
+    """Start a server, load it and stop it; return the results."""
+    process = subprocess.Popen(command, cwd=PROJECT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port, process)
+        return run_load(port, paths, args.duration, args.connections, args.clients)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of load per server')
+    parser.add_argument('--connections', type=int, default=64, help='concurrent keep-alive connections')
+    parser.add_argument('--clients', type=int, default=os.cpu_count() or 1,
+                        help='client processes the connections are spread over')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='tile_server.py worker processes')
+    parser.add_argument('--tiles-dir', help='serve these tiles instead of rendering a fixture')
+    parser.add_argument('--density', choices=list(DENSITIES), default='dense',
+                        help='fixture rendered when --tiles-dir is not given')
+    parser.add_argument('--flask', action='store_true', help='also load the Flask app for comparison')
+    args = parser.parse_args()
+
+    work_dir = None
+    tiles_dir = args.tiles_dir
+    if not tiles_dir:
+        work_dir = Path(tempfile.mkdtemp(prefix='tile-load-'))
+        tiles_dir = str(work_dir / 'tiles')
+        print(f"Rendering {args.density} fixture tiles...")
+        build_tiles(tiles_dir, args.density)
+
+    try:
+        paths = tile_paths(tiles_dir)
+        if not paths:
+            print(f"No tiles found in {tiles_dir}")
+            return 1
+
+        print(f"{len(paths)} tiles, {args.connections} connections from {args.clients} client processes, "
+              f"{args.duration:.0f}s per server, {os.cpu_count()} CPUs ({platform.processor() or platform.machine()})")
+
+        runs = []
+        port = free_port()
+        runs.append((f"tile_server.py ({args.processes} process{'es' if args.processes > 1 else ''})", load_server(
+            [sys.executable, 'tile_server.py', '--host', '127.0.0.1', '--port', str(port),
+             '--processes', str(args.processes), '--tiles-dir', tiles_dir], port, paths, args)))
+
+        if args.flask:
+            port = free_port()
+            script = FLASK_SERVER.format(project=str(PROJECT_DIR), tiles_dir=tiles_dir, port=port)
+            # No generation jobs or missing-tile batches while measuring
+            env = {**os.environ, 'JOB_WORKERS': '0', 'MISSING_TILE_INTERVAL': '0'}
+            runs.append(('Flask app (werkzeug, threaded)', load_server(
+                [sys.executable, '-c', script], port, paths, args, env)))
+
+        print(f"\n{'server':<34} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for name, result in runs:
+            print(f"{name:<34} {result['requests']:>9} {result['requests_per_second']:>9.1f} "
+                  f"{result['p50_ms'] or 0:>8.2f} {result['p95_ms'] or 0:>8.2f} {result['p99_ms'] or 0:>8.2f} "
+                  f"{result['errors']:>7}")
+        return 0
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
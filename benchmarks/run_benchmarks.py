@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Tile pipeline benchmark suite.
+
+Generates deterministic synthetic OSM fixtures (see synthetic_osm.py) and
+times each stage of the pipeline separately:
+
+    ingest    OSMHandler over the fixture PBF
+    classify  determine_feature_subtype and generate_aria_label per feature
+    svg       create_tile_svg per tile
+    gzip      writing each tile's SVG as .svg.gz
+    serve     the Flask tile endpoints (/api/tile, /tiles, /api/region/.../tiles)
+
+Every run is appended to a JSON history file with the current commit, and
+compared with the previous run so regressions show up between commits.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--density sparse --density dense] [--repeat R]
+                                        [--history FILE] [--threshold PCT] [--no-save]
+"""
+
+import io
+import os
+import sys
+import gzip
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tile_generation.builder import TileBuilder
+from tile_generation.osm_processor import OSMHandler
+
+from synthetic_osm import DENSITIES, fixture_bounds, get_fixture
+
+BENCHMARKS_DIR = Path(__file__).parent
+DEFAULT_HISTORY = BENCHMARKS_DIR / 'history.json'
+FIXTURES_DIR = BENCHMARKS_DIR / 'fixtures'
+REGION = 'benchmark'
+STAGES = ('ingest', 'classify', 'svg', 'gzip', 'serve')
+
+
+def best_time(function, repeat):
+    """Run function repeat times; return (best seconds, last return value)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def stage_result(seconds, items, unit):
+    return {
+        'seconds': round(seconds, 4),
+        'items': items,
+        'unit': unit,
+        'per_item_ms': round(seconds / max(items, 1) * 1000, 4)
+    }
+
+
+def ingest(builder, osm_file, bounds):
+    handler = OSMHandler(bounds)
+    builder.apply_osm_handler(handler, osm_file)
+    return handler.features
+
+
+def classify(builder, features):
+    for feature_type, feature_list in features.items():
+        for feature in feature_list:
+            builder.determine_feature_subtype(feature_type, feature['properties'])
+            builder.generate_aria_label(feature['properties'])
+
+
+def render_svg(builder, tiles, tile_features):
+    return [
+        (tile_lat, tile_lng, builder.create_tile_svg(
+            tile_lat, tile_lng, tile_features[builder.tile_key(tile_lat, tile_lng)],
+            builder.get_tile_bounds(tile_lat, tile_lng)))
+        for tile_lat, tile_lng in tiles
+    ]
+
+
+def write_gzip(region_dir, svgs):
+    """Write tiles the way TileBuilder.render_tile does; return total compressed bytes."""
+    total = 0
+    for tile_lat, tile_lng, svg in svgs:
+        tile_path = region_dir / f"{tile_lat:.3f}_{tile_lng:.3f}.svg.gz"
+        with open(tile_path, 'wb') as raw, \
+                gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0) as compressed, \
+                io.TextIOWrapper(compressed, encoding='utf-8') as f:
+            f.write(svg)
+        total += tile_path.stat().st_size
+    return total
+
+
+def serve(client, tile_names):
+    for tile_name in tile_names:
+        for url in (f'/api/tile/{REGION}/{tile_name}', f'/tiles/regions/{REGION}/{tile_name}'):
+            response = client.get(url)
+            response.get_data()
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} returned {response.status_code}")
+    response = client.get(f'/api/region/{REGION}/tiles')
+    response.get_data()
+
+
+def make_client(tiles_dir):
+    """Create a Flask test client serving tiles from tiles_dir."""
+    from app import create_app
+    app = create_app('development')
+    app.config['TILES_DIR'] = tiles_dir
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+def run_density(density, repeat, work_dir):
+    """Benchmark every stage on one fixture density."""
+    osm_file = get_fixture(FIXTURES_DIR, density)
+    bounds = fixture_bounds(density)
+
+    builder = TileBuilder({'workers': 1})
+    builder.tiles_dir = work_dir / 'tiles'
+    region_dir = builder.tiles_dir / 'regions' / REGION
+    region_dir.mkdir(parents=True, exist_ok=True)
+    tiles = builder.calculate_tile_grid(bounds)
+
+    results = {}
+
+    seconds, features = best_time(lambda: ingest(builder, osm_file, bounds), repeat)
+    feature_count = sum(len(feature_list) for feature_list in features.values())
+    results['ingest'] = stage_result(seconds, feature_count, 'features')
+    results['ingest']['file_mb'] = round(osm_file.stat().st_size / (1024 * 1024), 2)
+
+    seconds, _ = best_time(lambda: classify(builder, features), repeat)
+    results['classify'] = stage_result(seconds, feature_count, 'features')
+
+    tile_features = builder.bin_features_by_tile(features, tiles)
+    seconds, svgs = best_time(lambda: render_svg(builder, tiles, tile_features), repeat)
+    results['svg'] = stage_result(seconds, len(tiles), 'tiles')
+    results['svg']['svg_mb'] = round(sum(len(svg) for _, _, svg in svgs) / (1024 * 1024), 2)
+
+    seconds, compressed = best_time(lambda: write_gzip(region_dir, svgs), repeat)
+    results['gzip'] = stage_result(seconds, len(tiles), 'tiles')
+    results['gzip']['gzip_mb'] = round(compressed / (1024 * 1024), 2)
+
+    client = make_client(builder.tiles_dir)
+    tile_names = sorted(path.name for path in region_dir.glob('*.svg.gz'))
+    seconds, _ = best_time(lambda: serve(client, tile_names), repeat)
+    results['serve'] = stage_result(seconds, len(tile_names) * 2 + 1, 'requests')
+
+    return results
+
+
+def git_revision():
+    """Get the current commit and whether the work tree has changes."""
+    root = Path(__file__).parent.parent
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except Exception:
+        return None, False
+
+
+def load_history(history_file):
+    try:
+        with open(history_file) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def previous_result(history, density, stage):
+    """Get the latest recorded result for a density and stage."""
+    for run in reversed(history):
+        result = run.get('results', {}).get(density, {}).get(stage)
+        if result:
+            return result
+    return None
+
+
+def print_report(run, history, threshold):
+    """Print the run next to the previous one; return the number of regressions."""
+    regressions = 0
+    print(f"\nCommit {run['commit'] or 'unknown'}{' (modified)' if run['dirty'] else ''}, "
+          f"best of {run['repeat']}")
+    print(f"{'density':<8} {'stage':<9} {'items':>8} {'seconds':>9} {'ms/item':>9} {'previous':>9} {'change':>8}")
+
+    for density, results in run['results'].items():
+        for stage in STAGES:
+            result = results[stage]
+            previous = previous_result(history, density, stage)
+            change = ''
+            previous_seconds = ''
+            if previous:
+                previous_seconds = f"{previous['seconds']:.4f}"
+                delta = (result['seconds'] - previous['seconds']) / max(previous['seconds'], 1e-9) * 100
+                change = f"{delta:+.1f}%"
+                if delta > threshold:
+                    change += ' ⚠️'
+                    regressions += 1
+            print(f"{density:<8} {stage:<9} {result['items']:>8} {result['seconds']:>9.4f} "
+                  f"{result['per_item_ms']:>9.4f} {previous_seconds:>9} {change:>8}")
+
+    if regressions:
+        print(f"\n⚠️  {regressions} stages more than {threshold:.0f}% slower than the previous run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--density', action='append', choices=list(DENSITIES),
+                        help='fixture density to run (repeatable; default all)')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions (best is reported)')
+    parser.add_argument('--history', default=str(DEFAULT_HISTORY), help='JSON history file')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='percent slowdown reported as a regression')
+    parser.add_argument('--no-save', action='store_true', help='do not append this run to the history')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='exit with status 1 if any stage regressed')
+    args = parser.parse_args()
+
+    commit, dirty = git_revision()
+    run = {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'dirty': dirty,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': args.repeat,
+        'results': {}
+    }
+
+    work_dir = Path(tempfile.mkdtemp(prefix='tile-bench-'))
+    try:
+        for density in args.density or list(DENSITIES):
+            print(f"Benchmarking {density} fixture...")
+            run['results'][density] = run_density(density, args.repeat, work_dir / density)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    history_file = Path(args.history)
+    history = load_history(history_file)
+    regressions = print_report(run, history, args.threshold)
+
+    if not args.no_save:
+        history.append(run)
+        with open(history_file, 'w') as f:
+            json.dump(history, f, indent=2)
+        print(f"\nResults appended to {history_file}")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Deterministic synthetic OSM fixtures for the benchmark suite.
+
+Each density describes a square block of tiles filled with a street grid,
+rectangular buildings, tagged points of interest, parks and water. The same
+density and seed always produce the same PBF, so timings from different
+commits are comparable.
+"""
+
+import random
+from pathlib import Path
+
+import osmium
+from osmium.osm.mutable import Node, Way, Relation
+
+FIXTURE_VERSION = 1
+
+# Per-tile feature counts; the tile grid is tiles x tiles tiles of 0.01 degrees
+DENSITIES = {
+    'sparse': {'tiles': 4, 'pois': 20, 'buildings': 50, 'street_spacing': 0.0025, 'parks': 1},
+    'medium': {'tiles': 4, 'pois': 100, 'buildings': 300, 'street_spacing': 0.002, 'parks': 3},
+    'dense': {'tiles': 4, 'pois': 400, 'buildings': 1200, 'street_spacing': 0.001, 'parks': 6},
+}
+
+# South-west corner of the fixture's tile grid (downtown Toronto)
+ORIGIN_LAT = 43.60
+ORIGIN_LNG = -79.40
+TILE_SIZE = 0.01
+
+POI_TAGS = [
+    {'amenity': 'cafe', 'name': 'Cafe & Bakery', 'wheelchair': 'yes'},
+    {'amenity': 'restaurant', 'name': 'Bistro', 'cuisine': 'italian'},
+    {'amenity': 'bank', 'name': 'Bank'},
+    {'amenity': 'pharmacy', 'healthcare': 'pharmacy'},
+    {'amenity': 'bench'},
+    {'amenity': 'bicycle_parking', 'capacity': '10'},
+    {'shop': 'supermarket', 'name': 'Market'},
+    {'shop': 'clothes'},
+    {'highway': 'bus_stop', 'name': 'Queen St at Bay St', 'shelter': 'yes'},
+    {'highway': 'crossing', 'crossing': 'traffic_signals', 'tactile_paving': 'yes'},
+    {'railway': 'subway_entrance', 'wheelchair': 'yes'},
+    {'natural': 'tree'},
+    {'emergency': 'fire_hydrant'},
+    {'tourism': 'hotel', 'name': 'Hotel', 'stars': '4'},
+    {'leisure': 'fitness_centre'},
+    {'office': 'company', 'name': 'Offices'},
+    {'historic': 'memorial', 'name': 'Memorial'},
+    {'amenity': 'toilets', 'wheelchair': 'yes', 'changing_table': 'yes'},
+]
+
+STREET_TAGS = [
+    {'highway': 'residential', 'name': 'Side Street'},
+    {'highway': 'secondary', 'name': 'Avenue Road', 'sidewalk': 'both'},
+    {'highway': 'primary', 'name': 'Main Street', 'lanes': '4'},
+    {'highway': 'footway', 'surface': 'paved'},
+    {'highway': 'cycleway'},
+]
+
+BUILDING_TAGS = [
+    {'building': 'yes'},
+    {'building': 'residential', 'building:levels': '3'},
+    {'building': 'commercial', 'name': 'Tower'},
+    {'building': 'yes', 'amenity': 'school', 'name': 'School'},
+]
+
+PARK_TAGS = [
+    {'leisure': 'park', 'name': 'Park'},
+    {'natural': 'water', 'water': 'pond'},
+    {'landuse': 'grass'},
+]
+
+
+def fixture_bounds(density):
+    """Get the bounds of a density's tile grid."""
+    tiles = DENSITIES[density]['tiles']
+    return {
+        'south': ORIGIN_LAT,
+        'north': round(ORIGIN_LAT + tiles * TILE_SIZE, 6),
+        'west': ORIGIN_LNG,
+        'east': round(ORIGIN_LNG + tiles * TILE_SIZE, 6)
+    }
+
+
+def _add_ring(nodes, next_id, west, south, east, north):
+    """Add the four corner nodes of a rectangle; return their IDs closed into a ring."""
+    refs = []
+    for lon, lat in ((west, south), (east, south), (east, north), (west, north)):
+        nodes.append(Node(id=next_id, version=1, location=(lon, lat)))
+        refs.append(next_id)
+        next_id += 1
+    return refs + [refs[0]], next_id
+
+
+def write_fixture(path, density, seed=1):
+    """Write the synthetic fixture for a density to path."""
+    params = DENSITIES[density]
+    rng = random.Random(f'{density}-{seed}')
+    bounds = fixture_bounds(density)
+    tile_count = params['tiles'] ** 2
+
+    nodes, ways, relations = [], [], []
+    node_id, way_id = 1, 1
+
+    # Street grid, split into ways a few blocks long
+    spacing = params['street_spacing']
+    steps = int(round((bounds['north'] - bounds['south']) / spacing))
+    for orientation in ('ew', 'ns'):
+        for i in range(steps + 1):
+            offset = i * spacing
+            refs = []
+            for j in range(steps + 1):
+                if orientation == 'ew':
+                    lon, lat = bounds['west'] + j * spacing, bounds['south'] + offset
+                else:
+                    lon, lat = bounds['west'] + offset, bounds['south'] + j * spacing
+                nodes.append(Node(id=node_id, version=1, location=(round(lon, 7), round(lat, 7))))
+                refs.append(node_id)
+                node_id += 1
+
+                if len(refs) == 5 or j == steps:
+                    ways.append(Way(id=way_id, version=1, nodes=refs, tags=rng.choice(STREET_TAGS)))
+                    way_id += 1
+                    refs = [refs[-1]]
+
+    # Buildings
+    for _ in range(params['buildings'] * tile_count):
+        west = rng.uniform(bounds['west'], bounds['east'] - 0.0004)
+        south = rng.uniform(bounds['south'], bounds['north'] - 0.0004)
+        refs, node_id = _add_ring(nodes, node_id, west, south,
+                                  west + rng.uniform(0.00005, 0.0004), south + rng.uniform(0.00005, 0.0004))
+        ways.append(Way(id=way_id, version=1, nodes=refs, tags=rng.choice(BUILDING_TAGS)))
+        way_id += 1
+
+    # Parks and water; every other one is a multipolygon relation
+    for i in range(params['parks'] * tile_count):
+        west = rng.uniform(bounds['west'], bounds['east'] - 0.004)
+        south = rng.uniform(bounds['south'], bounds['north'] - 0.004)
+        refs, node_id = _add_ring(nodes, node_id, west, south,
+                                  west + rng.uniform(0.001, 0.004), south + rng.uniform(0.001, 0.004))
+        tags = rng.choice(PARK_TAGS)
+        if i % 2:
+            ways.append(Way(id=way_id, version=1, nodes=refs))
+            relations.append(Relation(id=len(relations) + 1, version=1, members=[('w', way_id, 'outer')],
+                                      tags={'type': 'multipolygon', **tags}))
+        else:
+            ways.append(Way(id=way_id, version=1, nodes=refs, tags=tags))
+        way_id += 1
+
+    # Points of interest
+    for _ in range(params['pois'] * tile_count):
+        lon = rng.uniform(bounds['west'], bounds['east'])
+        lat = rng.uniform(bounds['south'], bounds['north'])
+        nodes.append(Node(id=node_id, version=1, location=(round(lon, 7), round(lat, 7)),
+                          tags=rng.choice(POI_TAGS)))
+        node_id += 1
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+
+    writer = osmium.SimpleWriter(str(path))
+    try:
+        for node in nodes:
+            writer.add_node(node)
+        for way in ways:
+            writer.add_way(way)
+        for relation in relations:
+            writer.add_relation(relation)
+    finally:
+        writer.close()
+
+    return {'nodes': len(nodes), 'ways': len(ways), 'relations': len(relations)}
+
+
+def get_fixture(fixtures_dir, density, seed=1):
+    """Get the path of a density's fixture, writing it on first use."""
+    path = Path(fixtures_dir) / f'synthetic-{density}-s{seed}-v{FIXTURE_VERSION}.osm.pbf'
+    if not path.exists():
+        write_fixture(path, density, seed)
+    return path
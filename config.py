@@ -22,6 +22,26 @@ class Config:
     # Tile generation settings
     TILE_SIZE_DEGREES = 0.01  # 0.01 degrees per tile (roughly 1km)
     SVG_SIZE = 1000  # SVG viewport size
+    RENDER_WORKERS = int(os.environ.get('RENDER_WORKERS', os.cpu_count() or 1))  # Tile render processes
+    NODE_INDEX = os.environ.get('NODE_INDEX', 'auto')  # Node location index (auto, flex_mem, sparse_file_array, ...)
+    NODE_CACHE = os.environ.get('NODE_CACHE', 'true').lower() in ('1', 'true', 'yes')  # Persistent per-PBF node locations
+    NODE_CACHE_MAX_NODE_ID = int(os.environ.get('NODE_CACHE_MAX_NODE_ID', 16_000_000_000))  # Highest OSM node ID the cache is sized for
+    EXTRACT_BUFFER = float(os.environ.get('EXTRACT_BUFFER', 0.005))  # Degrees around each regional extract
+    EXTRACT_TIMEOUT = int(os.environ['EXTRACT_TIMEOUT']) if os.environ.get('EXTRACT_TIMEOUT') else None  # Seconds, None = no limit
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 1))  # Generation jobs run at once, 0 = queue only
+    MISSING_TILE_INTERVAL = int(os.environ.get('MISSING_TILE_INTERVAL', 300))  # Seconds between missing tile batches, 0 = off
+    MISSING_TILE_BATCH = int(os.environ.get('MISSING_TILE_BATCH', 50))  # Most requested missing tiles per batch
+    MISSING_TILE_MIN_REQUESTS = int(os.environ.get('MISSING_TILE_MIN_REQUESTS', 1))  # Requests before a tile is scheduled
+    RENDER_ON_MISS = os.environ.get('RENDER_ON_MISS', 'false').lower() in ('1', 'true', 'yes')  # Render missing tiles on request
+    RENDER_ON_MISS_BUDGET = float(os.environ.get('RENDER_ON_MISS_BUDGET', 10))  # Seconds a request waits before 404
+    RENDER_ON_MISS_WORKERS = int(os.environ.get('RENDER_ON_MISS_WORKERS', 2))  # Cold renders run at once
+    TILE_CACHE_MAX_AGE = int(os.environ.get('TILE_CACHE_MAX_AGE', 86400))  # Seconds clients reuse a tile before revalidating
+    ADMIN_TILE_CACHE_MB = int(os.environ.get('ADMIN_TILE_CACHE_MB', 64))  # Decompressed tiles kept for the admin tile browser
+    TILE_ARCHIVE = os.environ.get('TILE_ARCHIVE', 'false').lower() in ('1', 'true', 'yes')  # Pack generated regions into tiles/archives/
+    TILE_SERVER_HOST = os.environ.get('TILE_SERVER_HOST', '0.0.0.0')  # Standalone tile server (tile_server.py) address
+    TILE_SERVER_PORT = int(os.environ.get('TILE_SERVER_PORT', 8080))
+    TILE_SERVER_PROCESSES = int(os.environ.get('TILE_SERVER_PROCESSES', os.cpu_count() or 1))  # Worker processes
+    TILE_BATCH_LIMIT = int(os.environ.get('TILE_BATCH_LIMIT', 64))  # Most tiles in one /api/tiles response
     
     # SiteGround specific
     SITE_URL = os.environ.get('SITE_URL', 'http://localhost:5000')
@@ -37,6 +37,15 @@ def create_app():
     app.register_blueprint(tiles_api_bp, url_prefix='/api')
     app.register_blueprint(missing_api_bp, url_prefix='/api')
     
+    # Tile catalog, loaded once for the region and tile listings
+    from tile_generation.catalog import get_tile_catalog
+    get_tile_catalog(app.config['TILES_DIR'])
+    
+    # Generation job queue and its workers
+    from admin.jobs import init_job_queue
+    from admin.routes import builder_config
+    init_job_queue(app, builder_config(app.config))
+    
     # Main route
     @app.route('/')
     def index():
@@ -59,6 +68,8 @@ SITEGROUND_PASSWORD=your-ftp-password
     
     # Serve local tiles
     from flask import send_from_directory, abort
+    from werkzeug.security import safe_join
+    from api.tile_response import tile_response
     import os
     
     @app.route('/tiles/')
@@ -88,7 +99,12 @@ SITEGROUND_PASSWORD=your-ftp-password
             html += '</ul>'
             return html
         
-        # Serve specific file
+        # Serve specific file; tiles go out precompressed with cache headers
+        if filename.endswith('.svg.gz'):
+            tile_path = safe_join(str(tiles_dir), filename)
+            if not tile_path or not Path(tile_path).is_file():
+                abort(404)
+            return tile_response(tile_path)
         try:
             return send_from_directory(tiles_dir, filename)
         except FileNotFoundError:
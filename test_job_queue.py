@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Check the job queue's deduplication, province exclusion and recovery.
+
+Uses a queue in a temporary directory and stand-in job handlers, so no
+tiles are generated. Also checks that the missing tile scheduler reaches
+the tiles it can schedule past hotter ones it cannot.
+"""
+
+import sys
+import time
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def test_job_queue():
+    """Exercise enqueue, claim, recover and a worker pool on a scratch queue."""
+    print("=== Job Queue Test ===")
+
+    from admin.jobs import JobQueue, JobWorkerPool, PRIORITY_HIGH, schedule_missing_tiles
+    from tile_generation.missing_tiles import MissingTileStore
+
+    with tempfile.TemporaryDirectory(prefix='jobs-') as work_dir:
+        queue = JobQueue(Path(work_dir) / 'jobs.db')
+
+        # The same operation is queued once; a higher priority is kept
+        first, created = queue.enqueue('generate_region', 'toronto-downtown', {'region_name': 'toronto-downtown'})
+        again, created_again = queue.enqueue('generate_region', 'toronto-downtown',
+                                             {'region_name': 'toronto-downtown'}, PRIORITY_HIGH)
+        assert created and not created_again and again['id'] == first['id'], "duplicate job queued"
+        assert queue.get(first['id'])['priority'] == PRIORITY_HIGH, "priority not raised"
+        print("✓ Duplicate operation returns the queued job with the higher priority")
+
+        # Jobs of a province with a running job wait for it
+        queue.enqueue('update_changed', 'ontario-changes', {'province': 'ontario'})
+        queue.enqueue('render_missing', 'ottawa-downtown-missing', {'region_name': 'ottawa-downtown'})
+        queue.enqueue('generate_region', 'calgary-downtown', {'region_name': 'calgary-downtown'})
+        claimed = [queue.claim(), queue.claim(), queue.claim()]
+        assert [job and job['operation'] for job in claimed] == ['toronto-downtown', 'calgary-downtown', None], \
+            f"claimed {[job and job['operation'] for job in claimed]}"
+        queue.finish(claimed[0]['id'], 'completed')
+        assert queue.claim()['operation'] == 'ontario-changes', "waiting province job not claimed"
+        print("✓ One running job per province; others wait for it")
+
+        # Running jobs of a dead server process are queued again to resume
+        with sqlite3.connect(str(queue.db_path)) as conn:
+            conn.execute("UPDATE jobs SET worker_pid = 999999999 WHERE status = 'running'")
+        recovered = queue.recover()
+        calgary = queue.active_job('calgary-downtown')
+        assert recovered == 2 and calgary['status'] == 'queued' and calgary['params'].get('resume'), \
+            f"recovered {recovered} jobs, calgary {calgary['status']}"
+        print(f"✓ Recovered {recovered} jobs of a dead process (region jobs resume)")
+
+        # Cancelling a queued job takes effect at once
+        cancelled = queue.cancel(queue.active_job('ottawa-downtown-missing')['id'])
+        assert cancelled['status'] == 'cancelled', f"queued job is {cancelled['status']}"
+        print("✓ Cancelled queued job")
+
+    with tempfile.TemporaryDirectory(prefix='jobs-') as work_dir:
+        queue = JobQueue(Path(work_dir) / 'jobs.db')
+        running = {}
+        overlaps = []
+        lock = threading.Lock()
+
+        def handler(params, context):
+            province = context.job['scope']
+            with lock:
+                if running.get(province):
+                    overlaps.append(province)
+                running[province] = running.get(province, 0) + 1
+            time.sleep(0.05)
+            with lock:
+                running[province] -= 1
+            return {'status': 'completed'}
+
+        for region in ('toronto-downtown', 'ottawa-downtown', 'calgary-downtown', 'montreal-downtown'):
+            queue.enqueue('generate_region', region, {'region_name': region})
+            queue.enqueue('render_missing', f'{region}-missing', {'region_name': region})
+
+        pool = JobWorkerPool(queue, {}, workers=4, poll_interval=0.05,
+                             handlers={'generate_region': handler, 'render_missing': handler})
+        pool.start()
+        deadline = time.monotonic() + 30
+        while queue.list_jobs(('queued', 'running')) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        pool.stop(timeout=5)
+
+        statuses = [job['status'] for job in queue.list_jobs(limit=100)]
+        assert statuses.count('completed') == 8, f"job statuses {statuses}"
+        assert not overlaps, f"jobs of {sorted(set(overlaps))} ran at the same time"
+        print("✓ Worker pool ran 8 jobs on 4 workers without two jobs of a province at once")
+
+    with tempfile.TemporaryDirectory(prefix='jobs-') as work_dir:
+        queue = JobQueue(Path(work_dir) / 'jobs.db')
+        store = MissingTileStore(Path(work_dir) / 'missing_tiles.db')
+        regions = [{'name': 'busy', 'bounds': {'south': 43.6, 'north': 43.7, 'west': -79.4, 'east': -79.3}},
+                   {'name': 'idle', 'bounds': {'south': 45.4, 'north': 45.5, 'west': -75.7, 'east': -75.6}}]
+        busy, _ = queue.enqueue('render_missing', 'busy-missing', {'region_name': 'busy', 'tiles': []})
+
+        # Hotter tiles that cannot be scheduled: outside every region, or of a region with a batch
+        for i in range(10):
+            for _ in range(5):
+                store.record(1000 + i, 1000, 'nowhere')
+                store.record(4360 + i, -7940, 'busy')
+        store.record(4540, -7570, 'idle')
+
+        runs = 0
+        while runs < 5 and not queue.active_job('idle-missing'):
+            schedule_missing_tiles(queue, store, regions, batch_size=2)
+            runs += 1
+        idle = queue.active_job('idle-missing')
+        assert idle and idle['params']['tiles'] == [[4540, -7570]], f"idle region not scheduled after {runs} runs"
+        rows = store.hottest(limit=100, unscheduled=False)
+        assert not [row for row in rows if row['region'] == 'nowhere'], "tiles outside every region kept"
+        assert all(row['job_id'] == busy['id'] for row in rows if row['region'] == 'busy'), \
+            "busy region's tiles not parked on its batch"
+        print(f"✓ Scheduler reached a cooler tile in {runs} runs past 20 hotter unschedulable ones")
+
+
+if __name__ == "__main__":
+    test_job_queue()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Check that pre-filtered OSM ingest yields the same features as a full pass.
+
+Runs OSMHandler over the medium synthetic benchmark fixture with a plain
+apply_file, with apply_filtered (key filter only, and with referenced node
+tracking), and through TileBuilder.apply_osm_handler building and then
+reusing a persistent node cache. Every run must produce the same features,
+in the same order.
+"""
+
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the project root and benchmarks to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / 'benchmarks'))
+
+# The fixture numbers its nodes from 1, far below this, so its node cache
+# needs only this many IDs of free disk rather than all of OSM's
+FIXTURE_MAX_NODE_ID = 10_000_000
+
+
+def feature_summary(features):
+    """Get {category: [(geometry WKB, properties)]} for comparing handler output."""
+    return {
+        category: [(feature['geometry'].wkb, sorted(feature['properties'].items(), key=str))
+                   for feature in feature_list]
+        for category, feature_list in features.items()
+    }
+
+
+def test_prefilter():
+    """Compare the features of filtered and unfiltered passes."""
+    print("=== OSM Pre-filter Test ===")
+
+    from tile_generation.builder import TileBuilder
+    from tile_generation.osm_processor import OSMHandler
+    from synthetic_osm import fixture_bounds, get_fixture
+    from run_benchmarks import FIXTURES_DIR
+
+    bounds = fixture_bounds('medium')
+    osm_file = get_fixture(FIXTURES_DIR, 'medium')
+
+    handler = OSMHandler(bounds)
+    handler.apply_file(str(osm_file), locations=True)
+    expected = feature_summary(handler.features)
+    print(f"✓ Full pass: {sum(len(v) for v in expected.values())} features")
+
+    work_dir = Path(tempfile.mkdtemp(prefix='prefilter-'))
+    try:
+        builder = TileBuilder({'node_cache': True, 'node_cache_max_node_id': FIXTURE_MAX_NODE_ID})
+        builder.data_dir = work_dir / 'data'
+        (builder.data_dir / 'osm_cache').mkdir(parents=True)
+        province_file = builder.data_dir / 'osm_cache' / 'ontario-latest.osm.pbf'
+        shutil.copy(osm_file, province_file)
+
+        def filtered(track_references):
+            handler = OSMHandler(bounds)
+            handler.apply_filtered(osm_file, track_references=track_references)
+            return handler.features
+
+        def node_cache():
+            handler = OSMHandler(bounds)
+            builder.apply_osm_handler(handler, province_file)
+            assert builder.current_progress['node_index'].startswith('dense_file_array'), \
+                f"node cache not used: {builder.current_progress['node_index']}"
+            return handler.features
+
+        runs = [
+            ('key filter', lambda: filtered(False)),
+            ('key filter, tracked references', lambda: filtered(True)),
+            ('node cache build', node_cache),
+            ('warm node cache', node_cache),
+        ]
+        failures = []
+        for name, run in runs:
+            same = feature_summary(run()) == expected
+            print(f"{'✓' if same else '❌'} {name}: {'same features' if same else 'features differ'}")
+            if not same:
+                failures.append(name)
+        assert not failures, f"features differ for: {', '.join(failures)}"
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_prefilter()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Check that an interrupted region run resumes from its journal.
+
+Generates the sparse synthetic benchmark fixture as a region, stops the run
+part way, and strips the journal's end record as if the process had died.
+A missing-tile batch (a run of only some tiles) follows it. A resumed run
+must still find the interrupted full run, skip the tiles it finished and
+produce the same tiles as an uninterrupted run.
+"""
+
+import sys
+import gzip
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the project root and benchmarks to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / 'benchmarks'))
+
+REGION = 'toronto-downtown'
+STOP_AFTER = 6
+
+
+def make_builder(work_dir, osm_file):
+    from tile_generation.builder import TileBuilder
+
+    builder = TileBuilder({'workers': 1})
+    builder.base_dir = work_dir
+    builder.tiles_dir = work_dir / 'tiles'
+    builder.data_dir = work_dir / 'data'
+    for directory in ('osm_cache', 'feature_store', 'node_index', 'journal'):
+        (builder.data_dir / directory).mkdir(parents=True, exist_ok=True)
+    shutil.copy(osm_file, builder.data_dir / 'osm_cache' / 'ontario-latest.osm.pbf')
+    return builder
+
+
+def read_tiles(builder):
+    region_dir = builder.tiles_dir / 'regions' / REGION
+    return {tile.name: gzip.open(tile).read() for tile in sorted(region_dir.glob('*.svg.gz'))}
+
+
+def test_resume():
+    """Interrupt a run, run a partial batch, resume and compare with a clean run."""
+    print("=== Resume Test ===")
+
+    from tile_generation.journal import GenerationJournal
+    from synthetic_osm import fixture_bounds, get_fixture
+    from run_benchmarks import FIXTURES_DIR
+
+    bounds = fixture_bounds('sparse')
+    osm_file = get_fixture(FIXTURES_DIR, 'sparse')
+    work_dir = Path(tempfile.mkdtemp(prefix='resume-'))
+    try:
+        clean = make_builder(work_dir / 'clean', osm_file)
+        clean.generate_tiles_for_region(REGION, bounds)
+        expected = read_tiles(clean)
+
+        builder = make_builder(work_dir / 'resumed', osm_file)
+        result = builder.generate_tiles_for_region(REGION, bounds, {
+            'cancel_check': lambda: builder.current_progress['completed_tiles'] >= STOP_AFTER
+        })
+        assert result['status'] == 'cancelled', f"run was not stopped: {result['status']}"
+
+        # Drop the end record, as if the process had died
+        journal = GenerationJournal(builder.data_dir / 'journal', REGION)
+        run_file = journal.runs()[0]
+        lines = run_file.read_text().splitlines(keepends=True)
+        run_file.write_text(''.join(lines[:-1]))
+        finished = len(journal.interrupted_run()['tiles'])
+        print(f"✓ Interrupted run journaled {finished} finished tiles")
+
+        # A later missing-tile batch must not hide the interrupted run
+        tile = builder.calculate_tile_grid(bounds)[-1]
+        builder.generate_tiles_for_region(REGION, bounds, {'tiles': [tile]})
+        interrupted = builder.get_interrupted_run(REGION)
+        assert interrupted and interrupted['finished_tiles'] == finished, "interrupted run hidden by a partial run"
+        print("✓ Interrupted run still found after a partial run")
+
+        result = builder.generate_tiles_for_region(REGION, bounds, {'resume': True})
+        assert result['resumed_tiles'] == finished, f"resumed {result['resumed_tiles']} of {finished} tiles"
+        print(f"✓ Resumed run skipped {result['resumed_tiles']} tiles, rendered "
+              f"{result['successful_tiles']}")
+
+        assert read_tiles(builder) == expected, "resumed tiles differ from an uninterrupted run"
+        assert builder.get_interrupted_run(REGION) is None, "completed run still reported as interrupted"
+        print(f"✓ {len(expected)} tiles match an uninterrupted run")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_resume()
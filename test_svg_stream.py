@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Check streamed tile SVG against the minidom output it replaced.
+
+Renders the tiles of the sparse synthetic benchmark fixture. Each tile's
+pretty SVG must equal minidom's toprettyxml of its compact SVG (what the
+old ElementTree -> tostring -> minidom path wrote), and the gzip file
+render_tile streams must hold the compact SVG with its recorded hash.
+"""
+
+import sys
+import gzip
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from xml.dom import minidom
+
+# Add the project root and benchmarks to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / 'benchmarks'))
+
+
+def test_svg_stream():
+    """Compare streamed, pretty and gzipped SVG of every fixture tile."""
+    print("=== Streaming SVG Test ===")
+
+    from tile_generation.builder import TileBuilder
+    from synthetic_osm import fixture_bounds, get_fixture
+    from run_benchmarks import FIXTURES_DIR, ingest
+
+    work_dir = Path(tempfile.mkdtemp(prefix='svg-stream-'))
+    try:
+        builder = TileBuilder({'workers': 1})
+        builder.tiles_dir = work_dir / 'tiles'
+        builder.data_dir = work_dir / 'data'
+        region_dir = builder.tiles_dir / 'regions' / 'check'
+        region_dir.mkdir(parents=True)
+
+        bounds = fixture_bounds('sparse')
+        tiles = builder.calculate_tile_grid(bounds)
+        features = builder.bin_features_by_tile(ingest(builder, get_fixture(FIXTURES_DIR, 'sparse'), bounds), tiles)
+
+        failures = []
+        for tile_lat, tile_lng in tiles:
+            tile_features = features[builder.tile_key(tile_lat, tile_lng)]
+            tile_bounds = builder.get_tile_bounds(tile_lat, tile_lng)
+            name = f"{tile_lat:.3f}_{tile_lng:.3f}.svg.gz"
+
+            builder.pretty_svg = False
+            compact = builder.create_tile_svg(tile_lat, tile_lng, tile_features, tile_bounds)
+            render = builder.render_tile(tile_lat, tile_lng, 'check', tile_features)
+            builder.pretty_svg = True
+            pretty = builder.create_tile_svg(tile_lat, tile_lng, tile_features, tile_bounds)
+
+            if pretty != minidom.parseString(compact).toprettyxml(indent="  "):
+                failures.append(f"{name}: pretty SVG differs from minidom's")
+            with gzip.open(region_dir / name, 'rt', encoding='utf-8') as f:
+                if f.read() != compact:
+                    failures.append(f"{name}: gzip file differs from the compact SVG")
+            if render['sha256'] != hashlib.sha256(compact.encode('utf-8')).hexdigest():
+                failures.append(f"{name}: recorded hash does not match the SVG")
+
+        print(f"{'✓' if not failures else '❌'} {len(tiles)} tiles rendered, {len(failures)} problems")
+        for failure in failures[:5]:
+            print(f"  {failure}")
+        assert not failures, f"{len(failures)} tile SVG problems"
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_svg_stream()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Check the compiled tag rule indexes against a linear scan of the same rules.
+
+The linear scan (benchmarks/classify_bench.py) walks every rule in order,
+the way OSMHandler's old if/elif chains did. Random tag sets are built from
+the keys and values the rules use, so every rule, require and exclude term
+is exercised, plus some tags no rule knows.
+"""
+
+import sys
+import random
+from pathlib import Path
+
+# Add the project root and benchmarks to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / 'benchmarks'))
+
+SAMPLES = 20000
+
+
+def rule_vocabulary(chains, any_value):
+    """Get {key: [values]} of every term of every rule in chains."""
+    vocabulary = {}
+    for chain in chains:
+        for rule in chain:
+            for terms in (rule['match'], rule.get('require') or {}, rule.get('exclude') or {}):
+                for key, values in terms.items():
+                    vocabulary.setdefault(key, set()).update([] if values is any_value else values)
+    return {key: sorted(values) + ['yes', 'other'] for key, values in vocabulary.items()}
+
+
+def random_tags(rng, vocabulary):
+    keys = list(vocabulary)
+    tags = {}
+    for key in rng.sample(keys, rng.randint(1, min(4, len(keys)))):
+        tags[key] = rng.choice(vocabulary[key])
+    if rng.random() < 0.2:
+        tags['name'] = 'Somewhere'
+    return tags
+
+
+def test_tag_rules():
+    """Compare compiled and linear classification of random tag sets."""
+    print("=== Tag Rule Index Test ===")
+
+    from tile_generation.tag_rules import (ANY, NODE_RULES, WAY_RULES, AREA_RULES,
+                                           NODE_INDEX, WAY_INDEX, AREA_INDEX)
+    from classify_bench import classify_linear
+
+    cases = {
+        'node': (NODE_RULES, NODE_INDEX.match),
+        'way': ((WAY_RULES,), lambda tags: [rule for rule in (WAY_INDEX.first(tags),) if rule]),
+        'area': ((AREA_RULES,), lambda tags: [rule for rule in (AREA_INDEX.first(tags),) if rule]),
+    }
+
+    rng = random.Random(1)
+    mismatches = []
+    for element_type, (chains, compiled) in cases.items():
+        vocabulary = rule_vocabulary(chains, ANY)
+        matched = 0
+        for _ in range(SAMPLES):
+            tags = random_tags(rng, vocabulary)
+            expected = classify_linear(chains, tags)
+            if compiled(tags) != expected:
+                mismatches.append((element_type, tags))
+            matched += bool(expected)
+
+        failed = sum(1 for mismatch in mismatches if mismatch[0] == element_type)
+        print(f"{'✓' if not failed else '❌'} {element_type}: {SAMPLES} tag sets, "
+              f"{matched} classified, {failed} mismatches")
+
+    for element_type, tags in mismatches[:5]:
+        print(f"  {element_type} {tags}")
+    assert not mismatches, f"{len(mismatches)} tag sets classified differently"
+
+
+if __name__ == "__main__":
+    test_tag_rules()
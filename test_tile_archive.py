@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Check that region tile archives round-trip and serve like loose tiles.
+
+Generates the sparse synthetic benchmark fixture as a region, packs it into
+an archive, and checks incremental re-export, unpacking into a fresh
+region directory, and serving the region from the archive alone.
+"""
+
+import sys
+import json
+import gzip
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the project root and benchmarks to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / 'benchmarks'))
+
+REGION = 'toronto-downtown'
+
+
+def make_builder(work_dir, osm_file):
+    from tile_generation.builder import TileBuilder
+
+    builder = TileBuilder({'workers': 1})
+    builder.base_dir = work_dir
+    builder.tiles_dir = work_dir / 'tiles'
+    builder.data_dir = work_dir / 'data'
+    for directory in ('osm_cache', 'feature_store', 'node_index', 'journal'):
+        (builder.data_dir / directory).mkdir(parents=True, exist_ok=True)
+    shutil.copy(osm_file, builder.data_dir / 'osm_cache' / 'ontario-latest.osm.pbf')
+    return builder
+
+
+def make_client(work_dir):
+    """Create a test client serving work_dir/tiles, without job workers."""
+    from app import create_app
+    from config import config, DevelopmentConfig
+
+    config['check'] = type('CheckConfig', (DevelopmentConfig,), {
+        'TILES_DIR': work_dir / 'tiles', 'DATA_DIR': work_dir / 'data',
+        'TESTING': True, 'JOB_WORKERS': 0, 'MISSING_TILE_INTERVAL': 0
+    })
+    return create_app('check').test_client()
+
+
+def read_region(region_dir):
+    """Get {tile name: (bytes, mtime)}, the trusted tile hashes and the metadata of a region directory."""
+    from tile_generation.tile_hashes import read_tile_hashes, tile_hash
+
+    tiles = {tile.name: (tile.read_bytes(), tile.stat().st_mtime) for tile in sorted(region_dir.glob('*.svg.gz'))}
+    recorded = read_tile_hashes(region_dir)
+    hashes = {name: tile_hash(recorded, region_dir / name) for name in tiles}
+    with open(region_dir / 'metadata.json') as f:
+        metadata = json.load(f)
+    return tiles, hashes, metadata
+
+
+def test_tile_archive():
+    """Export, re-export, import and serve a region archive."""
+    print("=== Tile Archive Test ===")
+
+    from tile_generation.archive import export_region, import_region, archive_path, TileArchive
+    from tile_generation.tile_hashes import hash_entry, read_tile_hashes
+    from synthetic_osm import fixture_bounds, get_fixture
+    from run_benchmarks import FIXTURES_DIR
+
+    work_dir = Path(tempfile.mkdtemp(prefix='tile-archive-'))
+    try:
+        builder = make_builder(work_dir, get_fixture(FIXTURES_DIR, 'sparse'))
+        builder.generate_tiles_for_region(REGION, fixture_bounds('sparse'))
+        region_dir = builder.tiles_dir / 'regions' / REGION
+        archive_file = archive_path(builder.tiles_dir, REGION)
+        tiles, hashes, metadata = read_region(region_dir)
+        assert all(hashes.values()), "generated tiles' hashes not trusted"
+
+        counts = export_region(region_dir, archive_file)
+        archive = TileArchive(archive_file)
+        assert counts['written'] == len(tiles) == archive.tile_count(), f"export counts {counts}"
+        for name, (data, mtime) in tiles.items():
+            assert archive.get(name) == (data, hashes[name], mtime), f"archived {name} differs"
+        print(f"✓ Exported {len(tiles)} tiles with their hashes and mtimes")
+
+        # Re-export touches only changed and deleted tiles
+        changed, deleted = sorted(tiles)[:2]
+        (region_dir / deleted).unlink()
+        (region_dir / changed).write_bytes(gzip.compress(b'<svg/>', mtime=0))
+        recorded = read_tile_hashes(region_dir)
+        recorded[changed] = hash_entry('changed', (region_dir / changed).stat())
+        del recorded[deleted]
+        with open(region_dir / 'tile_hashes.json', 'w') as f:
+            json.dump(recorded, f)
+        counts = export_region(region_dir, archive_file)
+        assert counts == {'written': 1, 'unchanged': len(tiles) - 2, 'removed': 1}, f"re-export counts {counts}"
+        print(f"✓ Re-export wrote 1, removed 1, left {counts['unchanged']} unchanged")
+
+        # Unpacking restores the region directory as it was exported
+        tiles, hashes, metadata = read_region(region_dir)
+        restored_dir = work_dir / 'restored' / REGION
+        written = import_region(archive_file, restored_dir)
+        assert written == len(tiles), f"imported {written} of {len(tiles)} tiles"
+        assert read_region(restored_dir) == (tiles, hashes, metadata), "imported region differs"
+        print(f"✓ Imported {written} tiles, hashes and metadata unchanged")
+
+        # A region deployed as an archive alone serves the same responses
+        client = make_client(work_dir)
+        loose = {name: client.get(f'/api/tile/{REGION}/{name}', headers={'Accept-Encoding': 'gzip'})
+                 for name in tiles}
+        shutil.rmtree(region_dir)
+        for name, expected in loose.items():
+            for url in (f'/api/tile/{REGION}/{name}', f'/admin/tiles/regions/{REGION}/{name}'):
+                response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+                assert (response.status_code, response.get_data(), response.headers.get('ETag')) == \
+                    (200, expected.get_data(), expected.headers.get('ETag')), f"{url} differs from the loose tile"
+                revalidated = client.get(url, headers={'Accept-Encoding': 'gzip',
+                                                       'If-None-Match': response.headers['ETag']})
+                assert revalidated.status_code == 304, f"{url} not revalidated from the archive"
+        print(f"✓ Served {len(loose)} tiles from the archive with the loose tiles' bytes and ETags")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_tile_archive()
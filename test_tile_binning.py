@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Check single-pass feature binning against the per-tile OSM pass.
+
+Reads the sparse synthetic benchmark fixture once for its whole grid and
+bins the features per tile, then reads it again per tile with
+OSMHandler(get_tile_bounds()) as the per-tile ingest mode does. The
+fixture's street grid runs along every tile edge, so features on shared
+edges must go to the tiles on both sides. The per-tile pass can miss an
+edge where tile_lat + tile_size falls short of it by float error; those
+are the only extra features binning may have.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root and benchmarks to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / 'benchmarks'))
+
+EDGE_EPSILON = 1e-7
+
+
+def feature_ids(features):
+    """Get the {(feature type, osm_id)} of a feature dict."""
+    return {(feature_type, feature['properties'].get('osm_id'))
+            for feature_type, feature_list in features.items() for feature in feature_list}
+
+
+def on_tile_edge(builder, feature, tile_lat, tile_lng):
+    """Check whether a feature's bounding box touches the tile only along an edge."""
+    minx, miny, maxx, maxy = feature['geometry'].bounds
+    bounds = builder.get_tile_bounds(tile_lat, tile_lng)
+    return (abs(miny - round(bounds['north'], 3)) < EDGE_EPSILON or
+            abs(maxy - bounds['south']) < EDGE_EPSILON or
+            abs(minx - round(bounds['east'], 3)) < EDGE_EPSILON or
+            abs(maxx - bounds['west']) < EDGE_EPSILON)
+
+
+def test_tile_binning():
+    """Compare each tile's binned features with a per-tile pass over the fixture."""
+    print("=== Tile Binning Test ===")
+
+    from tile_generation.builder import TileBuilder
+    from synthetic_osm import fixture_bounds, get_fixture
+    from run_benchmarks import FIXTURES_DIR, ingest
+
+    builder = TileBuilder({'workers': 1})
+    osm_file = get_fixture(FIXTURES_DIR, 'sparse')
+    bounds = fixture_bounds('sparse')
+    tiles = builder.calculate_tile_grid(bounds)
+    features = ingest(builder, osm_file, bounds)
+    binned = builder.bin_features_by_tile(features, tiles)
+    by_id = {(feature_type, feature['properties'].get('osm_id')): feature
+             for feature_type, feature_list in features.items() for feature in feature_list}
+
+    edge_features = 0
+    for tile_lat, tile_lng in tiles:
+        per_tile = feature_ids(ingest(builder, osm_file, builder.get_tile_bounds(tile_lat, tile_lng)))
+        single_pass = feature_ids(binned[builder.tile_key(tile_lat, tile_lng)])
+        dropped = per_tile - single_pass
+        assert not dropped, f"tile {tile_lat:.3f}_{tile_lng:.3f} lost {len(dropped)} features, e.g. {min(dropped)}"
+        extra = single_pass - per_tile
+        assert all(on_tile_edge(builder, by_id[key], tile_lat, tile_lng) for key in extra), \
+            f"tile {tile_lat:.3f}_{tile_lng:.3f} gained features off its edges"
+        edge_features += len(extra)
+    print(f"✓ {len(tiles)} tiles hold every feature of the per-tile pass")
+    print(f"✓ {edge_features} extra features all lie on an edge the per-tile pass missed by float error")
+
+
+if __name__ == "__main__":
+    test_tile_binning()
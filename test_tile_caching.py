@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Check HTTP caching and gzip pass-through of the Flask tile endpoints.
+
+Serves two hand-written tiles (one listed in tile_hashes.json, one not)
+from a temporary tiles directory through a test client, and checks the
+stored bytes, decompression for clients without gzip, ETags,
+Last-Modified, and 304 answers to conditional requests.
+"""
+
+import sys
+import gzip
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+REGION = 'check'
+SVG = '<?xml version="1.0" ?><svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 1000"><g/></svg>'
+
+
+def make_client(work_dir):
+    """Create a test client serving work_dir/tiles, without job workers."""
+    from app import create_app
+    from config import config, DevelopmentConfig
+
+    config['check'] = type('CheckConfig', (DevelopmentConfig,), {
+        'TILES_DIR': work_dir / 'tiles', 'DATA_DIR': work_dir / 'data',
+        'TESTING': True, 'JOB_WORKERS': 0, 'MISSING_TILE_INTERVAL': 0
+    })
+    return create_app('check').test_client()
+
+
+def write_tiles(region_dir):
+    """Write the tiles; return {name: (gzip bytes, SVG)}."""
+    from tile_generation.tile_hashes import hash_entry
+
+    region_dir.mkdir(parents=True)
+    tiles = {}
+    for i, name in enumerate(('43.600_-79.400.svg.gz', '43.600_-79.390.svg.gz')):
+        svg = SVG.replace('<g/>', f'<g id="tile-{i}"/>')
+        data = gzip.compress(svg.encode('utf-8'), mtime=0)
+        (region_dir / name).write_bytes(data)
+        tiles[name] = (data, svg)
+    # Only the first tile's hash is known; the other falls back to size and mtime
+    first = next(iter(tiles))
+    sha256 = hashlib.sha256(tiles[first][1].encode('utf-8')).hexdigest()
+    with open(region_dir / 'tile_hashes.json', 'w') as f:
+        json.dump({first: hash_entry(sha256, (region_dir / first).stat())}, f)
+    return tiles
+
+
+def test_tile_caching():
+    """Request each tile through every tile URL with and without validators."""
+    print("=== Tile HTTP Caching Test ===")
+
+    failures = []
+
+    def check(label, ok):
+        print(f"{'✓' if ok else '❌'} {label}")
+        if not ok:
+            failures.append(label)
+
+    with tempfile.TemporaryDirectory(prefix='tile-caching-') as work_dir:
+        work_dir = Path(work_dir)
+        tiles = write_tiles(work_dir / 'tiles' / 'regions' / REGION)
+        client = make_client(work_dir)
+
+        for name, (data, svg) in tiles.items():
+            for url in (f'/api/tile/{REGION}/{name}', f'/tiles/regions/{REGION}/{name}',
+                        f'/admin/tiles/regions/{REGION}/{name}'):
+                gzipped = client.get(url, headers={'Accept-Encoding': 'gzip'})
+                check(f"{url}: gzip client gets the stored bytes",
+                      gzipped.status_code == 200 and gzipped.headers.get('Content-Encoding') == 'gzip' and
+                      gzipped.get_data() == data)
+
+                etag = gzipped.headers.get('ETag')
+                check(f"{url}: ETag, Last-Modified and Vary set",
+                      bool(etag) and bool(gzipped.headers.get('Last-Modified')) and
+                      'Accept-Encoding' in gzipped.headers.get('Vary', ''))
+
+                revalidated = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+                check(f"{url}: If-None-Match answered with 304",
+                      revalidated.status_code == 304 and not revalidated.get_data())
+
+                since = client.get(url, headers={'Accept-Encoding': 'gzip',
+                                                 'If-Modified-Since': gzipped.headers['Last-Modified']})
+                check(f"{url}: If-Modified-Since answered with 304", since.status_code == 304)
+
+                changed = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"stale"'})
+                check(f"{url}: stale ETag gets the tile", changed.status_code == 200)
+
+                if url.startswith('/admin/'):
+                    continue
+                plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+                check(f"{url}: client without gzip gets the SVG",
+                      plain.status_code == 200 and 'Content-Encoding' not in plain.headers and
+                      plain.get_data(as_text=True) == svg and plain.headers.get('ETag') != etag)
+
+        # A tile rewritten after its hash was saved (a run in progress or killed)
+        name = next(iter(tiles))
+        url = f'/api/tile/{REGION}/{name}'
+        hashed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        sha256 = hashlib.sha256(tiles[name][1].encode('utf-8')).hexdigest()
+        check(f"{url}: ETag is the recorded SVG hash", hashed.headers['ETag'] == f'"{sha256[:32]}.gz"')
+        rewritten = gzip.compress(SVG.replace('<g/>', '<g id="rewritten"/>').encode('utf-8'), mtime=0)
+        (work_dir / 'tiles' / 'regions' / REGION / name).write_bytes(rewritten)
+        stale = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': hashed.headers['ETag']})
+        check(f"{url}: rewritten tile not revalidated under its old hash",
+              stale.status_code == 200 and stale.get_data() == rewritten and
+              stale.headers['ETag'] != hashed.headers['ETag'])
+
+        missing = client.get(f'/api/tile/{REGION}/43.700_-79.400.svg.gz')
+        check("missing tile gets 404", missing.status_code == 404)
+
+    assert not failures, f"{len(failures)} caching checks failed"
+
+
+if __name__ == "__main__":
+    test_tile_caching()
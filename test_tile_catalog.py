@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Check that the tile catalog agrees with the tiles on disk.
+
+Generates the sparse synthetic benchmark fixture as a region and compares
+the catalog, and the API listings answered from it, with the region
+directory after a full run, after a partial re-render, and after regions
+are added, removed or changed by another process.
+"""
+
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the project root and benchmarks to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / 'benchmarks'))
+
+REGION = 'toronto-downtown'
+
+
+def make_builder(work_dir, osm_file):
+    from tile_generation.builder import TileBuilder
+
+    builder = TileBuilder({'workers': 1})
+    builder.base_dir = work_dir
+    builder.tiles_dir = work_dir / 'tiles'
+    builder.data_dir = work_dir / 'data'
+    for directory in ('osm_cache', 'feature_store', 'node_index', 'journal'):
+        (builder.data_dir / directory).mkdir(parents=True, exist_ok=True)
+    shutil.copy(osm_file, builder.data_dir / 'osm_cache' / 'ontario-latest.osm.pbf')
+    return builder
+
+
+def make_client(work_dir):
+    """Create a test client serving work_dir/tiles, without job workers."""
+    from app import create_app
+    from config import config, DevelopmentConfig
+
+    config['check'] = type('CheckConfig', (DevelopmentConfig,), {
+        'TILES_DIR': work_dir / 'tiles', 'DATA_DIR': work_dir / 'data',
+        'TESTING': True, 'JOB_WORKERS': 0, 'MISSING_TILE_INTERVAL': 0
+    })
+    return create_app('check').test_client()
+
+
+def disk_tiles(region_dir):
+    """Get {tile name: size} of a region directory."""
+    return {tile.name: tile.stat().st_size for tile in region_dir.glob('*.svg.gz')}
+
+
+def catalog_tiles(catalog, region_name):
+    return {tile['filename']: tile['size_bytes'] for tile in catalog.tiles(region_name)}
+
+
+def test_tile_catalog():
+    """Compare the catalog with the region directories as they change."""
+    print("=== Tile Catalog Test ===")
+
+    from tile_generation.catalog import TileCatalog, get_tile_catalog
+    from synthetic_osm import fixture_bounds, get_fixture
+    from run_benchmarks import FIXTURES_DIR
+
+    work_dir = Path(tempfile.mkdtemp(prefix='tile-catalog-'))
+    try:
+        builder = make_builder(work_dir, get_fixture(FIXTURES_DIR, 'sparse'))
+        bounds = fixture_bounds('sparse')
+        builder.generate_tiles_for_region(REGION, bounds)
+        region_dir = builder.tiles_dir / 'regions' / REGION
+        catalog = get_tile_catalog(builder.tiles_dir)
+
+        assert catalog_tiles(catalog, REGION) == disk_tiles(region_dir), "catalog differs after a full run"
+        region = catalog.region(REGION)
+        assert region['tile_count'] == region['metadata']['tile_count'] == len(disk_tiles(region_dir)), \
+            f"tile count {region['tile_count']}"
+        assert region['size_bytes'] == sum(disk_tiles(region_dir).values()), "region size differs"
+        print(f"✓ Full run: {region['tile_count']} tiles, {region['size_bytes']} bytes")
+
+        builder.pretty_svg = True
+        builder.generate_tiles_for_region(REGION, bounds, {'tiles': builder.calculate_tile_grid(bounds)[:3]})
+        assert catalog_tiles(catalog, REGION) == disk_tiles(region_dir), "catalog differs after a partial run"
+        assert catalog.region(REGION)['tile_count'] == len(disk_tiles(region_dir)), "partial run changed tile count"
+        print("✓ Partial re-render updated 3 tile sizes")
+
+        # Regions copied in or deleted behind the catalog's back, then a save from another process
+        shutil.copytree(region_dir, builder.tiles_dir / 'regions' / 'copied')
+        other = TileCatalog(builder.tiles_dir).load()
+        assert catalog_tiles(other, 'copied') == disk_tiles(region_dir), "copied region not scanned on load"
+        assert [r['name'] for r in catalog.regions()] == ['copied', REGION], "other process's save not picked up"
+        shutil.rmtree(builder.tiles_dir / 'regions' / 'copied')
+        other.remove_region('copied')
+        assert [r['name'] for r in catalog.regions()] == [REGION], "other process's removal not picked up"
+        print("✓ Regions added and removed outside the builder are picked up")
+
+        client = make_client(work_dir)
+        listed = client.get('/api/regions').get_json()['regions']
+        assert [(r['name'], r['available_tiles']) for r in listed] == [(REGION, len(disk_tiles(region_dir)))], \
+            f"/api/regions listed {listed}"
+        tiles = client.get(f'/api/region/{REGION}/tiles').get_json()
+        assert {t['filename']: t['size_bytes'] for t in tiles['tiles']} == disk_tiles(region_dir), \
+            "/api/region tiles differ from disk"
+        assert client.get('/api/region/nowhere/tiles').status_code == 404, "unknown region listed"
+        print(f"✓ API listings match disk ({tiles['total_tiles']} tiles)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_tile_catalog()
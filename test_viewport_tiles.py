@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Check the multipart viewport tile batches of /api/tiles.
+
+Generates the sparse synthetic benchmark fixture as a region and requests a
+bounding box of it in one response. Each part must hold a tile's stored
+bytes with the ETag /api/tile gives it, and the closing JSON part must list
+the tiles sent and the missing ones. Also checks missing-tile reporting,
+including that tiles off the region's grid are not counted, and the
+answers to bad requests.
+"""
+
+import sys
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the project root and benchmarks to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / 'benchmarks'))
+
+REGION = 'toronto-downtown'
+BBOX = (-79.395, 43.605, -79.375, 43.625)
+
+
+def make_builder(work_dir, osm_file):
+    from tile_generation.builder import TileBuilder
+
+    builder = TileBuilder({'workers': 1})
+    builder.base_dir = work_dir
+    builder.tiles_dir = work_dir / 'tiles'
+    builder.data_dir = work_dir / 'data'
+    for directory in ('osm_cache', 'feature_store', 'node_index', 'journal'):
+        (builder.data_dir / directory).mkdir(parents=True, exist_ok=True)
+    shutil.copy(osm_file, builder.data_dir / 'osm_cache' / 'ontario-latest.osm.pbf')
+    return builder
+
+
+def make_app(work_dir):
+    """Create an app serving work_dir/tiles, without job workers."""
+    from app import create_app
+    from config import config, DevelopmentConfig
+
+    config['check'] = type('CheckConfig', (DevelopmentConfig,), {
+        'TILES_DIR': work_dir / 'tiles', 'DATA_DIR': work_dir / 'data',
+        'TESTING': True, 'JOB_WORKERS': 0, 'MISSING_TILE_INTERVAL': 0
+    })
+    return create_app('check')
+
+
+def read_parts(response):
+    """Split a multipart response into [(headers, body)], checking its framing."""
+    boundary = response.headers['Content-Type'].split('boundary=')[1].encode()
+    body = response.get_data()
+    assert body.endswith(b'--' + boundary + b'--\r\n'), "multipart body not closed"
+    parts = []
+    for chunk in body.split(b'--' + boundary + b'\r\n')[1:]:
+        head, _, rest = chunk.partition(b'\r\n\r\n')
+        headers = dict(line.decode().split(': ', 1) for line in head.split(b'\r\n'))
+        length = int(headers['Content-Length'])
+        assert rest[length:length + 2] == b'\r\n', "part longer than its Content-Length"
+        parts.append((headers, rest[:length]))
+    return parts
+
+
+def test_viewport_tiles():
+    """Request a viewport batch and compare its parts with the single tile responses."""
+    print("=== Viewport Tile Batch Test ===")
+
+    from api.missing import get_missing_tile_store
+    from synthetic_osm import fixture_bounds, get_fixture
+    from run_benchmarks import FIXTURES_DIR
+
+    work_dir = Path(tempfile.mkdtemp(prefix='viewport-tiles-'))
+    try:
+        builder = make_builder(work_dir, get_fixture(FIXTURES_DIR, 'sparse'))
+        builder.generate_tiles_for_region(REGION, fixture_bounds('sparse'))
+        region_dir = builder.tiles_dir / 'regions' / REGION
+        west, south, east, north = BBOX
+        expected = [f"{lat:.3f}_{lng:.3f}.svg.gz" for lat, lng in
+                    builder.calculate_tile_grid({'west': west, 'south': south, 'east': east, 'north': north})]
+        deleted = expected[0]
+        (region_dir / deleted).unlink()
+
+        app = make_app(work_dir)
+        client = app.test_client()
+        url = f"/api/tiles?region={REGION}&bbox={','.join(str(value) for value in BBOX)}"
+        response = client.get(url + '&report_missing=1')
+        assert response.status_code == 200 and response.mimetype == 'multipart/mixed', \
+            f"batch answered {response.status_code} {response.mimetype}"
+        parts = read_parts(response)
+        (summary_headers, summary), tile_parts = parts[-1], parts[:-1]
+
+        sent = []
+        for headers, data in tile_parts:
+            tile_url = headers['Content-Location']
+            name = tile_url.rsplit('/', 1)[1]
+            single = client.get(tile_url, headers={'Accept-Encoding': 'gzip'})
+            assert headers['Content-Type'] == 'image/svg+xml' and headers['Content-Encoding'] == 'gzip', \
+                f"{name} part headers {headers}"
+            assert data == (region_dir / name).read_bytes() == single.get_data(), f"{name} part bytes differ"
+            assert headers['ETag'] == single.headers['ETag'], f"{name} part ETag differs"
+            revalidated = client.get(tile_url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': headers['ETag']})
+            assert revalidated.status_code == 304, f"{name} part ETag not revalidated"
+            sent.append(name)
+        assert sent == expected[1:], f"sent {sent}"
+        print(f"✓ {len(sent)} parts hold the stored tiles with the /api/tile ETags")
+
+        listing = json.loads(summary)
+        assert summary_headers['Content-Type'].startswith('application/json'), "last part is not JSON"
+        assert listing == {'region': REGION, 'tiles': sent, 'missing': [deleted]}, f"listing {listing}"
+        print(f"✓ Closing part lists {len(sent)} tiles sent and {deleted} missing")
+
+        with app.app_context():
+            reported = get_missing_tile_store().hottest()
+        assert [(row['region'], row['request_count']) for row in reported] == [(REGION, 1)], \
+            f"reported {reported}"
+        client.get(url)
+        with app.app_context():
+            assert get_missing_tile_store().hottest()[0]['request_count'] == 1, "missing tile reported unasked"
+        print("✓ Missing tile reported only with report_missing=1")
+
+        # Misses off every region's grid are not counted
+        client.get('/api/tile/nowhere/43.600_-79.400.svg.gz')
+        client.get(f'/api/tile/{REGION}/10.000_10.000.svg.gz')
+        ignored = client.post('/api/missing-tile', json={'lat': 10.005, 'lng': 10.005, 'region': REGION})
+        with app.app_context():
+            assert len(get_missing_tile_store().hottest()) == 1, "tile off every region's grid counted"
+        assert ignored.get_json()['status'] == 'ignored', f"report answered {ignored.get_json()}"
+        print("✓ Misses off every region's grid are not counted")
+
+        for query, status in ((f'region={REGION}&bbox=nan,43.6,-79.3,43.7', 400),
+                              (f'region={REGION}&bbox=-79.3,43.6,-79.4,43.7', 400),
+                              (f'region={REGION}&bbox=-80,43,-79,44', 400),
+                              (f'region={REGION}&bbox=1,2,3', 400),
+                              ('region=../x&bbox=-79.395,43.605,-79.375,43.625', 400),
+                              ('region=nowhere&bbox=-79.395,43.605,-79.375,43.625', 404)):
+            answered = client.get(f'/api/tiles?{query}').status_code
+            assert answered == status, f"{query} answered {answered}, expected {status}"
+        print("✓ Bad bboxes, too many tiles and bad regions answered 400, unknown region 404")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_viewport_tiles()
@@ -2,4 +2,6 @@
 
 from .builder import TileBuilder
 from .osm_processor import OSMHandler
-__all__ = ['TileBuilder', 'OSMHandler']
\ No newline at end of file
+from .feature_store import FeatureStore
+from .incremental import ChangeSet
+__all__ = ['TileBuilder', 'OSMHandler', 'FeatureStore', 'ChangeSet']
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""Single-file SQLite archives of a region's tiles (MBTiles-style).
+
+A region's .svg.gz tiles, tile hashes and metadata are packed into
+tiles/archives/<region>.sqlite, one row per tile keyed by its integer grid
+position (TileBuilder.tile_key) holding the gzipped SVG as stored on disk.
+An archive is one file to copy or upload instead of thousands, and tiles
+are served from it by indexed lookups on a memory-mapped, read-only
+connection. The loose tile directory stays the working layout (resume,
+change detection and SiteGround upload read it); export packs it into an
+archive and import unpacks an archive back into it.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+
+from .tile_hashes import HASHES_FILE, hash_entry, read_tile_hashes, verified_hash
+
+SCHEMA_VERSION = 1
+
+# Bytes of an archive a reader maps into memory
+MMAP_SIZE = 256 * 1024 * 1024
+
+TILE_SIZE = 0.01
+
+
+def archive_path(tiles_dir, region_name):
+    """Get the path of a region's tile archive."""
+    return Path(tiles_dir) / 'archives' / f"{region_name}.sqlite"
+
+
+def parse_tile_name(tile_name, tile_size=TILE_SIZE):
+    """Get the (row, col) grid position of a tile file name, or None."""
+    if not tile_name.endswith('.svg.gz'):
+        return None
+    try:
+        lat, lng = (float(part) for part in tile_name[:-len('.svg.gz')].split('_'))
+    except ValueError:
+        return None
+    return (int(round(lat / tile_size)), int(round(lng / tile_size)))
+
+
+def tile_name(row, col, tile_size=TILE_SIZE):
+    """Get the file name of the tile at a grid position."""
+    return f"{row * tile_size:.3f}_{col * tile_size:.3f}.svg.gz"
+
+
+def _create_schema(conn):
+    conn.execute('CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tiles (
+            tile_row INTEGER NOT NULL,
+            tile_col INTEGER NOT NULL,
+            sha256 TEXT,
+            modified REAL NOT NULL,
+            tile_data BLOB NOT NULL,
+            PRIMARY KEY (tile_row, tile_col)
+        )
+    ''')
+
+
+def export_region(region_dir, archive_file):
+    """Pack a region's tile directory into its archive; return the counts written.
+
+    Only tiles whose hash, size or mtime differ from the archived copy are
+    rewritten, and tiles that no longer exist are removed, so exporting
+    after an update touches only the changed rows.
+    """
+    region_dir = Path(region_dir)
+    archive_file = Path(archive_file)
+    archive_file.parent.mkdir(parents=True, exist_ok=True)
+
+    hashes = read_tile_hashes(region_dir)
+    metadata = _read_json(region_dir / 'metadata.json', {})
+
+    # Rollback journal, not WAL, so the archive stays a single file
+    conn = sqlite3.connect(str(archive_file), timeout=30)
+    try:
+        conn.execute('PRAGMA journal_mode=DELETE')
+        _create_schema(conn)
+        archived = {(row, col): (sha256, modified) for row, col, sha256, modified in
+                    conn.execute('SELECT tile_row, tile_col, sha256, modified FROM tiles')}
+
+        counts = {'written': 0, 'unchanged': 0, 'removed': 0}
+        present = set()
+        with conn:
+            for tile_file in region_dir.glob('*.svg.gz'):
+                key = parse_tile_name(tile_file.name)
+                if key is None:
+                    continue
+                present.add(key)
+                stat = tile_file.stat()
+                modified = stat.st_mtime
+                sha256 = verified_hash(hashes.get(tile_file.name), stat)
+                if archived.get(key) == (sha256, modified):
+                    counts['unchanged'] += 1
+                    continue
+                conn.execute('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?)',
+                             (key[0], key[1], sha256, modified, tile_file.read_bytes()))
+                counts['written'] += 1
+
+            removed = [key for key in archived if key not in present]
+            conn.executemany('DELETE FROM tiles WHERE tile_row = ? AND tile_col = ?', removed)
+            counts['removed'] = len(removed)
+
+            conn.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?)', [
+                ('schema_version', str(SCHEMA_VERSION)),
+                ('name', region_dir.name),
+                ('format', 'svg+gzip'),
+                ('tile_size_degrees', str(metadata.get('tile_size_degrees', TILE_SIZE))),
+                ('region_metadata', json.dumps(metadata)),
+                ('exported_at', datetime.now().isoformat())
+            ])
+    finally:
+        conn.close()
+    return counts
+
+
+def import_region(archive_file, region_dir):
+    """Unpack an archive into a region's tile directory; return the number of tiles written.
+
+    Tiles are written through temporary files, with metadata.json and
+    tile_hashes.json rebuilt from the archive.
+    """
+    region_dir = Path(region_dir)
+    region_dir.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(f"file:{archive_file}?mode=ro", uri=True)
+    try:
+        metadata = dict(conn.execute('SELECT name, value FROM metadata'))
+        hashes = {}
+        written = 0
+        for row, col, sha256, modified, data in conn.execute(
+                'SELECT tile_row, tile_col, sha256, modified, tile_data FROM tiles'):
+            name = tile_name(row, col)
+            tile_file = region_dir / name
+            temp_file = tile_file.with_name(f"{name}.tmp")
+            temp_file.write_bytes(data)
+            os.utime(temp_file, (modified, modified))
+            os.replace(temp_file, tile_file)
+            if sha256:
+                hashes[name] = hash_entry(sha256, tile_file.stat())
+            written += 1
+    finally:
+        conn.close()
+
+    if metadata.get('region_metadata'):
+        _write_json(region_dir / 'metadata.json', json.loads(metadata['region_metadata']))
+    _write_json(region_dir / HASHES_FILE, {**read_tile_hashes(region_dir), **hashes})
+    return written
+
+
+class TileArchive:
+    """Read-only access to one archive, with a memory-mapped connection per thread."""
+
+    def __init__(self, archive_file):
+        self.archive_file = Path(archive_file)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.archive_file}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+            self._local.conn = conn
+        return conn
+
+    def get(self, tile_name):
+        """Get (gzipped SVG bytes, sha256, modified) of a tile, or None."""
+        key = parse_tile_name(tile_name)
+        if key is None:
+            return None
+        return self._connection().execute(
+            'SELECT tile_data, sha256, modified FROM tiles WHERE tile_row = ? AND tile_col = ?', key).fetchone()
+
+    def tile_count(self):
+        return self._connection().execute('SELECT COUNT(*) FROM tiles').fetchone()[0]
+
+    def metadata(self):
+        return dict(self._connection().execute('SELECT name, value FROM metadata'))
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def open_archive(tiles_dir, region_name):
+    """Get a reader for a region's archive, or None if it has none.
+
+    Readers are reused until the archive file is replaced or rewritten.
+    """
+    path = archive_path(tiles_dir, region_name)
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    key = (stat.st_ino, stat.st_mtime_ns)
+
+    with _archives_lock:
+        cached = _archives.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        archive = TileArchive(path)
+        _archives[path] = (key, archive)
+        return archive
+
+
+def _read_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, data):
+    temp_file = Path(path).with_name(Path(path).name + '.tmp')
+    with open(temp_file, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(temp_file, path)
@@ -8,13 +8,20 @@ import math
 import requests
 import sqlite3
 from pathlib import Path
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from xml.etree.ElementTree import Element
 from datetime import datetime
+import io
+import hashlib
 import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 try:
     import osmium
+    import numpy as np
+    import shapely
     from shapely.geometry import Point, LineString, Polygon
     from shapely.ops import transform
     import pyproj
@@ -24,7 +31,70 @@ except ImportError as e:
     sys.exit(1)
 
 from .osm_processor import OSMHandler
+from .feature_store import FeatureStore
+from .extract import extract_regions, DEFAULT_BUFFER
+from .journal import GenerationJournal, source_version, tile_content_hash
+from .node_index import (choose_node_index, open_node_cache, finish_node_cache, discard_node_cache,
+                         remove_node_cache, estimate_node_cache_bytes, MAX_NODE_ID)
+from .incremental import read_change_file, apply_change_file, diff_osm_files, expand_change_parents
+from .svg_writer import SVGWriter, DigestStream
 from .feature_styles import FEATURE_STYLES
+from .events import event_bus
+from .archive import export_region, archive_path
+from .catalog import get_tile_catalog
+from .tile_hashes import HASHES_FILE, hash_entry, tile_hash
+
+# Tolerance, in tile units, for float error when binning features on tile edges
+GRID_EPSILON = 1e-7
+
+# Region to province mapping; other regions default to Ontario
+REGION_PROVINCES = {
+    'toronto-downtown': 'ontario',
+    'vancouver-downtown': 'british-columbia',
+    'calgary-downtown': 'alberta',
+    'ottawa-downtown': 'ontario',
+    'montreal-downtown': 'quebec'
+}
+
+
+# Seconds after which a temporary tile or hash file is left over from a dead run
+STALE_TEMP_AGE = 3600
+
+# Serializes tile_hashes.json updates of jobs and on-demand renders
+_tile_hashes_lock = threading.Lock()
+
+# Tile builder used by each render worker process
+_worker_builder = None
+
+
+class GenerationCancelled(Exception):
+    """Raised between tiles when the caller's cancel_check reports a cancel."""
+
+
+def _init_render_worker(config, base_dir, tiles_dir, data_dir):
+    """Create the render worker's TileBuilder once per process."""
+    global _worker_builder
+    _worker_builder = TileBuilder(config)
+    _worker_builder.base_dir = Path(base_dir)
+    _worker_builder.tiles_dir = Path(tiles_dir)
+    _worker_builder.data_dir = Path(data_dir)
+
+
+def _render_tile_batch(region_name, batch):
+    """Render a batch of (tile_lat, tile_lng, features, previous_hash) in a worker process.
+    
+    Returns (tile_lat, tile_lng, render, error) per tile, render being the
+    render_tile result, so a failing tile does not discard the rest of the batch.
+    """
+    results = []
+    for tile_lat, tile_lng, features, previous_hash in batch:
+        try:
+            render = _worker_builder.render_tile(tile_lat, tile_lng, region_name, features, previous_hash)
+            results.append((tile_lat, tile_lng, render, None))
+        except Exception as e:
+            results.append((tile_lat, tile_lng, None, str(e)))
+    return results
+
 
 class TileBuilder:
     """Main tile generation class - Flask compatible version."""
@@ -43,11 +113,50 @@ class TileBuilder:
         self.data_dir.mkdir(exist_ok=True)
         (self.data_dir / 'osm_cache').mkdir(exist_ok=True)
         (self.data_dir / 'logs').mkdir(exist_ok=True)
+        (self.data_dir / 'feature_store').mkdir(exist_ok=True)
+        (self.data_dir / 'node_index').mkdir(exist_ok=True)
+        (self.data_dir / 'journal').mkdir(exist_ok=True)
         
         # Tile configuration
         self.tile_size = 0.01  # degrees per tile
         self.svg_size = 1000   # SVG viewport size
         
+        # Clip lines and polygons to the tile plus a margin (in SVG units) wider
+        # than half the widest stroke, so clipped edges stay outside the viewBox
+        self.clip_geometries = self.config.get('clip_geometries', True)
+        self.clip_margin = self.config.get('clip_margin', 20)
+        
+        # Indent tile SVG for debugging (larger files)
+        self.pretty_svg = self.config.get('pretty_svg', False)
+        
+        # Skip elements without render-relevant tag keys before they reach
+        # Python; tracking node references also shrinks the location index
+        self.prefilter = self.config.get('prefilter', True)
+        self.track_node_references = self.config.get('track_node_references', False)
+        
+        # Node location index: 'auto' picks flex_mem or a sparse file array
+        # in data/node_index from the PBF size and available memory
+        self.node_index = self.config.get('node_index') or 'auto'
+        self.node_index_memory_fraction = self.config.get('node_index_memory_fraction', 0.5)
+        
+        # Keep node locations of each PBF version in data/node_index so every
+        # region of a province reuses them; replaces node_index when on
+        self.node_cache = self.config.get('node_cache', True)
+        
+        # The cache is only built with room on disk for every node ID up to this
+        self.node_cache_max_node_id = self.config.get('node_cache_max_node_id', MAX_NODE_ID)
+        
+        # Regional extracts: degrees of buffer around each region, and seconds
+        # before an extract is abandoned (None waits for large provinces)
+        self.extract_buffer = self.config.get('extract_buffer', DEFAULT_BUFFER)
+        self.extract_timeout = self.config.get('extract_timeout')
+        
+        # Render worker processes (1 renders in this process)
+        self.workers = max(1, int(self.config.get('workers') or 1))
+        
+        # Pack each completed region into tiles/archives/<region>.sqlite
+        self.tile_archive = self.config.get('tile_archive', False)
+        
         # Feature styles
         self.feature_types = FEATURE_STYLES
         
@@ -61,19 +170,23 @@ class TileBuilder:
             'start_time': None,
             'estimated_completion': None
         }
+        self.progress_callback = None
+        
+        # Journal of the region run in progress (see generate_tiles_for_region)
+        self.journal = None
+        
+        # Callable returning True once the caller wants generation to stop
+        self.cancel_check = None
         
         # Region to province mapping
-        self.region_to_province = {
-            'toronto-downtown': 'ontario',
-            'vancouver-downtown': 'british-columbia', 
-            'calgary-downtown': 'alberta',
-            'ottawa-downtown': 'ontario',
-            'montreal-downtown': 'quebec'
-        }
+        self.region_to_province = dict(REGION_PROVINCES)
         
     def generate_tiles_for_region(self, region_name, bounds, options=None):
         """Generate tiles for a specific region - Flask callable."""
         options = options or {}
+        self.progress_callback = options.get('progress_callback')
+        self.cancel_check = options.get('cancel_check')
+        workers = max(1, int(options.get('workers') or self.workers))
         
         print(f"Starting tile generation for region: {region_name}")
         
@@ -93,72 +206,174 @@ class TileBuilder:
             region_dir = self.tiles_dir / 'regions' / region_name
             region_dir.mkdir(parents=True, exist_ok=True)
             
+            # Temporary files left by a run that died mid-write; recent ones
+            # may belong to a render still in progress
+            for partial in region_dir.glob('*.tmp'):
+                try:
+                    if time.time() - partial.stat().st_mtime > STALE_TEMP_AGE:
+                        partial.unlink()
+                except OSError:
+                    pass
+            
             # Calculate tile grid
             tiles_to_generate = self.calculate_tile_grid(bounds)
+            
+            # Incremental updates re-render only the given tiles of the grid
+            only_tiles = options.get('tiles')
+            if only_tiles is not None:
+                selected = {self.tile_key(tile_lat, tile_lng) for tile_lat, tile_lng in only_tiles}
+                tiles_to_generate = [tile for tile in tiles_to_generate if self.tile_key(*tile) in selected]
+                if not tiles_to_generate:
+                    print(f"No tiles to update in {region_name}")
+                    self.current_progress['status'] = 'completed'
+                    self.report_progress()
+                    return {
+                        'status': 'completed',
+                        'region': region_name,
+                        'successful_tiles': 0,
+                        'failed_tiles': 0,
+                        'changed_tiles': 0,
+                        'unchanged_tiles': 0,
+                        'changed_files': [],
+                        'total_tiles': 0
+                    }
+            
             self.current_progress['total_tiles'] = len(tiles_to_generate)
             self.current_progress['status'] = 'downloading_data'
+            self.report_progress()
             
-            print(f"Will generate {len(tiles_to_generate)} tiles")
-            estimated_minutes = len(tiles_to_generate) * 4  # Estimate 4 minutes per tile
-            print(f"⏱️  Estimated completion time: {estimated_minutes} minutes ({estimated_minutes/60:.1f} hours)")
-            print(f"💡 Each tile processes the full OSM file - this is why it's slow")
+            ingest_mode = options.get('ingest', 'region')
+            use_feature_store = (ingest_mode != 'per_tile' and
+                                 options.get('feature_store', self.config.get('feature_store', True)))
             
-            # Get cached OSM data for region (with optional pre-filtering)
+            print(f"Will generate {len(tiles_to_generate)} tiles")
+            if ingest_mode == 'per_tile':
+                estimated_minutes = len(tiles_to_generate) * 4  # Estimate 4 minutes per tile
+                print(f"⏱️  Estimated completion time: {estimated_minutes} minutes ({estimated_minutes/60:.1f} hours)")
+                print(f"💡 Each tile processes the full OSM file - this is why it's slow")
+            
+            # Get cached OSM data for region (with optional pre-filtering).
+            # The feature store covers the whole province, so it reads the
+            # province file directly instead of a regional extract.
+            stage_start = time.monotonic()
             try:
-                osm_file = self.get_region_osm_file(region_name, bounds)
+                if use_feature_store:
+                    osm_file = self.get_province_osm_file(region_name)
+                else:
+                    osm_file = self.get_region_osm_file(region_name, bounds)
             except FileNotFoundError as e:
                 print(f"Error: {e}")
                 raise Exception(f"OSM data not cached for region {region_name}. Please update OSM data first.")
+            self.publish_stage('osm_file', stage_start)
             
             self.current_progress['status'] = 'processing'
-            
-            # Generate each tile
-            successful_tiles = 0
-            failed_tiles = 0
-            
-            for i, tile_coords in enumerate(tiles_to_generate):
-                try:
-                    tile_lat, tile_lng = tile_coords
-                    
-                    # Update progress
-                    self.current_progress['current_tile'] = f"{tile_lat:.3f}_{tile_lng:.3f}"
-                    self.current_progress['completed_tiles'] = i
-                    
-                    # Generate the tile
-                    tile_file = self.generate_single_tile(tile_lat, tile_lng, region_name, osm_file)
-                    
-                    if tile_file:
-                        successful_tiles += 1
-                        # Store tile metadata in database
-                        self.store_tile_metadata(tile_lat, tile_lng, region_name, tile_file)
-                    else:
-                        failed_tiles += 1
-                        
-                except Exception as e:
-                    print(f"Error generating tile {tile_coords}: {e}")
-                    failed_tiles += 1
-                    continue
-            
-            # Update region metadata
-            self.update_region_metadata(region_name, bounds, successful_tiles)
+            self.report_progress()
+            
+            # Tiles whose SVG hash matches the last render are not rewritten
+            self.reset_render_results(region_name)
+            
+            # Every finished tile is journaled against the source version, so
+            # a resumed run can skip what an interrupted one completed
+            version = source_version(osm_file)
+            resumed_tiles = {}
+            if options.get('resume'):
+                resumed_tiles = self.get_resumable_tiles(region_name, version, tiles_to_generate)
+                tiles_to_generate = [tile for tile in tiles_to_generate
+                                     if f"{tile[0]:.3f}_{tile[1]:.3f}.svg.gz" not in resumed_tiles]
+                region_dir = self.tiles_dir / 'regions' / region_name
+                self.tile_hashes.update({tile_name: hash_entry(sha256, (region_dir / tile_name).stat())
+                                         for tile_name, sha256 in resumed_tiles.items()})
+                print(f"  Resuming: {len(resumed_tiles)} tiles already done, {len(tiles_to_generate)} to render")
+                self.current_progress['resumed_tiles'] = len(resumed_tiles)
+            
+            self.journal = GenerationJournal(self.data_dir / 'journal', region_name)
+            self.journal.start(version, len(tiles_to_generate) + len(resumed_tiles),
+                               {'ingest': ingest_mode, 'tiles': only_tiles is not None})
+            for tile_name, sha256 in resumed_tiles.items():
+                self.journal.record_tile(tile_name, sha256, resumed=True)
+            
+            if not tiles_to_generate:
+                successful_tiles, failed_tiles = 0, 0
+            elif ingest_mode == 'per_tile':
+                stage_start = time.monotonic()
+                successful_tiles, failed_tiles = self._generate_tiles_per_tile(
+                    tiles_to_generate, region_name, osm_file)
+                self.publish_stage('render', stage_start, tiles=len(tiles_to_generate))
+            else:
+                successful_tiles, failed_tiles = self._generate_tiles_single_pass(
+                    tiles_to_generate, region_name, osm_file, use_feature_store, workers)
+            
+            self.save_tile_hashes(region_name, self.tile_hashes)
+            self.journal.finish('completed', successful_tiles=successful_tiles, failed_tiles=failed_tiles,
+                                resumed_tiles=len(resumed_tiles))
+            self.journal = None
+            
+            # Update region metadata; a partial update keeps the other tiles
+            if only_tiles is not None:
+                region = get_tile_catalog(self.tiles_dir).region(region_name)
+                tile_count = region['tile_count'] if region else 0
+            else:
+                tile_count = successful_tiles + len(resumed_tiles)
+            self.update_region_metadata(region_name, bounds, tile_count)
             
             self.current_progress['status'] = 'completed'
             self.current_progress['completed_tiles'] = successful_tiles
+            self.current_progress['current_tile'] = None
+            self.report_progress()
             
             result = {
                 'status': 'completed',
                 'region': region_name,
                 'successful_tiles': successful_tiles,
                 'failed_tiles': failed_tiles,
-                'total_tiles': len(tiles_to_generate)
+                'changed_tiles': self._render_counts['changed'],
+                'unchanged_tiles': self._render_counts['unchanged'],
+                'changed_files': self.changed_tiles,
+                'resumed_tiles': len(resumed_tiles),
+                'total_tiles': len(tiles_to_generate) + len(resumed_tiles)
             }
             
-            print(f"✅ Region generation complete: {successful_tiles} successful, {failed_tiles} failed")
+            if self.tile_archive:
+                self.export_region_archive(region_name)
+            
+            self.publish_event('region_finished', **{k: v for k, v in result.items() if k != 'changed_files'})
+            print(f"✅ Region generation complete: {successful_tiles} successful, {failed_tiles} failed "
+                  f"({self._render_counts['changed']} changed, {self._render_counts['unchanged']} unchanged)")
             return result
             
+        except GenerationCancelled:
+            # Tiles finished so far stay; a resumed run continues from them
+            self.save_tile_hashes(region_name, self.tile_hashes)
+            get_tile_catalog(self.tiles_dir).save(force=True)
+            if self.journal:
+                self.journal.finish('cancelled', successful_tiles=self._render_counts['successful'],
+                                    failed_tiles=self._render_counts['failed'])
+                self.journal = None
+            self.current_progress['status'] = 'cancelled'
+            self.current_progress['current_tile'] = None
+            self.report_progress()
+            self.publish_event('region_finished', status='cancelled',
+                               successful_tiles=self._render_counts['successful'],
+                               failed_tiles=self._render_counts['failed'])
+            print(f"⏹️  Region generation cancelled after {self._render_counts['completed']} tiles")
+            return {
+                'status': 'cancelled',
+                'region': region_name,
+                'successful_tiles': self._render_counts['successful'],
+                'failed_tiles': self._render_counts['failed'],
+                'changed_tiles': self._render_counts['changed'],
+                'unchanged_tiles': self._render_counts['unchanged'],
+                'changed_files': self.changed_tiles
+            }
+            
         except Exception as e:
+            if self.journal:
+                self.journal.finish('error', error=str(e))
+                self.journal = None
             self.current_progress['status'] = 'error'
             self.current_progress['error'] = str(e)
+            self.report_progress()
+            self.publish_event('error', error=str(e))
             print(f"❌ Region generation failed: {e}")
             return {
                 'status': 'error',
@@ -166,6 +381,603 @@ class TileBuilder:
                 'region': region_name
             }
     
+    def get_resumable_tiles(self, region_name, version, tiles):
+        """Get {tile name: SVG hash} of tiles the region's last full-grid run finished against this source.
+        
+        A tile only counts if its file still holds the journaled SVG; tiles
+        that are missing, truncated or different are rendered again.
+        """
+        finished = GenerationJournal(self.data_dir / 'journal', region_name).finished_tiles(version)
+        region_dir = self.tiles_dir / 'regions' / region_name
+        
+        resumable = {}
+        for tile_lat, tile_lng in tiles:
+            tile_name = f"{tile_lat:.3f}_{tile_lng:.3f}.svg.gz"
+            sha256 = finished.get(tile_name)
+            if sha256 and tile_content_hash(region_dir / tile_name) == sha256:
+                resumable[tile_name] = sha256
+        return resumable
+    
+    def get_interrupted_run(self, region_name):
+        """Get the start record of the region's last full-grid run if it never finished, else None."""
+        run = GenerationJournal(self.data_dir / 'journal', region_name).interrupted_run()
+        if not run:
+            return None
+        return {**run['start'], 'finished_tiles': len(run['tiles'])}
+    
+    def check_cancelled(self):
+        """Raise GenerationCancelled if the caller asked generation to stop."""
+        if self.cancel_check and self.cancel_check():
+            raise GenerationCancelled()
+    
+    def _generate_tiles_per_tile(self, tiles_to_generate, region_name, osm_file):
+        """Generate tiles by re-reading the OSM file once per tile."""
+        for i, tile_coords in enumerate(tiles_to_generate):
+            self.check_cancelled()
+            try:
+                tile_lat, tile_lng = tile_coords
+                
+                # Update progress
+                self.current_progress['current_tile'] = f"{tile_lat:.3f}_{tile_lng:.3f}"
+                self.current_progress['completed_tiles'] = i
+                self.report_progress()
+                self.publish_event('tile_started', tile=self.current_progress['current_tile'])
+                
+                # Generate the tile
+                render = self.generate_single_tile(tile_lat, tile_lng, region_name, osm_file,
+                                                   self.previous_tile_hash(region_name, tile_lat, tile_lng))
+                self._record_render_results(region_name, [(tile_lat, tile_lng, render, None)])
+                    
+            except Exception as e:
+                self._record_render_results(region_name, [(tile_coords[0], tile_coords[1], None, str(e))])
+                continue
+        
+        return self._render_counts['successful'], self._render_counts['failed']
+    
+    def _generate_tiles_single_pass(self, tiles_to_generate, region_name, osm_file,
+                                    use_feature_store=False, workers=1):
+        """Generate tiles from one pass over the OSM file, binning features per tile."""
+        grid_bounds = self.get_grid_bounds(tiles_to_generate)
+        
+        stage_start = time.monotonic()
+        if use_feature_store:
+            region_features = self.load_features_from_store(region_name, osm_file, grid_bounds)
+        else:
+            # Read the OSM file once for the whole tile grid
+            print(f"  Processing OSM data once for {len(tiles_to_generate)} tiles")
+            self.current_progress['status'] = 'processing_osm'
+            self.current_progress['current_tile'] = 'all tiles (processing OSM data)'
+            self.report_progress()
+            
+            handler = OSMHandler(grid_bounds)
+            self.apply_osm_handler(handler, osm_file)
+            region_features = handler.features
+        
+        feature_count = sum(len(feature_list) for feature_list in region_features.values())
+        print(f"  OSM processing complete: {feature_count} features for region {region_name}")
+        self.publish_stage('feature_store' if use_feature_store else 'process_osm', stage_start,
+                           features=feature_count)
+        self.check_cancelled()
+        
+        # Assign every feature to each tile its bounding box touches
+        stage_start = time.monotonic()
+        tile_features = self.bin_features_by_tile(region_features, tiles_to_generate)
+        self.publish_stage('bin_features', stage_start)
+        
+        self.current_progress['status'] = 'processing'
+        self.current_progress['completed_tiles'] = 0
+        self.report_progress()
+        
+        stage_start = time.monotonic()
+        if workers > 1 and len(tiles_to_generate) > 1:
+            tile_jobs = [(tile_lat, tile_lng, tile_features[self.tile_key(tile_lat, tile_lng)],
+                          self.previous_tile_hash(region_name, tile_lat, tile_lng))
+                         for tile_lat, tile_lng in tiles_to_generate]
+            counts = self.render_tiles_parallel(tile_jobs, region_name, workers)
+            self.publish_stage('render', stage_start, tiles=len(tiles_to_generate), workers=workers)
+            return counts
+        
+        for i, (tile_lat, tile_lng) in enumerate(tiles_to_generate):
+            self.check_cancelled()
+            try:
+                self.current_progress['current_tile'] = f"{tile_lat:.3f}_{tile_lng:.3f}"
+                self.current_progress['completed_tiles'] = i
+                self.report_progress()
+                self.publish_event('tile_started', tile=self.current_progress['current_tile'])
+                
+                features = tile_features[self.tile_key(tile_lat, tile_lng)]
+                render = self.render_tile(tile_lat, tile_lng, region_name, features,
+                                          self.previous_tile_hash(region_name, tile_lat, tile_lng))
+                self._record_render_results(region_name, [(tile_lat, tile_lng, render, None)])
+                    
+            except Exception as e:
+                self._record_render_results(region_name, [(tile_lat, tile_lng, None, str(e))])
+                continue
+        
+        self.publish_stage('render', stage_start, tiles=len(tiles_to_generate), workers=1)
+        return self._render_counts['successful'], self._render_counts['failed']
+    
+    def render_tiles_parallel(self, tile_jobs, region_name, workers):
+        """Render (tile_lat, tile_lng, features, previous_hash) jobs in batches across a process pool.
+        
+        A tile that raises is counted as failed by its worker. A tile that kills
+        its worker process breaks the pool and every unfinished batch with it;
+        those tiles are re-queued one per job in a fresh pool. If a round makes
+        no progress the remaining tiles run one at a time until the tile that
+        crashes the worker is found and counted as failed.
+        """
+        print(f"  Rendering {len(tile_jobs)} tiles with {workers} worker processes")
+        
+        # Several batches per worker keeps the pool busy while limiting IPC overhead
+        batch_size = max(1, min(25, math.ceil(len(tile_jobs) / (workers * 4))))
+        pending = [tile_jobs[i:i + batch_size] for i in range(0, len(tile_jobs), batch_size)]
+        isolate = False
+        
+        while pending:
+            if isolate:
+                # Submit one tile at a time so a crash identifies its tile
+                batch = pending.pop(0)
+                broken = self._run_render_round([batch], region_name, 1)
+                if broken:
+                    tile_lat, tile_lng = batch[0][:2]
+                    self._record_render_results(
+                        region_name, [(tile_lat, tile_lng, None, 'render worker process died')])
+                    isolate = False
+                continue
+            
+            completed_before = self._render_counts['completed']
+            broken = self._run_render_round(pending, region_name, workers)
+            pending = [[job] for batch in broken for job in batch]
+            
+            if pending:
+                print(f"  ⚠️  Render worker crashed, retrying {len(pending)} tiles")
+                isolate = self._render_counts['completed'] == completed_before
+        
+        return self._render_counts['successful'], self._render_counts['failed']
+    
+    def _run_render_round(self, batches, region_name, workers):
+        """Render batches in a new process pool; return the batches lost to a worker crash."""
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_render_worker,
+            initargs=(self.config, str(self.base_dir), str(self.tiles_dir), str(self.data_dir))
+        )
+        broken = []
+        try:
+            futures = {executor.submit(_render_tile_batch, region_name, batch): batch for batch in batches}
+            
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    broken.append(batch)
+                    continue
+                except Exception as e:
+                    results = [(job[0], job[1], None, str(e)) for job in batch]
+                
+                self._record_render_results(region_name, results)
+                self.check_cancelled()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        return broken
+    
+    def reset_render_results(self, region_name):
+        """Reset render counts and load the region's tile hashes before rendering."""
+        self._render_counts = {'successful': 0, 'failed': 0, 'completed': 0, 'changed': 0, 'unchanged': 0}
+        self.tile_hashes = self.load_tile_hashes(region_name)
+        self.changed_tiles = []
+    
+    def previous_tile_hash(self, region_name, tile_lat, tile_lng):
+        """Get the SVG hash recorded for a tile by the last render, if the tile still matches it."""
+        tile_file = self.tiles_dir / 'regions' / region_name / f"{tile_lat:.3f}_{tile_lng:.3f}.svg.gz"
+        return tile_hash(self.tile_hashes, tile_file)
+    
+    def _record_render_results(self, region_name, results):
+        """Count render results, record tile hashes, store tile metadata and report progress."""
+        for tile_lat, tile_lng, render, error in results:
+            if render:
+                tile_file = Path(render['path'])
+                self._render_counts['successful'] += 1
+                self.tile_hashes[tile_file.name] = render['hash_entry']
+                if self.journal:
+                    self.journal.record_tile(tile_file.name, render['sha256'])
+                if render['changed']:
+                    self._render_counts['changed'] += 1
+                    self.changed_tiles.append(tile_file.name)
+                else:
+                    self._render_counts['unchanged'] += 1
+                self.store_tile_metadata(tile_lat, tile_lng, region_name, tile_file)
+            else:
+                self._render_counts['failed'] += 1
+                if error:
+                    print(f"Error generating tile {(tile_lat, tile_lng)}: {error}")
+            self.current_progress['current_tile'] = f"{tile_lat:.3f}_{tile_lng:.3f}"
+            self.publish_event('tile_finished', tile=f"{tile_lat:.3f}_{tile_lng:.3f}",
+                               status='rendered' if render else 'failed',
+                               changed=bool(render and render['changed']), error=error)
+        
+        self._render_counts['completed'] += len(results)
+        self.current_progress['completed_tiles'] = self._render_counts['completed']
+        self.report_progress()
+    
+    def report_progress(self):
+        """Pass a snapshot of current_progress to the progress callback and the event bus."""
+        self.current_progress['estimated_completion'] = self.estimate_completion()
+        if self.progress_callback:
+            try:
+                self.progress_callback(dict(self.current_progress))
+            except Exception as e:
+                print(f"Progress callback failed: {e}")
+        self.publish_event('progress', **self.current_progress)
+    
+    def estimate_completion(self):
+        """Estimate the time left from the tiles rendered so far, e.g. '4m'."""
+        progress = self.current_progress
+        completed = progress.get('completed_tiles') or 0
+        remaining = (progress.get('total_tiles') or 0) - completed
+        if progress.get('status') not in ('processing', 'rendering_tile') or not progress.get('start_time'):
+            return None
+        if completed <= 0:
+            return 'Calculating...'
+        
+        elapsed = (datetime.now() - progress['start_time']).total_seconds()
+        eta_seconds = max(0, remaining) * elapsed / completed
+        if eta_seconds < 60:
+            return f"{int(eta_seconds)}s"
+        if eta_seconds < 3600:
+            return f"{int(eta_seconds / 60)}m"
+        return f"{int(eta_seconds / 3600)}h {int((eta_seconds % 3600) / 60)}m"
+    
+    def publish_stage(self, stage, started, **data):
+        """Publish how long a generation stage took since the time.monotonic() value started."""
+        self.publish_event('stage', stage=stage, seconds=round(time.monotonic() - started, 3), **data)
+    
+    def publish_event(self, event_type, **data):
+        """Publish a generation event for the current region on the event bus."""
+        data.setdefault('region', self.current_progress.get('region'))
+        try:
+            event_bus.publish(event_type, data)
+        except Exception as e:
+            print(f"Event publish failed: {e}")
+    
+    def get_feature_store(self, province):
+        """Get the persistent feature store for a province."""
+        return FeatureStore(self.data_dir / 'feature_store' / f"{province}.sqlite")
+    
+    def open_feature_store(self, province, osm_file, store=None):
+        """Get a province feature store that is up to date with osm_file, building it if stale."""
+        store = store or self.get_feature_store(province)
+        
+        if store.is_fresh(osm_file):
+            print(f"  Using {province} feature store (up to date with {osm_file.name})")
+        else:
+            print(f"  Building {province} feature store from {osm_file} (one-time per OSM update)")
+            self.current_progress['status'] = 'building_feature_store'
+            self.current_progress['current_tile'] = f'all tiles (indexing {province} OSM data)'
+            self.report_progress()
+            metadata = store.build(osm_file, apply_handler=self.apply_osm_handler)
+            print(f"  ✅ Feature store built: {metadata['feature_count']} features")
+        
+        return store
+    
+    def load_features_from_store(self, region_name, osm_file, bounds):
+        """Query region features from the province feature store, rebuilding it if stale."""
+        province = self.region_to_province.get(region_name, 'ontario')
+        store = self.get_feature_store(province)
+        
+        try:
+            self.open_feature_store(province, osm_file, store)
+            
+            self.current_progress['status'] = 'processing_osm'
+            self.current_progress['current_tile'] = 'all tiles (querying feature store)'
+            self.report_progress()
+            return store.query(bounds)
+        finally:
+            store.close()
+    
+    def render_tile_on_demand(self, region_name, tile_lat, tile_lng):
+        """Render one missing tile of a region from its province feature store.
+
+        Only a feature store that is up to date with the cached PBF is used:
+        it answers a tile with one indexed query. Nothing is downloaded,
+        extracted, scanned or indexed here, so without a fresh store the tile
+        is not rendered and is left to the missing tile jobs. Returns the
+        render_tile result ('path' None if rendering failed) with the source
+        used, or None without a fresh store.
+        """
+        province = self.region_to_province.get(region_name, 'ontario')
+        osm_file = self.get_province_osm_file(region_name)
+
+        store = self.get_feature_store(province)
+        try:
+            if not store.status(osm_file)['is_fresh']:
+                return None
+            tile = (tile_lat, tile_lng)
+            features = self.bin_features_by_tile(
+                store.query(self.get_tile_bounds(tile_lat, tile_lng)), [tile])[self.tile_key(*tile)]
+            render = self.render_tile(tile_lat, tile_lng, region_name, features)
+            if render:
+                self.save_tile_hashes(region_name, {Path(render['path']).name: render['hash_entry']})
+                self.store_tile_metadata(tile_lat, tile_lng, region_name, render['path'])
+            return {**(render or {'path': None}), 'source': 'feature_store'}
+        finally:
+            store.close()
+
+    def generate_changed_tiles(self, province, change_file=None, options=None):
+        """Re-render only the tiles touched by OSM changes in a province - Flask callable.
+        
+        With change_file (.osc, .osc.gz) the changes are applied to the cached
+        province PBF; without it the cached PBF is compared with the previous
+        download. Changed elements, plus the ways and multipolygons built from
+        them, are looked up in the feature stores of the old and new data, and
+        every region tile their old or new bounding box touches is re-rendered.
+        Options: regions (limit to these region names), workers, progress_callback.
+        """
+        options = options or {}
+        self.progress_callback = options.get('progress_callback')
+        cancel_check = options.get('cancel_check')
+        osm_file = self.data_dir / 'osm_cache' / f"{province}-latest.osm.pbf"
+        previous_file = self.get_previous_osm_file(province)
+        
+        print(f"Starting incremental tile update for {province}")
+        self.current_progress = {
+            'total_tiles': 0,
+            'completed_tiles': 0,
+            'current_tile': None,
+            'status': 'detecting_changes',
+            'region': province,
+            'start_time': datetime.now(),
+            'estimated_completion': None
+        }
+        self.report_progress()
+        
+        try:
+            if not osm_file.exists():
+                raise FileNotFoundError(f"No cached OSM data found for {province}. Please update OSM data first.")
+            
+            if change_file:
+                print(f"  Reading changes from {change_file}")
+                changes = read_change_file(change_file)
+                
+                # Apply the changes, keeping the old data as the previous version
+                updated_file = osm_file.with_name(f"{province}-updating.osm.pbf")
+                print(f"  Applying changes to {osm_file.name}")
+                apply_change_file(osm_file, change_file, updated_file)
+                os.replace(osm_file, previous_file)
+                os.replace(updated_file, osm_file)
+                mode = 'change_file'
+            else:
+                if not previous_file.exists():
+                    raise FileNotFoundError(
+                        f"No previous {province} OSM data to compare with. "
+                        f"Download an OSM update first or provide a change file.")
+                print(f"  Comparing {previous_file.name} with {osm_file.name}")
+                changes = diff_osm_files(previous_file, osm_file)
+                mode = 'pbf_diff'
+            
+            counts = changes.counts()
+            print(f"  Changed: {counts['nodes']} nodes, {counts['ways']} ways, {counts['relations']} relations")
+            
+            region_results = {}
+            if not changes.is_empty():
+                expand_change_parents(changes, osm_file)
+                feature_ids = changes.feature_ids()
+                
+                # Old geometries show where features were, new ones where they are now
+                extents = self.get_previous_feature_extents(province, previous_file, feature_ids)
+                store = self.open_feature_store(province, osm_file)
+                try:
+                    extents.extend(store.feature_extents(feature_ids))
+                finally:
+                    store.close()
+                print(f"  {len(extents)} changed feature geometries")
+                
+                for region in self.get_available_regions():
+                    region_name = region.get('name')
+                    bounds = region.get('bounds')
+                    if (not bounds or self.region_to_province.get(region_name, 'ontario') != province or
+                            (options.get('regions') and region_name not in options['regions'])):
+                        continue
+                    
+                    tiles = self.tiles_touching_extents(extents, self.calculate_tile_grid(bounds))
+                    print(f"  {region_name}: {len(tiles)} tiles changed")
+                    region_results[region_name] = self.generate_tiles_for_region(region_name, bounds, {
+                        'tiles': tiles,
+                        'workers': options.get('workers'),
+                        'progress_callback': self.progress_callback,
+                        'cancel_check': cancel_check
+                    })
+                    if region_results[region_name]['status'] == 'cancelled':
+                        # The change is consumed; regions not reached need a full update
+                        print(f"⏹️  Incremental update cancelled in {region_name}")
+                        break
+            
+            cancelled = any(r.get('status') == 'cancelled' for r in region_results.values())
+            result = {
+                'status': 'cancelled' if cancelled else 'completed',
+                'province': province,
+                'mode': mode,
+                'changes': counts,
+                'regions': region_results,
+                'updated_tiles': sum(r.get('successful_tiles', 0) for r in region_results.values()),
+                'changed_tiles': sum(r.get('changed_tiles', 0) for r in region_results.values()),
+                'failed_tiles': sum(r.get('failed_tiles', 0) for r in region_results.values())
+            }
+            
+            self.current_progress['status'] = result['status']
+            self.report_progress()
+            print(f"✅ Incremental update complete: {result['updated_tiles']} tiles updated, {result['failed_tiles']} failed")
+            return result
+            
+        except Exception as e:
+            self.current_progress['status'] = 'error'
+            self.current_progress['error'] = str(e)
+            self.report_progress()
+            self.publish_event('error', error=str(e))
+            print(f"❌ Incremental update failed: {e}")
+            return {
+                'status': 'error',
+                'error': str(e),
+                'province': province
+            }
+    
+    def get_previous_feature_extents(self, province, previous_file, feature_ids):
+        """Get feature extents from the previous version of a province's OSM data.
+        
+        The province store normally still holds the previous version when an
+        update is detected; otherwise a temporary store is built from it.
+        """
+        store = self.get_feature_store(province)
+        temporary = False
+        try:
+            if not store.is_fresh(previous_file):
+                store.close()
+                store = FeatureStore(self.data_dir / 'feature_store' / f"{province}-previous.sqlite")
+                temporary = True
+                print(f"  Building temporary feature store from {previous_file.name}")
+                self.current_progress['status'] = 'building_feature_store'
+                self.report_progress()
+                # Read once, so not worth a node location cache
+                store.build(previous_file, apply_handler=lambda handler, source_file:
+                            self.apply_osm_handler(handler, source_file, use_node_cache=False))
+            return store.feature_extents(feature_ids)
+        finally:
+            store.close()
+            if temporary and store.store_path.exists():
+                store.store_path.unlink()
+    
+    def tile_key(self, tile_lat, tile_lng):
+        """Get the integer grid index (row, col) of a tile on the tile_size grid."""
+        return (int(round(tile_lat / self.tile_size)), int(round(tile_lng / self.tile_size)))
+    
+    def get_grid_bounds(self, tiles):
+        """Get the bounding box covering a list of tiles."""
+        lats = [tile_lat for tile_lat, _ in tiles]
+        lngs = [tile_lng for _, tile_lng in tiles]
+        return {
+            'south': min(lats),
+            'north': max(lats) + self.tile_size,
+            'west': min(lngs),
+            'east': max(lngs) + self.tile_size
+        }
+    
+    def bin_features_by_tile(self, features, tiles):
+        """Assign features to every tile whose bounds their bounding box touches.
+        
+        Returns a dict keyed by tile_key() holding a feature dict per tile, with
+        the same feature type order as the input. Tile edges are inclusive, as in
+        OSMHandler.is_in_bounds, so features on a shared edge go to both tiles.
+        """
+        tile_features = {
+            self.tile_key(tile_lat, tile_lng): {feature_type: [] for feature_type in features}
+            for tile_lat, tile_lng in tiles
+        }
+        if not tile_features:
+            return tile_features
+        
+        rows = [row for row, _ in tile_features]
+        cols = [col for _, col in tile_features]
+        min_row, max_row = min(rows), max(rows)
+        min_col, max_col = min(cols), max(cols)
+        
+        for feature_type, feature_list in features.items():
+            for feature in feature_list:
+                row_start, row_end, col_start, col_end = self.tile_key_range(*feature['geometry'].bounds)
+                row_start, row_end = max(row_start, min_row), min(row_end, max_row)
+                col_start, col_end = max(col_start, min_col), min(col_end, max_col)
+                
+                for row in range(row_start, row_end + 1):
+                    for col in range(col_start, col_end + 1):
+                        bucket = tile_features.get((row, col))
+                        if bucket is not None:
+                            bucket[feature_type].append(feature)
+        
+        return tile_features
+    
+    def tile_key_range(self, minx, miny, maxx, maxy):
+        """Get the (row_start, row_end, col_start, col_end) tile keys a bounding box touches.
+        
+        Tiles hold all four edges, so a box on a shared edge touches the tiles
+        on both sides of it.
+        """
+        # Integer grid math; epsilon absorbs float error on tile edges
+        return (math.ceil(miny / self.tile_size - GRID_EPSILON) - 1,
+                math.floor(maxy / self.tile_size + GRID_EPSILON),
+                math.ceil(minx / self.tile_size - GRID_EPSILON) - 1,
+                math.floor(maxx / self.tile_size + GRID_EPSILON))
+    
+    def tiles_touching_extents(self, extents, tiles):
+        """Get the tiles, in grid order, touched by any (minx, miny, maxx, maxy) extent."""
+        if not tiles or not extents:
+            return []
+        
+        keys = [self.tile_key(tile_lat, tile_lng) for tile_lat, tile_lng in tiles]
+        min_row, max_row = min(row for row, _ in keys), max(row for row, _ in keys)
+        min_col, max_col = min(col for _, col in keys), max(col for _, col in keys)
+        
+        touched = set()
+        for extent in extents:
+            row_start, row_end, col_start, col_end = self.tile_key_range(*extent)
+            for row in range(max(row_start, min_row), min(row_end, max_row) + 1):
+                for col in range(max(col_start, min_col), min(col_end, max_col) + 1):
+                    touched.add((row, col))
+        
+        return [tile for tile, key in zip(tiles, keys) if key in touched]
+    
+    def apply_osm_handler(self, handler, osm_file, use_node_cache=True):
+        """Run an OSM handler over a file, reporting sorting problems.
+        
+        OSMHandlers only see elements with a render-relevant tag key unless
+        the prefilter is turned off in the config. Node locations of a
+        province PBF come from its persistent node cache (built on the first
+        run) when it is enabled and the disk has room for it. Other files,
+        such as regional extracts, use the index picked by
+        choose_node_index; those file-backed indexes are removed when the
+        pass finishes.
+        """
+        index_dir = self.data_dir / 'node_index'
+        node_index = None
+        province_file = Path(osm_file).name.endswith('-latest.osm.pbf')
+        if self.node_cache and use_node_cache and province_file:
+            node_index = open_node_cache(osm_file, index_dir, self.node_cache_max_node_id)
+            if node_index is None:
+                print(f"⚠️  Not enough free disk space in {index_dir} to cache {Path(osm_file).name} node locations "
+                      f"(up to {estimate_node_cache_bytes(self.node_cache_max_node_id) / 1024 ** 3:,.0f} GB)")
+        elif self.node_cache and not province_file:
+            # Caches of extracts made before only province files were cached
+            remove_node_cache(osm_file, index_dir)
+        if node_index is None:
+            node_index = choose_node_index(osm_file, index_dir, self.node_index,
+                                           self.node_index_memory_fraction)
+        print(f"🗂️  Node location index: {node_index['type']} - {node_index['reason']}")
+        self.current_progress['node_index'] = f"{node_index['type']} ({node_index['reason']})"
+        self.report_progress()
+        
+        index_file = node_index['file']
+        try:
+            if index_file and index_file.exists():
+                index_file.unlink()
+            if self.prefilter and isinstance(handler, OSMHandler):
+                # A cache being built must receive every node
+                track_references = ((self.track_node_references or node_index['track_references']) and
+                                    not node_index.get('build_file'))
+                handler.apply_filtered(osm_file, idx=node_index['idx'], track_references=track_references,
+                                       cached_locations=node_index.get('warm', False))
+            else:
+                handler.apply_file(str(osm_file), locations=True, idx=node_index['idx'])
+            finish_node_cache(node_index, osm_file, index_dir)
+        except Exception as osm_error:
+            discard_node_cache(node_index)
+            if "out of order" in str(osm_error):
+                print(f"OSM data sorting issue in {osm_file}: {osm_error}")
+                print("This may be due to unsorted Overpass API data. Consider clearing cache.")
+            raise osm_error
+        finally:
+            if index_file and index_file.exists():
+                index_file.unlink()
+    
     def calculate_tile_grid(self, bounds):
         """Calculate which tiles need to be generated for given bounds."""
         tiles = []
@@ -187,26 +999,35 @@ class TileBuilder:
         
         return tiles
     
-    def get_region_osm_file(self, region_name, bounds=None):
-        """Get the OSM file for a region, with optional pre-filtering for efficiency."""
+    def get_province_osm_file(self, region_name):
+        """Get the cached province OSM file that covers a region."""
         province = self.region_to_province.get(region_name, 'ontario')  # Default to Ontario
         cache_file = self.data_dir / 'osm_cache' / f"{province}-latest.osm.pbf"
         
         if not cache_file.exists():
             raise FileNotFoundError(f"No cached OSM data found for {province}. Please update OSM data first.")
         
+        return cache_file
+    
+    def get_previous_osm_file(self, province):
+        """Get the path of the province OSM file replaced by the last download."""
+        return self.data_dir / 'osm_cache' / f"{province}-previous.osm.pbf"
+    
+    def get_region_osm_file(self, region_name, bounds=None):
+        """Get the OSM file for a region, with optional pre-filtering for efficiency."""
+        province = self.region_to_province.get(region_name, 'ontario')  # Default to Ontario
+        cache_file = self.get_province_osm_file(region_name)
+        
         # Check if we have a pre-filtered regional file
         if bounds:
-            regional_cache_file = self.data_dir / 'osm_cache' / f"{region_name}-filtered.osm.pbf"
+            regional_cache_file = self.get_regional_osm_file(region_name)
             
             # Create regional filter if it doesn't exist or is older than main cache
-            if (not regional_cache_file.exists() or 
-                regional_cache_file.stat().st_mtime < cache_file.stat().st_mtime):
-                
+            if self.regional_extract_is_stale(region_name, cache_file):
                 print(f"Creating filtered OSM data for {region_name} to improve performance...")
-                success = self.create_regional_filter(cache_file, regional_cache_file, bounds)
+                extracted = self.extract_province_regions(province, {region_name: bounds})
                 
-                if success:
+                if region_name in extracted:
                     print(f"Using filtered {region_name} OSM data: {regional_cache_file}")
                     return regional_cache_file
                 else:
@@ -219,6 +1040,58 @@ class TileBuilder:
             print(f"Using cached {province} OSM data: {cache_file}")
             return cache_file
     
+    def get_regional_osm_file(self, region_name):
+        """Get the path of a region's extract of its province file."""
+        return self.data_dir / 'osm_cache' / f"{region_name}-filtered.osm.pbf"
+    
+    def regional_extract_is_stale(self, region_name, province_file):
+        """Check whether a region's extract is missing or older than the province file."""
+        regional_file = self.get_regional_osm_file(region_name)
+        return (not regional_file.exists() or
+                regional_file.stat().st_mtime < Path(province_file).stat().st_mtime)
+    
+    def extract_province_regions(self, province, regions=None):
+        """Extract every region of a province that needs it in one pass over the province file.
+        
+        regions maps region name to bounds and is always extracted; other
+        regions of the province with tiles (bounds from their metadata) are
+        added when their extract is missing or stale. Returns the names of
+        the regions extracted, empty if the extract failed.
+        """
+        cache_file = self.data_dir / 'osm_cache' / f"{province}-latest.osm.pbf"
+        regions = dict(regions or {})
+        
+        for metadata in self.get_available_regions():
+            name = metadata.get('name')
+            if (name and name not in regions and metadata.get('bounds') and
+                    self.region_to_province.get(name, 'ontario') == province and
+                    self.regional_extract_is_stale(name, cache_file)):
+                regions[name] = metadata['bounds']
+        
+        if not regions:
+            return []
+        
+        print(f"  Extracting {len(regions)} regions from {cache_file.name}: {', '.join(sorted(regions))}")
+        start = datetime.now()
+        try:
+            method = extract_regions(
+                cache_file,
+                {name: (bounds, self.get_regional_osm_file(name)) for name, bounds in regions.items()},
+                buffer=self.extract_buffer,
+                timeout=self.extract_timeout
+            )
+        except Exception as e:
+            print(f"  ❌ Error creating regional extracts: {e}")
+            return []
+        
+        elapsed = (datetime.now() - start).total_seconds()
+        source_mb = cache_file.stat().st_size / (1024 * 1024)
+        for name in sorted(regions):
+            size_mb = self.get_regional_osm_file(name).stat().st_size / (1024 * 1024)
+            print(f"  ✅ {name}: {size_mb:.1f}MB (was {source_mb:.0f}MB)")
+        print(f"  Extracted with {method} in {elapsed:.1f}s")
+        return list(regions)
+    
     def download_region_data(self, region_name, bounds=None, force_update=False):
         """Download OSM data for the region using Geofabrik extracts."""
         # Map regions to their province/territory for Geofabrik downloads
@@ -256,7 +1129,10 @@ class TileBuilder:
             
             print(f"Downloading {total_size / (1024*1024):.1f}MB...")
             
-            with open(cache_file, 'wb') as f:
+            # Download beside the cache; the replaced file is kept as the
+            # previous version for incremental tile updates
+            download_file = cache_file.with_name(f"{province}-download.osm.pbf")
+            with open(download_file, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     if chunk:
                         f.write(chunk)
@@ -265,61 +1141,92 @@ class TileBuilder:
                             percent = (downloaded / total_size) * 100
                             print(f"\rProgress: {percent:.1f}% ({downloaded / (1024*1024):.1f}MB)", end='')
             
+            if cache_file.exists():
+                os.replace(cache_file, self.get_previous_osm_file(province))
+            os.replace(download_file, cache_file)
+            
             print(f"\n✅ Downloaded and cached {province} OSM data: {cache_file}")
             return cache_file
             
         except Exception as e:
             print(f"Failed to download OSM data: {e}")
+            if 'download_file' in locals() and download_file.exists():
+                download_file.unlink()
             # Try to use existing cache even if old
             if cache_file.exists():
                 print(f"Using old cached data: {cache_file}")
                 return cache_file
             raise
     
-    def generate_single_tile(self, tile_lat, tile_lng, region_name, osm_file):
-        """Generate a single SVG tile."""
+    def generate_single_tile(self, tile_lat, tile_lng, region_name, osm_file, previous_hash=None):
+        """Generate a single SVG tile; returns the render_tile result or None."""
         try:
             # Get tile bounds
             bounds = self.get_tile_bounds(tile_lat, tile_lng)
             
             # Process OSM data for this tile
             handler = OSMHandler(bounds)
-            try:
-                print(f"  Processing OSM data for tile {tile_lat:.3f}, {tile_lng:.3f} (this may take several minutes for large files)")
-                
-                # Update progress to show OSM processing status
-                self.current_progress['status'] = 'processing_osm'
-                self.current_progress['current_tile'] = f"{tile_lat:.3f}_{tile_lng:.3f} (processing OSM data)"
-                
-                handler.apply_file(str(osm_file), locations=True)
-                
-                # Update progress to show tile rendering status
-                self.current_progress['status'] = 'rendering_tile'
-                self.current_progress['current_tile'] = f"{tile_lat:.3f}_{tile_lng:.3f} (rendering SVG)"
-                
-                print(f"  OSM processing complete for tile {tile_lat:.3f}, {tile_lng:.3f}")
-            except Exception as osm_error:
-                if "out of order" in str(osm_error):
-                    print(f"OSM data sorting issue for tile {tile_lat:.3f}, {tile_lng:.3f}: {osm_error}")
-                    print("This may be due to unsorted Overpass API data. Consider clearing cache.")
-                raise osm_error
+            print(f"  Processing OSM data for tile {tile_lat:.3f}, {tile_lng:.3f} (this may take several minutes for large files)")
             
-            # Create SVG content
-            svg_content = self.create_tile_svg(tile_lat, tile_lng, handler.features, bounds)
+            # Update progress to show OSM processing status
+            self.current_progress['status'] = 'processing_osm'
+            self.current_progress['current_tile'] = f"{tile_lat:.3f}_{tile_lng:.3f} (processing OSM data)"
             
-            # Save compressed tile
-            tile_filename = f"{tile_lat:.3f}_{tile_lng:.3f}.svg.gz"
-            tile_path = self.tiles_dir / 'regions' / region_name / tile_filename
+            self.apply_osm_handler(handler, osm_file)
             
-            with gzip.open(tile_path, 'wt', encoding='utf-8') as f:
-                f.write(svg_content)
+            # Update progress to show tile rendering status
+            self.current_progress['status'] = 'rendering_tile'
+            self.current_progress['current_tile'] = f"{tile_lat:.3f}_{tile_lng:.3f} (rendering SVG)"
             
-            return tile_path
+            print(f"  OSM processing complete for tile {tile_lat:.3f}, {tile_lng:.3f}")
+            
+            return self.render_tile(tile_lat, tile_lng, region_name, handler.features, previous_hash)
             
         except Exception as e:
             print(f"Failed to generate tile {tile_lat:.3f}, {tile_lng:.3f}: {e}")
             return None
     
+    def render_tile(self, tile_lat, tile_lng, region_name, features, previous_hash=None):
+        """Render already-classified features into a compressed SVG tile.
+        
+        The tile's content hash is the SHA-256 of its uncompressed SVG. If it
+        matches previous_hash and the tile exists, the file is left untouched.
+        Returns {'path', 'sha256', 'changed'}, or None if rendering failed.
+        """
+        try:
+            bounds = self.get_tile_bounds(tile_lat, tile_lng)
+            
+            # Stream the SVG into a temporary compressed file, then swap it in
+            # so a failed render never leaves a truncated tile behind
+            tile_filename = f"{tile_lat:.3f}_{tile_lng:.3f}.svg.gz"
+            tile_path = self.tiles_dir / 'regions' / region_name / tile_filename
+            fd, temp_path = tempfile.mkstemp(dir=tile_path.parent, prefix=f'{tile_filename}.', suffix='.tmp')
+            temp_path = Path(temp_path)
+            os.fchmod(fd, 0o644)
+            
+            # No name or timestamp in the gzip header, so equal SVG gives equal files
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as raw, \
+                    gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0) as compressed, \
+                    io.TextIOWrapper(compressed, encoding='utf-8') as f:
+                self.write_tile_svg(DigestStream(f, digest), tile_lat, tile_lng, features, bounds)
+            
+            sha256 = digest.hexdigest()
+            changed = sha256 != previous_hash or not tile_path.exists()
+            if changed:
+                os.replace(temp_path, tile_path)
+            else:
+                temp_path.unlink()
+            
+            return {'path': str(tile_path), 'sha256': sha256, 'changed': changed,
+                    'hash_entry': hash_entry(sha256, tile_path.stat())}
+            
+        except Exception as e:
+            print(f"Failed to render tile {tile_lat:.3f}, {tile_lng:.3f}: {e}")
+            if 'temp_path' in locals() and temp_path.exists():
+                temp_path.unlink()
+            return None
+    
     def get_tile_bounds(self, tile_lat, tile_lng):
         """Get bounding box for a tile."""
         return {
@@ -343,49 +1250,154 @@ class TileBuilder:
     
     def create_tile_svg(self, tile_lat, tile_lng, features, bounds):
         """Create SVG content for a tile."""
-        # Create SVG root element
-        svg = Element('svg')
-        svg.set('viewBox', f'0 0 {self.svg_size} {self.svg_size}')
-        svg.set('xmlns', 'http://www.w3.org/2000/svg')
-        svg.set('data-tile-lat', str(tile_lat))
-        svg.set('data-tile-lng', str(tile_lng))
+        output = io.StringIO()
+        self.write_tile_svg(output, tile_lat, tile_lng, features, bounds)
+        return output.getvalue()
+    
+    def write_tile_svg(self, stream, tile_lat, tile_lng, features, bounds):
+        """Write a tile's SVG document to a text stream, one feature at a time."""
+        writer = SVGWriter(stream, pretty=self.pretty_svg)
+        writer.declaration()
+        
+        # SVG root element
+        writer.start('svg', {
+            'xmlns': 'http://www.w3.org/2000/svg',
+            'viewBox': f'0 0 {self.svg_size} {self.svg_size}',
+            'data-tile-lat': str(tile_lat),
+            'data-tile-lng': str(tile_lng)
+        })
         
         # Add style definitions
-        style_elem = SubElement(svg, 'style')
-        style_elem.text = self.generate_svg_styles()
-        
-        # Create feature groups
-        feature_groups = {}
-        for feature_type in features.keys():
-            group = SubElement(svg, 'g')
-            group.set('id', f'{feature_type}')
-            group.set('class', f'feature-group {feature_type}')
-            feature_groups[feature_type] = group
-        
-        # Render features by type
+        writer.text_element('style', {}, self.generate_svg_styles())
+        
+        # Drop the parts of large lines and polygons that fall outside the tile
+        if self.clip_geometries:
+            features = self.clip_features_to_tile(features, bounds)
+        
+        # Render features by type, one group per feature type
         for feature_type, feature_list in features.items():
-            if not feature_list:
-                continue
-                
-            group = feature_groups[feature_type]
+            writer.start('g', {
+                'id': f'{feature_type}',
+                'class': f'feature-group {feature_type}'
+            })
             
-            for feature in feature_list:
+            # Project and format the whole group's line and polygon coordinates at once
+            svg_coordinates = self.format_svg_coordinates(
+                [feature['geometry'] for feature in feature_list], bounds)
+            
+            for feature, coordinates in zip(feature_list, svg_coordinates):
                 try:
                     svg_element = self.feature_to_svg(feature_type, feature['geometry'], 
-                                                     feature['properties'], bounds)
+                                                     feature['properties'], bounds, coordinates)
                     if svg_element is not None:
-                        group.append(svg_element)
+                        writer.element(svg_element)
                 except Exception as e:
                     print(f"Error rendering {feature_type} feature: {e}")
                     continue
+            
+            writer.end()
         
-        # Convert to string with pretty formatting
-        rough_string = tostring(svg, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ")
+        writer.close()
     
-    def feature_to_svg(self, feature_type, geometry, properties, bounds):
-        """Convert a feature geometry to SVG element."""
+    def clip_features_to_tile(self, features, bounds):
+        """Clip line and polygon features to the tile rectangle plus clip_margin.
+        
+        All clippable geometries of a tile are clipped in one vectorized
+        shapely.clip_by_rect call. Features entirely outside the rectangle are
+        dropped and multi-part results are split into one feature per part.
+        Points, and geometry types the renderer does not draw, pass through.
+        """
+        margin_x = self.clip_margin / self.svg_size * (bounds['east'] - bounds['west'])
+        margin_y = self.clip_margin / self.svg_size * (bounds['north'] - bounds['south'])
+        
+        positions = []
+        geometries = []
+        for feature_type, feature_list in features.items():
+            for index, feature in enumerate(feature_list):
+                if isinstance(feature['geometry'], (LineString, Polygon)):
+                    positions.append((feature_type, index))
+                    geometries.append(feature['geometry'])
+        
+        if not geometries:
+            return features
+        
+        clipped = shapely.clip_by_rect(
+            geometries,
+            bounds['west'] - margin_x, bounds['south'] - margin_y,
+            bounds['east'] + margin_x, bounds['north'] + margin_y
+        )
+        replacements = dict(zip(positions, clipped))
+        
+        clipped_features = {}
+        for feature_type, feature_list in features.items():
+            clipped_list = []
+            for index, feature in enumerate(feature_list):
+                geometry = replacements.get((feature_type, index))
+                if geometry is None:
+                    clipped_list.append(feature)
+                    continue
+                
+                # Keep parts of the original type: clipping a line can yield points
+                # where it only touches the rectangle, a polygon can yield lines
+                source_type = type(feature['geometry'])
+                for part in getattr(geometry, 'geoms', [geometry]):
+                    if isinstance(part, source_type) and not part.is_empty:
+                        clipped_list.append({'geometry': part, 'properties': feature['properties']})
+            
+            clipped_features[feature_type] = clipped_list
+        
+        return clipped_features
+    
+    def format_svg_coordinates(self, geometries, bounds):
+        """Project line and polygon geometries to SVG path data in one batch.
+        
+        Returns, per geometry, the path 'd' string of a LineString, the 'points'
+        string of a Polygon's exterior, or None for anything else and for
+        geometries with too few vertices to draw. Uses the same arithmetic and
+        one-decimal formatting as coord_to_svg with f-strings.
+        """
+        formatted = [None] * len(geometries)
+        
+        positions = []
+        parts = []
+        for position, geometry in enumerate(geometries):
+            if isinstance(geometry, LineString):
+                positions.append(position)
+                parts.append(geometry)
+            elif isinstance(geometry, Polygon):
+                positions.append(position)
+                parts.append(geometry.exterior)
+        
+        if not parts:
+            return formatted
+        
+        coords, part_index = shapely.get_coordinates(parts, return_index=True)
+        svg_coords = np.empty_like(coords)
+        svg_coords[:, 0] = (coords[:, 0] - bounds['west']) / (bounds['east'] - bounds['west']) * self.svg_size
+        svg_coords[:, 1] = (bounds['north'] - coords[:, 1]) / (bounds['north'] - bounds['south']) * self.svg_size
+        
+        flat = svg_coords.ravel().tolist()
+        counts = np.bincount(part_index, minlength=len(parts)).tolist()
+        
+        offset = 0
+        for position, geometry, count in zip(positions, parts, counts):
+            values = flat[offset * 2:(offset + count) * 2]
+            offset += count
+            
+            if isinstance(geometry, LineString) and not isinstance(geometries[position], Polygon):
+                if count >= 2:
+                    formatted[position] = ('M%.1f,%.1f' + ' L%.1f,%.1f' * (count - 1)) % tuple(values)
+            elif count >= 3:
+                formatted[position] = ' '.join(['%.1f,%.1f'] * count) % tuple(values)
+        
+        return formatted
+    
+    def feature_to_svg(self, feature_type, geometry, properties, bounds, svg_coordinates=None):
+        """Convert a feature geometry to SVG element.
+        
+        svg_coordinates is the geometry's pre-formatted path data or points from
+        format_svg_coordinates; it is computed here when not given.
+        """
         if feature_type not in self.feature_types:
             return None
         
@@ -398,9 +1410,9 @@ class TileBuilder:
         if isinstance(geometry, Point):
             return self.create_point_svg(geometry, styles, properties, bounds)
         elif isinstance(geometry, LineString):
-            return self.create_line_svg(geometry, styles, properties, bounds, feature_type)
+            return self.create_line_svg(geometry, styles, properties, bounds, feature_type, svg_coordinates)
         elif isinstance(geometry, Polygon):
-            return self.create_polygon_svg(geometry, styles, properties, bounds)
+            return self.create_polygon_svg(geometry, styles, properties, bounds, svg_coordinates)
         
         return None
     
@@ -428,21 +1440,17 @@ class TileBuilder:
         
         return circle
     
-    def create_line_svg(self, geometry, styles, properties, bounds, feature_type):
+    def create_line_svg(self, geometry, styles, properties, bounds, feature_type, path_data=None):
         """Create SVG path element for line geometry."""
-        if len(geometry.coords) < 2:
-            return None
-        
         # Convert coordinates to SVG path
-        path_data = []
-        for i, (lng, lat) in enumerate(geometry.coords):
-            x, y = self.coord_to_svg(lat, lng, bounds)
-            command = 'M' if i == 0 else 'L'
-            path_data.append(f'{command}{x:.1f},{y:.1f}')
+        if path_data is None:
+            path_data = self.format_svg_coordinates([geometry], bounds)[0]
+        if path_data is None:
+            return None
         
         # Create path element
         path = Element('path')
-        path.set('d', ' '.join(path_data))
+        path.set('d', path_data)
         path.set('fill', 'none')
         path.set('stroke', styles.get('color', styles.get('stroke', '#000000')))
         path.set('stroke-width', str(styles.get('width', styles.get('stroke_width', 1))))
@@ -457,7 +1465,7 @@ class TileBuilder:
         # For roads, also create casing if specified
         if feature_type == 'roads' and 'casing' in styles:
             casing = Element('path')
-            casing.set('d', ' '.join(path_data))
+            casing.set('d', path_data)
             casing.set('fill', 'none')
             casing.set('stroke', styles['casing'])
             casing.set('stroke-width', str(styles.get('casing_width', styles.get('width', 1) + 2)))
@@ -483,24 +1491,16 @@ class TileBuilder:
         
         return path
     
-    def create_polygon_svg(self, geometry, styles, properties, bounds):
+    def create_polygon_svg(self, geometry, styles, properties, bounds, svg_points=None):
         """Create SVG polygon element for polygon geometry."""
-        if hasattr(geometry, 'exterior'):
-            coords = list(geometry.exterior.coords)
-        else:
-            coords = list(geometry.coords)
-        
-        if len(coords) < 3:
+        # Convert exterior coordinates to SVG points
+        if svg_points is None:
+            svg_points = self.format_svg_coordinates([geometry], bounds)[0]
+        if svg_points is None:
             return None
         
-        # Convert coordinates to SVG points
-        svg_points = []
-        for lng, lat in coords:
-            x, y = self.coord_to_svg(lat, lng, bounds)
-            svg_points.append(f'{x:.1f},{y:.1f}')
-        
         polygon = Element('polygon')
-        polygon.set('points', ' '.join(svg_points))
+        polygon.set('points', svg_points)
         polygon.set('fill', styles.get('fill', '#cccccc'))
         polygon.set('stroke', styles.get('stroke', '#000000'))
         polygon.set('stroke-width', str(styles.get('stroke_width', 1)))
@@ -1776,10 +2776,53 @@ class TileBuilder:
         """
     
     def store_tile_metadata(self, tile_lat, tile_lng, region_name, tile_file):
-        """Store tile metadata in database."""
-        # This would store metadata in SQLite database
-        # Implementation will be added when we create the database module
-        pass
+        """Record a written tile in the tile catalog."""
+        try:
+            get_tile_catalog(self.tiles_dir).record_tile(region_name, tile_file)
+        except Exception as e:
+            print(f"Error cataloguing tile {tile_lat:.3f}, {tile_lng:.3f}: {e}")
+    
+    def load_tile_hashes(self, region_name):
+        """Load the region's tile hashes ({tile filename: [SVG SHA-256, mtime_ns, size]})."""
+        hashes_file = self.tiles_dir / 'regions' / region_name / HASHES_FILE
+        try:
+            with open(hashes_file) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error reading tile hashes for {region_name}, rewriting all tiles: {e}")
+            return {}
+    
+    def export_region_archive(self, region_name):
+        """Pack a region's tiles into its single-file archive; return the counts, or None on failure."""
+        try:
+            counts = export_region(self.tiles_dir / 'regions' / region_name,
+                                   archive_path(self.tiles_dir, region_name))
+            print(f"📦 Archived {region_name}: {counts['written']} written, "
+                  f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+            return counts
+        except Exception as e:
+            print(f"⚠️  Could not archive {region_name}: {e}")
+            return None
+    
+    def save_tile_hashes(self, region_name, tile_hashes):
+        """Save tile hashes next to the region's tiles, merged into those already saved.
+        
+        Hashes are only ever added or replaced, so hashes recorded by
+        on-demand renders while a job ran are kept when the job saves. Each
+        is saved with the stat of the tile it was computed for (see
+        tile_generation.tile_hashes), so tiles rewritten since are not
+        served or skipped under a hash they no longer have.
+        """
+        hashes_file = self.tiles_dir / 'regions' / region_name / HASHES_FILE
+        with _tile_hashes_lock:
+            merged = {**self.load_tile_hashes(region_name), **tile_hashes}
+            fd, temp_file = tempfile.mkstemp(dir=hashes_file.parent, prefix='tile_hashes.', suffix='.tmp')
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(merged, f, indent=2, sort_keys=True)
+            os.replace(temp_file, hashes_file)
     
     def update_region_metadata(self, region_name, bounds, tile_count):
         """Update region metadata file."""
@@ -1797,6 +2840,8 @@ class TileBuilder:
         
         with open(metadata_file, 'w') as f:
             json.dump(metadata, f, indent=2)
+        
+        get_tile_catalog(self.tiles_dir).set_metadata(region_name, metadata)
     
     def get_generation_progress(self):
         """Get current generation progress for admin UI."""
@@ -1828,6 +2873,12 @@ class TileBuilder:
         for region_name, province in self.region_to_province.items():
             cache_file = self.data_dir / 'osm_cache' / f"{province}-latest.osm.pbf"
             
+            store = self.get_feature_store(province)
+            try:
+                feature_store = store.status(cache_file)
+            finally:
+                store.close()
+            
             if cache_file.exists():
                 stat = cache_file.stat()
                 cache_age = datetime.now().timestamp() - stat.st_mtime
@@ -1841,7 +2892,9 @@ class TileBuilder:
                     'age_days': round(cache_age / 86400, 1),
                     'last_modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
                     'is_fresh': cache_age < 2419200,  # Fresh if less than 28 days old
-                    'regions': [r for r, p in self.region_to_province.items() if p == province]
+                    'regions': [r for r, p in self.region_to_province.items() if p == province],
+                    'feature_store': feature_store,
+                    'has_previous': self.get_previous_osm_file(province).exists()
                 }
             else:
                 cache_status[province] = {
@@ -1852,7 +2905,8 @@ class TileBuilder:
                     'age_days': 0,
                     'last_modified': None,
                     'is_fresh': False,
-                    'regions': [r for r, p in self.region_to_province.items() if p == province]
+                    'regions': [r for r, p in self.region_to_province.items() if p == province],
+                    'feature_store': feature_store
                 }
         
         return cache_status
@@ -1890,52 +2944,12 @@ class TileBuilder:
     def create_regional_filter(self, source_file, output_file, bounds):
         """Create a filtered OSM file for a specific region to improve processing speed."""
         try:
-            # Add small buffer to bounds to ensure we don't miss edge features
-            buffer = 0.005  # About 500m buffer
-            
-            bbox = f"{bounds['west'] - buffer},{bounds['south'] - buffer},{bounds['east'] + buffer},{bounds['north'] + buffer}"
-            
-            # Use osmium extract command if available
-            import subprocess
-            import shutil
-            
-            # Check if osmium is available as command line tool
-            if shutil.which('osmium'):
-                cmd = [
-                    'osmium', 'extract', 
-                    '--bbox', bbox,
-                    '--output', str(output_file),
-                    str(source_file)
-                ]
-                
-                print(f"  Running: {' '.join(cmd)}")
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)  # 5 minute timeout
-                
-                if result.returncode == 0:
-                    # Check if output file was created and has reasonable size
-                    if output_file.exists() and output_file.stat().st_size > 1000:  # At least 1KB
-                        size_mb = output_file.stat().st_size / (1024 * 1024)
-                        print(f"  ✅ Created filtered OSM file: {size_mb:.1f}MB (was {source_file.stat().st_size / (1024 * 1024):.0f}MB)")
-                        return True
-                    else:
-                        print(f"  ❌ Filtered file too small or missing")
-                        if output_file.exists():
-                            output_file.unlink()
-                        return False
-                else:
-                    print(f"  ❌ osmium extract failed: {result.stderr}")
-                    return False
-            else:
-                print(f"  ❌ osmium command line tool not available, using full province file")
-                return False
-                
-        except subprocess.TimeoutExpired:
-            print(f"  ❌ osmium extract timed out after 5 minutes")
-            if output_file.exists():
-                output_file.unlink()
-            return False
+            method = extract_regions(source_file, {'region': (bounds, output_file)},
+                                     buffer=self.extract_buffer, timeout=self.extract_timeout)
+            size_mb = Path(output_file).stat().st_size / (1024 * 1024)
+            print(f"  ✅ Created filtered OSM file with {method}: {size_mb:.1f}MB "
+                  f"(was {Path(source_file).stat().st_size / (1024 * 1024):.0f}MB)")
+            return True
         except Exception as e:
             print(f"  ❌ Error creating regional filter: {e}")
-            if output_file.exists():
-                output_file.unlink()
-            return False
\ No newline at end of file
+            return False
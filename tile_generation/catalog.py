@@ -0,0 +1,217 @@
+"""In-memory catalog of the tiles of every region.
+
+The catalog holds each region's metadata and, per tile, its coordinates
+and size, so the admin pages and the tile API list regions and tiles
+without globbing and stat()ing the tile directories. It is loaded once
+(tiles/tile-catalog.json, next to tile-index.json), kept current by the
+builder as it writes tiles and metadata, and saved back to disk. Regions
+whose directories appear or disappear behind its back are rescanned or
+dropped when the catalog is loaded.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from pathlib import Path
+
+CATALOG_VERSION = 1
+
+# Seconds between saves while tiles are being recorded
+SAVE_INTERVAL = 5
+
+
+def parse_tile_coordinates(tile_name):
+    """Get the (lat, lng) south-west corner of a tile file name, or None."""
+    if not tile_name.endswith('.svg.gz'):
+        return None
+    try:
+        lat, lng = (float(part) for part in tile_name[:-len('.svg.gz')].split('_'))
+    except ValueError:
+        return None
+    return lat, lng
+
+
+class TileCatalog:
+    """Regions and their tiles, answered from memory."""
+
+    def __init__(self, tiles_dir):
+        self.tiles_dir = Path(tiles_dir)
+        self.regions_dir = self.tiles_dir / 'regions'
+        self.catalog_file = self.tiles_dir / 'tile-catalog.json'
+        # {region: {'metadata': dict or None, 'tiles': {name: [lat, lng, size_bytes]}, 'size_bytes': int}}
+        self._regions = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._saved_at = 0
+        self._file_mtime = None
+
+    def load(self):
+        """Load the saved catalog, rescanning regions it does not match."""
+        with self._lock:
+            try:
+                with open(self.catalog_file) as f:
+                    saved = json.load(f)
+                if saved.get('version') != CATALOG_VERSION:
+                    raise ValueError(f"catalog version {saved.get('version')}")
+                self._regions = saved['regions']
+                self._file_mtime = self.catalog_file.stat().st_mtime_ns
+            except FileNotFoundError:
+                self._regions = {}
+            except Exception as e:
+                print(f"Error reading tile catalog, rebuilding it: {e}")
+                self._regions = {}
+
+            on_disk = set()
+            if self.regions_dir.exists():
+                on_disk = {d.name for d in self.regions_dir.iterdir() if d.is_dir()}
+            for region_name in on_disk - set(self._regions):
+                self.scan_region(region_name)
+            for region_name in set(self._regions) - on_disk:
+                self.remove_region(region_name)
+
+            self.save(force=True)
+        return self
+
+    def scan_region(self, region_name):
+        """Rebuild a region's entry from its directory."""
+        region_dir = self.regions_dir / region_name
+        with self._lock:
+            if not region_dir.is_dir():
+                self.remove_region(region_name)
+                return
+            entry = {'metadata': _read_metadata(region_dir), 'tiles': {}, 'size_bytes': 0}
+            for tile_file in region_dir.glob('*.svg.gz'):
+                coordinates = parse_tile_coordinates(tile_file.name)
+                if coordinates:
+                    size = tile_file.stat().st_size
+                    entry['tiles'][tile_file.name] = [*coordinates, size]
+                    entry['size_bytes'] += size
+            self._regions[region_name] = entry
+            self._dirty = True
+            self.save(force=True)
+
+    def record_tile(self, region_name, tile_file):
+        """Record a tile the builder has written (or rewritten)."""
+        tile_file = Path(tile_file)
+        coordinates = parse_tile_coordinates(tile_file.name)
+        if not coordinates:
+            return
+        size = tile_file.stat().st_size
+        with self._lock:
+            entry = self._entry(region_name)
+            previous = entry['tiles'].get(tile_file.name)
+            if previous and previous[2] == size:
+                return
+            entry['size_bytes'] += size - (previous[2] if previous else 0)
+            entry['tiles'][tile_file.name] = [*coordinates, size]
+            self._dirty = True
+            self.save()
+
+    def set_metadata(self, region_name, metadata):
+        """Record a region's metadata.json contents."""
+        with self._lock:
+            self._entry(region_name)['metadata'] = metadata
+            self._dirty = True
+            self.save(force=True)
+
+    def remove_region(self, region_name):
+        """Forget a deleted region."""
+        with self._lock:
+            if self._regions.pop(region_name, None) is not None:
+                self._dirty = True
+                self.save(force=True)
+
+    def regions(self):
+        """Get every region as {'name', 'metadata', 'tile_count', 'size_bytes'}, sorted by name."""
+        self._reload_if_changed()
+        with self._lock:
+            return [self._summary(name) for name in sorted(self._regions)]
+
+    def region(self, region_name):
+        """Get one region's summary, or None if it is not in the catalog."""
+        self._reload_if_changed()
+        with self._lock:
+            return self._summary(region_name) if region_name in self._regions else None
+
+    def tiles(self, region_name):
+        """Get a region's tiles as {'filename', 'lat', 'lng', 'size_bytes'}, sorted by filename."""
+        self._reload_if_changed()
+        with self._lock:
+            tiles = dict(self._regions.get(region_name, {}).get('tiles', {}))
+        return [{'filename': name, 'lat': lat, 'lng': lng, 'size_bytes': size}
+                for name, (lat, lng, size) in sorted(tiles.items())]
+
+    def save(self, force=False):
+        """Write the catalog if it changed, at most every SAVE_INTERVAL seconds unless forced."""
+        with self._lock:
+            if not self._dirty or (not force and time.monotonic() - self._saved_at < SAVE_INTERVAL):
+                return
+            try:
+                self.tiles_dir.mkdir(parents=True, exist_ok=True)
+                temp_file = self.catalog_file.with_name('tile-catalog.json.tmp')
+                with open(temp_file, 'w') as f:
+                    json.dump({'version': CATALOG_VERSION, 'regions': self._regions}, f, separators=(',', ':'))
+                os.replace(temp_file, self.catalog_file)
+                self._file_mtime = self.catalog_file.stat().st_mtime_ns
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            except Exception as e:
+                print(f"Error saving tile catalog: {e}")
+
+    def _entry(self, region_name):
+        entry = self._regions.get(region_name)
+        if entry is None:
+            entry = self._regions[region_name] = {'metadata': None, 'tiles': {}, 'size_bytes': 0}
+        return entry
+
+    def _summary(self, region_name):
+        entry = self._regions[region_name]
+        return {
+            'name': region_name,
+            'metadata': dict(entry['metadata']) if entry['metadata'] else None,
+            'tile_count': len(entry['tiles']),
+            'size_bytes': entry['size_bytes']
+        }
+
+    def _reload_if_changed(self):
+        # Another process (e.g. a command-line build) saved the catalog
+        try:
+            mtime = self.catalog_file.stat().st_mtime_ns
+        except OSError:
+            return
+        with self._lock:
+            if mtime != self._file_mtime and not self._dirty:
+                self.load()
+
+
+def _read_metadata(region_dir):
+    try:
+        with open(region_dir / 'metadata.json') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading metadata for {region_dir.name}: {e}")
+        return None
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_tile_catalog(tiles_dir):
+    """Get the catalog of a tiles directory, loading it on first use."""
+    key = Path(tiles_dir).resolve()
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = TileCatalog(key).load()
+        return catalog
+
+
+@atexit.register
+def _save_catalogs():
+    for catalog in list(_catalogs.values()):
+        catalog.save(force=True)
@@ -0,0 +1,120 @@
+"""In-process event bus for tile generation progress.
+
+TileBuilder publishes an event as generation moves along (progress, tiles
+started and finished, stage timings, errors) and the admin interface
+streams them to browsers as server-sent events. Subscribers wait on their
+own queue, so an idle stream costs a blocked thread and nothing else.
+"""
+
+import json
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+
+# Recent events replayed to a subscriber reconnecting with Last-Event-ID
+HISTORY_SIZE = 500
+
+# Events a slow subscriber may fall behind before its oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """Queue of the events one subscriber receives, optionally for one region."""
+
+    def __init__(self, bus, region=None):
+        self.bus = bus
+        self.region = region
+        self.queue = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def matches(self, event):
+        if self.region is None:
+            return True
+        return self.region in (event['data'].get('region'), event['data'].get('operation'))
+
+    def put(self, event):
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Get the next event, or None if none arrives within timeout seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Publish events to every matching subscriber in this process."""
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._history = deque(maxlen=history_size)
+        self._next_id = 1
+
+    def publish(self, event_type, data):
+        """Publish an event; return it as {'id', 'type', 'time', 'data'}."""
+        with self._lock:
+            event = {
+                'id': self._next_id,
+                'type': event_type,
+                'time': datetime.now().isoformat(),
+                'data': data
+            }
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = [s for s in self._subscribers if s.matches(event)]
+
+        for subscription in subscribers:
+            subscription.put(event)
+        return event
+
+    def subscribe(self, region=None, last_event_id=None):
+        """Subscribe to events (for one region if given).
+
+        With last_event_id the subscription starts with the recent events
+        published after it, so a reconnecting stream misses nothing.
+        """
+        subscription = Subscription(self, region)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event['id'] > last_event_id and subscription.matches(event):
+                        subscription.put(event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+# Bus shared by the builders and the admin interface of this process
+event_bus = EventBus()
+
+
+def publish(event_type, **data):
+    """Publish an event on the process-wide bus."""
+    return event_bus.publish(event_type, data)
+
+
+def format_sse(event):
+    """Format an event as a server-sent event message."""
+    data = json.dumps({**event['data'], 'time': event['time']}, default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
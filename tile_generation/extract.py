@@ -0,0 +1,170 @@
+"""Regional extracts of a province PBF.
+
+Every region of a province is cut from the province file in one run: with
+the osmium command line tool through an extract config file, or otherwise
+in-process with pyosmium. Both keep complete ways - a way with a node in the
+bounding box is written with all of its nodes - and relations with a member
+in the box, like `osmium extract --strategy complete_ways`.
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+
+import osmium
+
+# Degrees added around each region so features crossing its edge are kept
+DEFAULT_BUFFER = 0.005
+
+# Objects between timeout checks in the in-process extract
+_CHECK_INTERVAL = 100000
+
+
+def buffered_bbox(bounds, buffer=DEFAULT_BUFFER):
+    """Get (west, south, east, north) of bounds grown by buffer degrees."""
+    return (bounds['west'] - buffer, bounds['south'] - buffer,
+            bounds['east'] + buffer, bounds['north'] + buffer)
+
+
+def extract_regions(source_file, extracts, buffer=DEFAULT_BUFFER, timeout=None, use_cli=True):
+    """Write a bounding box extract of source_file for each region in one run.
+
+    extracts maps region name to (bounds, output_file). Extracts are written
+    to temporary files and moved into place only when every one of them is
+    complete. timeout is in seconds (None waits as long as it takes).
+    Returns the extraction method used ('osmium-cli' or 'pyosmium').
+    """
+    source_file = Path(source_file)
+    outputs = {name: (buffered_bbox(bounds, buffer), Path(output_file))
+               for name, (bounds, output_file) in extracts.items()}
+    temp_files = {name: output_file.with_name(f"extracting-{output_file.name}")
+                  for name, (_, output_file) in outputs.items()}
+
+    for temp_file in temp_files.values():
+        if temp_file.exists():
+            temp_file.unlink()
+
+    try:
+        if use_cli and shutil.which('osmium'):
+            method = 'osmium-cli'
+            _extract_with_cli(source_file, outputs, temp_files, timeout)
+        else:
+            method = 'pyosmium'
+            _extract_in_process(source_file, outputs, temp_files, timeout)
+
+        for name, (_, output_file) in outputs.items():
+            os.replace(temp_files[name], output_file)
+        return method
+
+    finally:
+        for temp_file in temp_files.values():
+            if temp_file.exists():
+                temp_file.unlink()
+
+
+def _extract_with_cli(source_file, outputs, temp_files, timeout):
+    """Run one `osmium extract --config` for every region."""
+    config = {
+        'extracts': [
+            {'output': str(temp_files[name]), 'output_format': 'pbf', 'bbox': list(bbox)}
+            for name, (bbox, _) in outputs.items()
+        ]
+    }
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(config, f)
+        config_file = f.name
+
+    try:
+        cmd = ['osmium', 'extract', '--config', config_file, '--strategy', 'complete_ways',
+               '--overwrite', str(source_file)]
+        print(f"  Running: {' '.join(cmd)}")
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise TimeoutError(f"osmium extract timed out after {timeout} seconds")
+        if result.returncode != 0:
+            raise RuntimeError(f"osmium extract failed: {result.stderr.strip()}")
+    finally:
+        os.unlink(config_file)
+
+
+def _extract_in_process(source_file, outputs, temp_files, timeout):
+    """Extract every region with pyosmium in two reads of source_file.
+
+    The first read finds the nodes inside each box, then the ways using any
+    of them (adding all their nodes) and relations with a tracked member.
+    The second read writes each tracked object to its region's output; a
+    combined tracker drops objects no region needs before they reach Python.
+    """
+    start = time.monotonic()
+    names = list(outputs)
+    boxes = [outputs[name][0] for name in names]
+    trackers = [osmium.IdTracker() for _ in names]
+    combined = osmium.IdTracker()
+
+    # Everything outside the union of the boxes is skipped with one test
+    union = (min(box[0] for box in boxes), min(box[1] for box in boxes),
+             max(box[2] for box in boxes), max(box[3] for box in boxes))
+
+    def check_timeout(count):
+        if timeout and count % _CHECK_INTERVAL == 0 and time.monotonic() - start > timeout:
+            raise TimeoutError(f"Regional extract timed out after {timeout} seconds")
+
+    count = 0
+    for obj in osmium.FileProcessor(str(source_file)):
+        count += 1
+        check_timeout(count)
+
+        if obj.is_node():
+            location = obj.location
+            if not location.valid():
+                continue
+            lon, lat = location.lon, location.lat
+            if not (union[0] <= lon <= union[2] and union[1] <= lat <= union[3]):
+                continue
+            for tracker, (west, south, east, north) in zip(trackers, boxes):
+                if west <= lon <= east and south <= lat <= north:
+                    tracker.add_node(obj.id)
+                    combined.add_node(obj.id)
+
+        elif obj.is_way():
+            for tracker in trackers:
+                if tracker.contains_any_references(obj):
+                    tracker.add_way(obj.id)
+                    tracker.add_references(obj)
+                    combined.add_way(obj.id)
+                    combined.add_references(obj)
+
+        elif obj.is_relation():
+            for tracker in trackers:
+                if tracker.contains_any_references(obj):
+                    tracker.add_relation(obj.id)
+                    combined.add_relation(obj.id)
+
+    node_sets = [tracker.node_ids() for tracker in trackers]
+    way_sets = [tracker.way_ids() for tracker in trackers]
+    relation_sets = [tracker.relation_ids() for tracker in trackers]
+
+    writers = [osmium.SimpleWriter(str(temp_files[name]), overwrite=True) for name in names]
+    try:
+        for obj in osmium.FileProcessor(str(source_file)).with_filter(combined.id_filter()):
+            count += 1
+            check_timeout(count)
+
+            if obj.is_node():
+                id_sets = node_sets
+            elif obj.is_way():
+                id_sets = way_sets
+            else:
+                id_sets = relation_sets
+            for writer, id_set in zip(writers, id_sets):
+                if id_set.get(obj.id):
+                    writer.add(obj)
+    finally:
+        for writer in writers:
+            writer.close()
@@ -0,0 +1,346 @@
+"""Persistent per-province store of classified OSM features.
+
+OSMHandler output for a whole province PBF is written once to an SQLite
+database (WKB geometry, JSON properties and an R*Tree bbox index). The store
+is keyed by the source file's size, mtime and SHA-256, so regenerating,
+restyling or adding regions in the same province can query it instead of
+re-reading OSM until the PBF changes.
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from datetime import datetime
+
+import shapely
+
+from .osm_processor import OSMHandler, FEATURE_CATEGORIES
+
+# OSMHandler bounds that accept every element in the source file
+WORLD_BOUNDS = {'south': -90.0, 'north': 90.0, 'west': -180.0, 'east': 180.0}
+
+SCHEMA_VERSION = 1
+
+# Seconds after which a build file nobody finished is removed
+STALE_BUILD_AGE = 24 * 3600
+
+
+def file_fingerprint(path, include_hash=True):
+    """Return the size, mtime and (optionally) SHA-256 of a file."""
+    stat = Path(path).stat()
+    fingerprint = {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': None
+    }
+
+    if include_hash:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        fingerprint['sha256'] = digest.hexdigest()
+
+    return fingerprint
+
+
+class _FeatureSink(list):
+    """Feature list that forwards appends to the ingest handler's write buffer."""
+
+    def __init__(self, category, handler):
+        super().__init__()
+        self.category = category
+        self.handler = handler
+
+    def append(self, feature):
+        self.handler.pending.append((self.category, self.handler.current_type, feature))
+
+
+class _StoreIngestHandler(OSMHandler):
+    """OSMHandler that streams classified features into a FeatureStore."""
+
+    def __init__(self, store, batch_size=5000):
+        super().__init__(WORLD_BOUNDS)
+        self.store = store
+        self.batch_size = batch_size
+        self.pending = []
+        self.current_type = None
+        self.feature_count = 0
+        self.features = {category: _FeatureSink(category, self) for category in FEATURE_CATEGORIES}
+
+    def node(self, n):
+        self.current_type = 'node'
+        super().node(n)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def way(self, w):
+        self.current_type = 'way'
+        super().way(w)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def area(self, a):
+        self.current_type = 'area'
+        super().area(a)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered features to the store."""
+        if self.pending:
+            self.store._insert_features(self.pending)
+            self.feature_count += len(self.pending)
+            self.pending = []
+
+
+class FeatureStore:
+    """SQLite feature store for one province PBF."""
+
+    def __init__(self, store_path):
+        self.store_path = Path(store_path)
+        self._conn = None
+        self._next_id = 1
+
+    def _connect(self, path=None):
+        conn = sqlite3.connect(str(path or self.store_path))
+        conn.execute('PRAGMA journal_mode=OFF' if path else 'PRAGMA query_only=ON')
+        return conn
+
+    def _get_connection(self):
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def close(self):
+        """Close the store's database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get_metadata(self):
+        """Return the stored source fingerprint and build info, or None."""
+        if not self.store_path.exists():
+            return None
+
+        try:
+            rows = self._get_connection().execute('SELECT key, value FROM meta').fetchall()
+        except sqlite3.Error:
+            return None
+
+        return {key: json.loads(value) for key, value in rows}
+
+    def is_fresh(self, source_file):
+        """Check whether the store was built from the current source file.
+
+        Size and mtime are compared first; if they changed the file is hashed,
+        so an identical re-download does not force a rebuild.
+        """
+        metadata = self.get_metadata()
+        if not metadata or metadata.get('schema_version') != SCHEMA_VERSION:
+            return False
+
+        current = file_fingerprint(source_file, include_hash=False)
+        if (current['size'] == metadata.get('source_size') and
+                current['mtime'] == metadata.get('source_mtime')):
+            return True
+
+        if current['size'] != metadata.get('source_size'):
+            return False
+
+        # Same size but touched - compare content hashes
+        current = file_fingerprint(source_file)
+        if current['sha256'] != metadata.get('source_sha256'):
+            return False
+
+        # Content unchanged; record the new mtime so the next check is cheap
+        self.close()
+        conn = sqlite3.connect(str(self.store_path))
+        with conn:
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'source_mtime'",
+                         (json.dumps(current['mtime']),))
+        conn.close()
+        return True
+
+    def status(self, source_file):
+        """Get store status for the admin UI without hashing the source file."""
+        metadata = self.get_metadata()
+        if not metadata:
+            return {
+                'exists': False,
+                'is_fresh': False,
+                'built_at': None,
+                'feature_count': 0,
+                'size_mb': 0
+            }
+
+        source_file = Path(source_file)
+        is_fresh = False
+        if source_file.exists():
+            current = file_fingerprint(source_file, include_hash=False)
+            is_fresh = (current['size'] == metadata.get('source_size') and
+                        current['mtime'] == metadata.get('source_mtime') and
+                        metadata.get('schema_version') == SCHEMA_VERSION)
+
+        return {
+            'exists': True,
+            'is_fresh': is_fresh,
+            'built_at': metadata.get('built_at'),
+            'feature_count': metadata.get('feature_count', 0),
+            'size_mb': round(self.store_path.stat().st_size / (1024 * 1024), 1)
+        }
+
+    def build(self, source_file, apply_handler=None):
+        """Classify every element of source_file with OSMHandler and store the result.
+
+        apply_handler(handler, source_file) runs the handler over the file; it
+        defaults to OSMHandler.apply_filtered. The store is built in a
+        temporary file of its own and swapped in when complete.
+        """
+        source_file = Path(source_file)
+        fingerprint = file_fingerprint(source_file)
+
+        self.close()
+        self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        # Builds that died long ago; a concurrent build's file is left alone
+        for stale in self.store_path.parent.glob(f'{self.store_path.stem}.*.building'):
+            try:
+                if time.time() - stale.stat().st_mtime > STALE_BUILD_AGE:
+                    stale.unlink()
+            except OSError:
+                pass
+        fd, build_path = tempfile.mkstemp(dir=self.store_path.parent, prefix=f'{self.store_path.stem}.',
+                                          suffix='.building')
+        os.close(fd)
+        build_path = Path(build_path)
+
+        self._conn = self._connect(build_path)
+        self._next_id = 1
+        try:
+            self._create_schema()
+
+            handler = _StoreIngestHandler(self)
+            if apply_handler:
+                apply_handler(handler, source_file)
+            else:
+                handler.apply_filtered(source_file)
+            handler.flush()
+
+            metadata = {
+                'schema_version': SCHEMA_VERSION,
+                'source_file': str(source_file),
+                'source_size': fingerprint['size'],
+                'source_mtime': fingerprint['mtime'],
+                'source_sha256': fingerprint['sha256'],
+                'feature_count': handler.feature_count,
+                'built_at': datetime.now().isoformat()
+            }
+            with self._conn:
+                self._conn.executemany('INSERT INTO meta (key, value) VALUES (?, ?)',
+                                       [(key, json.dumps(value)) for key, value in metadata.items()])
+            self._conn.close()
+            self._conn = None
+
+            os.replace(build_path, self.store_path)
+            return metadata
+
+        except Exception:
+            self.close()
+            if build_path.exists():
+                build_path.unlink()
+            raise
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+            self._conn.execute('''
+                CREATE TABLE features (
+                    id INTEGER PRIMARY KEY,
+                    category TEXT NOT NULL,
+                    osm_type TEXT NOT NULL,
+                    osm_id INTEGER,
+                    geometry BLOB NOT NULL,
+                    properties TEXT NOT NULL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX features_osm_id ON features (osm_type, osm_id)')
+            self._conn.execute('CREATE VIRTUAL TABLE features_rtree USING rtree(id, minx, maxx, miny, maxy)')
+
+    def _insert_features(self, pending):
+        """Insert (category, osm_type, feature) tuples, keeping their order."""
+        geometries = [feature['geometry'] for _, _, feature in pending]
+        blobs = shapely.to_wkb(geometries)
+        extents = shapely.bounds(geometries)
+
+        feature_rows = []
+        rtree_rows = []
+        for (category, osm_type, feature), blob, (minx, miny, maxx, maxy) in zip(pending, blobs, extents):
+            feature_id = self._next_id
+            self._next_id += 1
+            properties = feature['properties']
+            feature_rows.append((feature_id, category, osm_type, properties.get('osm_id'),
+                                 blob, json.dumps(properties)))
+            rtree_rows.append((feature_id, minx, maxx, miny, maxy))
+
+        with self._conn:
+            self._conn.executemany('INSERT INTO features VALUES (?, ?, ?, ?, ?, ?)', feature_rows)
+            self._conn.executemany('INSERT INTO features_rtree VALUES (?, ?, ?, ?, ?)', rtree_rows)
+
+    def query(self, bounds):
+        """Get features whose bounding box touches bounds, grouped like OSMHandler.features."""
+        features = {category: [] for category in FEATURE_CATEGORIES}
+
+        rows = self._get_connection().execute('''
+            SELECT f.category, f.osm_type, f.geometry, f.properties
+            FROM features_rtree r JOIN features f ON f.id = r.id
+            WHERE r.maxx >= ? AND r.minx <= ? AND r.maxy >= ? AND r.miny <= ?
+            ORDER BY f.id
+        ''', (bounds['west'], bounds['east'], bounds['south'], bounds['north'])).fetchall()
+
+        if not rows:
+            return features
+
+        geometries = shapely.from_wkb([row[2] for row in rows])
+
+        # The R*Tree stores rounded boxes; re-apply OSMHandler's exact bounds
+        # checks (bbox overlap for nodes and ways, intersection for areas)
+        extents = shapely.bounds(geometries)
+        in_bbox = ((extents[:, 0] <= bounds['east']) & (extents[:, 2] >= bounds['west']) &
+                   (extents[:, 1] <= bounds['north']) & (extents[:, 3] >= bounds['south']))
+        intersects = shapely.intersects(geometries, shapely.box(bounds['west'], bounds['south'],
+                                                                bounds['east'], bounds['north']))
+
+        for (category, osm_type, _, properties), geometry, keep_bbox, keep_area in zip(
+                rows, geometries, in_bbox, intersects):
+            if not (keep_area if osm_type == 'area' else keep_bbox):
+                continue
+            features.setdefault(category, []).append({
+                'geometry': geometry,
+                'properties': json.loads(properties)
+            })
+
+        return features
+
+    def feature_extents(self, feature_ids, chunk_size=500):
+        """Get the bounding boxes (minx, miny, maxx, maxy) of stored features.
+
+        feature_ids maps osm_type ('node', 'way', 'area') to a set of OSM IDs,
+        as returned by incremental.ChangeSet.feature_ids().
+        """
+        conn = self._get_connection()
+        extents = []
+        for osm_type, osm_ids in feature_ids.items():
+            osm_ids = sorted(osm_ids)
+            for i in range(0, len(osm_ids), chunk_size):
+                chunk = osm_ids[i:i + chunk_size]
+                rows = conn.execute(f'''
+                    SELECT r.minx, r.miny, r.maxx, r.maxy
+                    FROM features f JOIN features_rtree r ON r.id = f.id
+                    WHERE f.osm_type = ? AND f.osm_id IN ({','.join('?' * len(chunk))})
+                ''', [osm_type, *chunk]).fetchall()
+                extents.extend(rows)
+        return extents
@@ -0,0 +1,171 @@
+"""Change detection for incremental re-tiling.
+
+Finds the OSM elements that changed between two versions of a province's
+data, either from an OSM change file (.osc) or by comparing two cached PBF
+files, so only the tiles their old and new geometries touch are re-rendered.
+"""
+
+import osmium
+
+# Sort order of element types in OSM files
+_TYPE_ORDER = {'n': 0, 'w': 1, 'r': 2}
+_TYPE_NAMES = ('node', 'way', 'relation')
+
+
+class ChangeSet:
+    """IDs of changed (created, modified or deleted) nodes, ways and relations."""
+
+    def __init__(self):
+        self.nodes = set()
+        self.ways = set()
+        self.relations = set()
+
+    def add(self, osm_type, osm_id):
+        """Record a changed element; osm_type is 'node', 'way' or 'relation'."""
+        getattr(self, osm_type + 's').add(osm_id)
+
+    def is_empty(self):
+        return not (self.nodes or self.ways or self.relations)
+
+    def counts(self):
+        return {
+            'nodes': len(self.nodes),
+            'ways': len(self.ways),
+            'relations': len(self.relations)
+        }
+
+    def feature_ids(self):
+        """Get the FeatureStore (osm_type, osm_id) keys of the changed elements.
+
+        Areas are stored under osmium area IDs: twice the way ID for closed
+        ways, twice the relation ID plus one for multipolygon relations.
+        """
+        return {
+            'node': set(self.nodes),
+            'way': set(self.ways),
+            'area': {way_id * 2 for way_id in self.ways} | {rel_id * 2 + 1 for rel_id in self.relations}
+        }
+
+
+class _ChangeFileReader(osmium.SimpleHandler):
+    """Collect the IDs of every element in an OSM change file."""
+
+    def __init__(self):
+        super().__init__()
+        self.changes = ChangeSet()
+
+    def node(self, n):
+        self.changes.nodes.add(n.id)
+
+    def way(self, w):
+        self.changes.ways.add(w.id)
+
+    def relation(self, r):
+        self.changes.relations.add(r.id)
+
+
+def read_change_file(change_file):
+    """Get the ChangeSet of an OSM change file (.osc, .osc.gz or .osc.bz2)."""
+    reader = _ChangeFileReader()
+    reader.apply_file(str(change_file))
+    return reader.changes
+
+
+def apply_change_file(osm_file, change_file, output_file):
+    """Write osm_file with the changes of change_file applied to output_file."""
+    merger = osmium.MergeInputReader()
+    merger.add_file(str(change_file))
+
+    reader = osmium.io.Reader(str(osm_file))
+    writer = osmium.io.Writer(str(output_file))
+    try:
+        merger.apply_to_reader(reader, writer)
+    finally:
+        writer.close()
+        reader.close()
+
+
+def _tag_signature(obj):
+    return tuple((t.k, t.v) for t in obj.tags)
+
+
+def _content_signature(obj):
+    """Compare elements by content when the file has no version numbers."""
+    kind = obj.type_str()
+    if kind == 'n':
+        return (obj.location.x, obj.location.y, _tag_signature(obj))
+    if kind == 'w':
+        return (tuple(n.ref for n in obj.nodes), _tag_signature(obj))
+    return (tuple((m.type, m.ref, m.role) for m in obj.members), _tag_signature(obj))
+
+
+def _element_stream(osm_file):
+    """Yield (type order, id, signature) for every element of a sorted OSM file."""
+    for obj in osmium.FileProcessor(str(osm_file)):
+        # Every edit bumps the version; stripped files fall back to content
+        yield _TYPE_ORDER[obj.type_str()], obj.id, obj.version or _content_signature(obj)
+
+
+def diff_osm_files(old_file, new_file):
+    """Get the ChangeSet between two OSM files by merging them in file order.
+
+    Both files must be sorted by type and ID, as Geofabrik extracts are.
+    Elements are compared by version, so this streams both files without
+    holding either in memory.
+    """
+    changes = ChangeSet()
+    old_elements = _element_stream(old_file)
+    new_elements = _element_stream(new_file)
+    old = next(old_elements, None)
+    new = next(new_elements, None)
+    last_key = None
+
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[:2] < new[:2]):
+            key = old[:2]
+            changes.add(_TYPE_NAMES[old[0]], old[1])  # deleted
+            old = next(old_elements, None)
+        elif old is None or new[:2] < old[:2]:
+            key = new[:2]
+            changes.add(_TYPE_NAMES[new[0]], new[1])  # created
+            new = next(new_elements, None)
+        else:
+            key = old[:2]
+            if old[2] != new[2]:
+                changes.add(_TYPE_NAMES[old[0]], old[1])  # modified
+            old = next(old_elements, None)
+            new = next(new_elements, None)
+
+        if last_key is not None and key < last_key:
+            raise ValueError(f"OSM files must be sorted by type and ID to compare them ({old_file}, {new_file})")
+        last_key = key
+
+    return changes
+
+
+def expand_change_parents(changes, osm_file):
+    """Add ways whose nodes changed and relations whose members changed.
+
+    Moving an untagged node changes the geometry of every way using it, and
+    changing a way changes the multipolygons it belongs to, without either
+    parent appearing in the change itself. Reads the ways and relations of
+    osm_file (the new version) once; ways come first, so relations also pick
+    up the ways added here.
+    """
+    if changes.is_empty():
+        return changes
+
+    entities = osmium.osm.WAY | osmium.osm.RELATION
+    for obj in osmium.FileProcessor(str(osm_file), entities):
+        if obj.type_str() == 'w':
+            if changes.nodes and obj.id not in changes.ways:
+                if any(n.ref in changes.nodes for n in obj.nodes):
+                    changes.ways.add(obj.id)
+        elif obj.id not in changes.relations:
+            for member in obj.members:
+                if ((member.type == 'w' and member.ref in changes.ways) or
+                        (member.type == 'n' and member.ref in changes.nodes)):
+                    changes.relations.add(obj.id)
+                    break
+
+    return changes
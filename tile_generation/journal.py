@@ -0,0 +1,145 @@
+"""Append-only journals of region generation runs.
+
+Each run of TileBuilder.generate_tiles_for_region writes one JSON-lines file
+under data/journal/<region>/: a start record with the source PBF version,
+a record per finished tile with its SVG hash, and an end record. A run whose
+process dies has no end record; a resumed run skips the tiles the last
+full-grid run's journal shows finished against the same source version.
+Runs of only some tiles (missing tile batches) are journaled too but never
+resumed from, so they do not hide an interrupted full run.
+"""
+
+import os
+import json
+import gzip
+import hashlib
+from pathlib import Path
+from datetime import datetime
+
+# Finished run journals kept per region
+KEEP_RUNS = 10
+
+
+def source_version(osm_file):
+    """Identify the version of a source PBF by its name, size and mtime."""
+    stat = Path(osm_file).stat()
+    return {'file': Path(osm_file).name, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def tile_content_hash(tile_path):
+    """Get the SHA-256 of a tile's uncompressed SVG, or None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with gzip.open(tile_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except (OSError, EOFError):
+        return None
+    return digest.hexdigest()
+
+
+def is_partial_run(start):
+    """Check whether a run's start record is for only some of the region's tiles."""
+    return bool(start.get('options', {}).get('tiles'))
+
+
+class GenerationJournal:
+    """Journal of one region's generation runs."""
+
+    def __init__(self, journal_dir, region_name):
+        self.region_dir = Path(journal_dir) / region_name
+        self.region_name = region_name
+        self.path = None
+        self._file = None
+
+    def runs(self):
+        """Get the region's run journals, newest first."""
+        if not self.region_dir.exists():
+            return []
+        return sorted(self.region_dir.glob('*.jsonl'), reverse=True)
+
+    def read_run(self, path):
+        """Read a run journal into {'start', 'tiles', 'end'}; a torn last line is ignored."""
+        run = {'start': None, 'tiles': {}, 'end': None}
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('event') == 'tile':
+                    run['tiles'][record['tile']] = record['sha256']
+                elif record.get('event') in ('start', 'end'):
+                    run[record['event']] = record
+        return run
+
+    def latest_run(self, full_grid=False):
+        """Get the region's most recent run, or with full_grid its most recent run of every tile, or None."""
+        for path in self.runs():
+            run = self.read_run(path)
+            if run['start'] and not (full_grid and is_partial_run(run['start'])):
+                run['path'] = path
+                return run
+        return None
+
+    def interrupted_run(self):
+        """Get the most recent full-grid run if it never finished, else None."""
+        run = self.latest_run(full_grid=True)
+        if run and not run['end']:
+            return run
+        return None
+
+    def finished_tiles(self, version):
+        """Get {tile name: SVG hash} finished by the latest full-grid run against this source version."""
+        run = self.latest_run(full_grid=True)
+        if not run or run['start'].get('source') != version:
+            return {}
+        return run['tiles']
+
+    def start(self, version, total_tiles, options=None):
+        """Open a new run journal and write its start record."""
+        self.close()
+        self.region_dir.mkdir(parents=True, exist_ok=True)
+        run_id = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        self.path = self.region_dir / f"{run_id}.jsonl"
+        self._file = open(self.path, 'a', buffering=1)
+        self._write({
+            'event': 'start',
+            'run_id': run_id,
+            'region': self.region_name,
+            'source': version,
+            'total_tiles': total_tiles,
+            'options': options or {},
+            'pid': os.getpid(),
+            'time': datetime.now().isoformat()
+        })
+
+    def record_tile(self, tile_name, sha256, resumed=False):
+        """Record a finished tile."""
+        record = {'event': 'tile', 'tile': tile_name, 'sha256': sha256}
+        if resumed:
+            record['resumed'] = True
+        self._write(record)
+
+    def finish(self, status, **counts):
+        """Write the end record and close the journal."""
+        self._write({'event': 'end', 'status': status, 'time': datetime.now().isoformat(), **counts})
+        self.close()
+        self.prune()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def prune(self, keep=KEEP_RUNS):
+        """Delete the oldest run journals beyond keep, except the latest full-grid run."""
+        latest_full = self.latest_run(full_grid=True)
+        for path in self.runs()[keep:]:
+            if not latest_full or path != latest_full['path']:
+                path.unlink()
+
+    def _write(self, record):
+        # Line buffered, so each record reaches the OS as it is written
+        if self._file:
+            self._file.write(json.dumps(record) + '\n')
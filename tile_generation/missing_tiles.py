@@ -0,0 +1,173 @@
+"""Demand for tiles that clients asked for but that were not generated.
+
+Missing-tile reports are aggregated into an SQLite table with one row per
+tile, keyed by the tile's integer grid position (see TileBuilder.tile_key),
+with a request count and first/last seen times. Reports are counted in
+memory and written in batches, so a burst of requests for the same gap
+costs one upsert. The hottest tiles are handed to generation in batches.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from datetime import datetime
+
+# Degrees per tile, as TileBuilder.tile_size
+TILE_SIZE = 0.01
+
+# Reports held in memory before they are written
+FLUSH_INTERVAL = 5.0
+FLUSH_SIZE = 500
+
+
+def tile_key(tile_lat, tile_lng, tile_size=TILE_SIZE):
+    """Get the integer grid position of the tile whose south-west corner is (tile_lat, tile_lng)."""
+    return (int(round(tile_lat / tile_size)), int(round(tile_lng / tile_size)))
+
+
+def point_tile_key(lat, lng, tile_size=TILE_SIZE):
+    """Get the integer grid position of the tile containing a point."""
+    return (math.floor(lat / tile_size + 1e-9), math.floor(lng / tile_size + 1e-9))
+
+
+def tile_name(row, col, tile_size=TILE_SIZE):
+    """Get the file name of the tile at a grid position."""
+    return f"{row * tile_size:.3f}_{col * tile_size:.3f}.svg.gz"
+
+
+def region_contains(bounds, row, col, tile_size=TILE_SIZE):
+    """Check whether a tile is on the tile grid of a region's bounds."""
+    return (math.floor(bounds['south'] / tile_size + 1e-9) <= row < math.ceil(bounds['north'] / tile_size - 1e-9) and
+            math.floor(bounds['west'] / tile_size + 1e-9) <= col < math.ceil(bounds['east'] / tile_size - 1e-9))
+
+
+def grid_region(regions, row, col, region_name=None):
+    """Get the region (metadata with 'name' and 'bounds') whose tile grid holds a tile, or None.
+
+    The region named region_name is preferred if it holds the tile.
+    """
+    holding = [region for region in regions if region.get('bounds') and region_contains(region['bounds'], row, col)]
+    return next((region for region in holding if region.get('name') == region_name),
+                holding[0] if holding else None)
+
+
+class MissingTileStore:
+    """SQLite table of missing tiles and how often they were requested."""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS missing_tiles (
+                    tile_row INTEGER NOT NULL,
+                    tile_col INTEGER NOT NULL,
+                    region TEXT,
+                    request_count INTEGER NOT NULL,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    job_id INTEGER,
+                    PRIMARY KEY (tile_row, tile_col)
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS missing_tiles_demand '
+                         'ON missing_tiles (job_id, request_count)')
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def record(self, row, col, region=None):
+        """Count a request for a missing tile; written by the next flush."""
+        now = datetime.now().isoformat()
+        with self._lock:
+            entry = self._pending.get((row, col))
+            if entry:
+                entry['count'] += 1
+                entry['last_seen'] = now
+                entry['region'] = entry['region'] or region
+            else:
+                self._pending[(row, col)] = {'count': 1, 'first_seen': now, 'last_seen': now, 'region': region}
+            due = (len(self._pending) >= FLUSH_SIZE or
+                   time.monotonic() - self._last_flush >= FLUSH_INTERVAL)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write the counted requests, one upsert per tile."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        with self._connect() as conn:
+            conn.executemany('''
+                INSERT INTO missing_tiles (tile_row, tile_col, region, request_count, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (tile_row, tile_col) DO UPDATE SET
+                    request_count = request_count + excluded.request_count,
+                    last_seen = excluded.last_seen,
+                    region = COALESCE(region, excluded.region)
+            ''', [(row, col, entry['region'], entry['count'], entry['first_seen'], entry['last_seen'])
+                  for (row, col), entry in pending.items()])
+        conn.close()
+        return len(pending)
+
+    def hottest(self, limit=50, unscheduled=True, min_requests=1):
+        """Get the most requested missing tiles, most recent first among equals."""
+        self.flush()
+        query = 'SELECT * FROM missing_tiles WHERE request_count >= ?'
+        if unscheduled:
+            query += ' AND job_id IS NULL'
+        query += ' ORDER BY request_count DESC, last_seen DESC LIMIT ?'
+        with self._connect() as conn:
+            rows = conn.execute(query, (min_requests, limit)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def mark_scheduled(self, tiles, job_id):
+        """Record that (row, col) tiles are being generated by a job."""
+        with self._connect() as conn:
+            conn.executemany('UPDATE missing_tiles SET job_id = ? WHERE tile_row = ? AND tile_col = ?',
+                             [(job_id, row, col) for row, col in tiles])
+        conn.close()
+
+    def resolve(self, tiles):
+        """Forget (row, col) tiles that now exist or can no longer be generated."""
+        with self._connect() as conn:
+            conn.executemany('DELETE FROM missing_tiles WHERE tile_row = ? AND tile_col = ?', tiles)
+        conn.close()
+
+    def release(self, job_id):
+        """Make the tiles of a job that did not generate them schedulable again."""
+        with self._connect() as conn:
+            conn.execute('UPDATE missing_tiles SET job_id = NULL WHERE job_id = ?', (job_id,))
+        conn.close()
+
+    def release_inactive(self, active_job_ids):
+        """Make tiles schedulable again whose job is no longer queued or running."""
+        active_job_ids = list(active_job_ids)
+        query = 'UPDATE missing_tiles SET job_id = NULL WHERE job_id IS NOT NULL'
+        if active_job_ids:
+            query += f" AND job_id NOT IN ({','.join('?' * len(active_job_ids))})"
+        with self._connect() as conn:
+            conn.execute(query, active_job_ids)
+        conn.close()
+
+    def stats(self):
+        self.flush()
+        with self._connect() as conn:
+            row = conn.execute('SELECT COUNT(*) AS tiles, COALESCE(SUM(request_count), 0) AS requests, '
+                               'COUNT(job_id) AS scheduled FROM missing_tiles').fetchone()
+        conn.close()
+        return dict(row)
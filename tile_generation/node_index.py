@@ -0,0 +1,243 @@
+"""Node location index selection for OSM ingest.
+
+pyosmium keeps the location of every node in an index while reading a file
+so ways can be turned into geometry. The default in-memory index needs about
+16 bytes per node, which does not fit in RAM for a full province PBF on a
+small build box; file-backed indexes keep it on disk and let the OS page it.
+A persistent cache keeps the locations of a province PBF between runs, so
+regions sharing that PBF do not store every node again. It is indexed by
+node ID, so it can take 8 bytes for every node ID in OSM, not for every
+node of the province, and is only built when the disk has room for that.
+"""
+
+import os
+import json
+import shutil
+import threading
+from pathlib import Path
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Index types offered to the admin (see osmium.index.map_types())
+NODE_INDEX_TYPES = (
+    'auto',
+    'flex_mem',
+    'sparse_mem_array',
+    'sparse_mmap_array',
+    'dense_mmap_array',
+    'sparse_file_array',
+    'dense_file_array',
+)
+
+# Index types stored in a file under the node index directory
+FILE_INDEX_TYPES = ('sparse_file_array', 'dense_file_array')
+
+# A PBF stores about one node per 8 bytes; a sparse index entry takes 16
+PBF_BYTES_PER_NODE = 8
+SPARSE_INDEX_BYTES_PER_NODE = 16
+
+# Share of available memory the in-memory index may take before 'auto'
+# switches to an index on disk
+DEFAULT_MEMORY_FRACTION = 0.5
+
+
+def available_memory():
+    """Get the available physical memory in bytes, or None if unknown."""
+    if psutil is not None:
+        try:
+            return psutil.virtual_memory().available
+        except Exception:
+            pass
+
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def estimate_index_bytes(osm_file):
+    """Estimate the size of an in-memory sparse index for every node of osm_file."""
+    return Path(osm_file).stat().st_size // PBF_BYTES_PER_NODE * SPARSE_INDEX_BYTES_PER_NODE
+
+
+def _format_mb(size):
+    return f"{size / (1024 * 1024):,.0f} MB"
+
+
+def choose_node_index(osm_file, index_dir, requested='auto', memory_fraction=DEFAULT_MEMORY_FRACTION):
+    """Pick the node location index for reading osm_file.
+
+    Returns a dict with the index 'type', the 'idx' string for pyosmium, the
+    index 'file' (file-backed types only, else None), whether to
+    'track_references' (store only nodes of rendered ways) and a 'reason'
+    for the progress log. 'auto' uses flex_mem while the estimated index
+    fits in memory_fraction of the available memory, otherwise a sparse
+    file array on disk holding only the referenced nodes.
+    """
+    requested = requested or 'auto'
+    if requested not in NODE_INDEX_TYPES:
+        raise ValueError(f"Unknown node index type {requested!r}; use one of {', '.join(NODE_INDEX_TYPES)}")
+
+    estimate = estimate_index_bytes(osm_file)
+    available = available_memory()
+    sizes = f"PBF {_format_mb(Path(osm_file).stat().st_size)}, index ~{_format_mb(estimate)}"
+    if available is not None:
+        sizes += f", {_format_mb(available)} available"
+
+    track_references = False
+    if requested != 'auto':
+        index_type = requested
+        reason = f"configured ({sizes})"
+    elif available is None or estimate <= available * memory_fraction:
+        index_type = 'flex_mem'
+        reason = f"fits in memory ({sizes})" if available is not None else f"memory unknown ({sizes})"
+    else:
+        index_type = 'sparse_file_array'
+        track_references = True
+        reason = f"too large for memory ({sizes})"
+
+    index_file = None
+    idx = index_type
+    if index_type in FILE_INDEX_TYPES:
+        Path(index_dir).mkdir(parents=True, exist_ok=True)
+        index_file = Path(index_dir) / f"{Path(osm_file).name}.{index_type}.idx"
+        idx = f"{index_type},{index_file}"
+
+    return {
+        'type': index_type,
+        'idx': idx,
+        'file': index_file,
+        'track_references': track_references,
+        'reason': reason
+    }
+
+
+# Persistent per-PBF node location cache. A dense file array is indexed by
+# node ID, so it can be reopened and used as is; it is a sparse file of
+# 8 bytes x the highest node ID it stores.
+NODE_CACHE_TYPE = 'dense_file_array'
+NODE_CACHE_BYTES_PER_ID = 8
+
+# Upper bound on OSM node IDs, with headroom (about 14 billion were
+# assigned by late 2026); NODE_CACHE_MAX_NODE_ID raises it as OSM grows
+MAX_NODE_ID = 16_000_000_000
+
+
+def estimate_node_cache_bytes(max_node_id=MAX_NODE_ID):
+    """Get the disk space a node cache may take: 8 bytes for every node ID up to max_node_id.
+
+    Node IDs are assigned worldwide in order of creation, so a province's
+    nodes are scattered over the whole ID range. A 4 KiB page of the dense
+    file covers 512 IDs, and almost every page ends up holding at least
+    one of the province's nodes, so the file is allocated close to its
+    full apparent size whatever the province's node count. A sparse index
+    estimate from the PBF size is far too low for it.
+    """
+    return (max_node_id + 1) * NODE_CACHE_BYTES_PER_ID
+
+
+def node_cache_paths(osm_file, index_dir):
+    """Get the (cache file, metadata file) of osm_file's node location cache."""
+    cache_file = Path(index_dir) / f"{Path(osm_file).name}.node-cache"
+    return cache_file, cache_file.with_name(cache_file.name + '.json')
+
+
+def _source_fingerprint(osm_file):
+    stat = Path(osm_file).stat()
+    return {'source_file': str(osm_file), 'source_size': stat.st_size, 'source_mtime': stat.st_mtime}
+
+
+def open_node_cache(osm_file, index_dir, max_node_id=MAX_NODE_ID):
+    """Get the node location index for osm_file from its persistent cache.
+
+    If the cache was completed for the current version of osm_file (same
+    size and mtime) it is returned with 'warm' set and node locations need
+    not be stored again. Otherwise any stale cache is removed and a new one
+    is built in 'build_file'; finish_node_cache moves it into place once the
+    pass over osm_file has stored every node. Returns None, to use an
+    index from choose_node_index instead, if the disk holding index_dir has
+    less free space than a cache of every node ID up to max_node_id could
+    take (see estimate_node_cache_bytes), so a build never fills the disk.
+    """
+    cache_file, meta_file = node_cache_paths(osm_file, index_dir)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        with open(meta_file) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        metadata = None
+
+    current = _source_fingerprint(osm_file)
+    if metadata == current and cache_file.exists():
+        return {
+            'type': NODE_CACHE_TYPE,
+            'idx': f"{NODE_CACHE_TYPE},{cache_file}",
+            'file': None,
+            'build_file': None,
+            'warm': True,
+            'track_references': False,
+            'reason': f"cached for {Path(osm_file).name} ({_format_mb(cache_file.stat().st_blocks * 512)} on disk)"
+        }
+
+    remove_node_cache(osm_file, index_dir)
+
+    if shutil.disk_usage(cache_file.parent).free < estimate_node_cache_bytes(max_node_id):
+        return None
+
+    build_file = cache_file.with_name(f"{cache_file.name}.building-{os.getpid()}-{threading.get_ident()}")
+    return {
+        'type': NODE_CACHE_TYPE,
+        'idx': f"{NODE_CACHE_TYPE},{build_file}",
+        'file': None,
+        'build_file': build_file,
+        'warm': False,
+        'track_references': False,
+        'reason': f"building cache for {Path(osm_file).name}" + (" (source changed)" if metadata else "")
+    }
+
+
+def finish_node_cache(node_index, osm_file, index_dir):
+    """Move a completely built node location cache into place."""
+    if not node_index.get('build_file'):
+        return
+    cache_file, meta_file = node_cache_paths(osm_file, index_dir)
+    os.replace(node_index['build_file'], cache_file)
+    with open(meta_file, 'w') as f:
+        json.dump(_source_fingerprint(osm_file), f)
+
+
+def remove_node_cache(osm_file, index_dir):
+    """Delete osm_file's node location cache, if it has one."""
+    for path in node_cache_paths(osm_file, index_dir):
+        if path.exists():
+            path.unlink()
+
+
+def discard_node_cache(node_index):
+    """Remove a partly built node location cache."""
+    build_file = node_index.get('build_file')
+    if build_file and Path(build_file).exists():
+        Path(build_file).unlink()
+
+
+def clear_node_caches(index_dir):
+    """Delete every node location cache; return (files removed, bytes freed on disk)."""
+    removed = 0
+    freed = 0
+    for path in Path(index_dir).glob('*.node-cache*'):
+        freed += path.stat().st_blocks * 512
+        path.unlink()
+        removed += 1
+    return removed, freed
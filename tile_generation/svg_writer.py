@@ -0,0 +1,118 @@
+"""Streaming SVG serializer for tiles.
+
+Writes elements straight to a text stream (normally the gzip file of a tile)
+instead of building the whole document, serializing it with tostring and
+re-parsing it with minidom. Escaping follows minidom's writer so the output
+matches the previous toprettyxml output; with pretty=True it is identical,
+otherwise the indentation and newlines between elements are left out.
+"""
+
+# Buffered output is flushed to the stream once it reaches this many characters
+FLUSH_SIZE = 65536
+
+
+def escape(data):
+    """Escape text or an attribute value the way minidom writes it."""
+    if not data:
+        return ''
+    return (data.replace('&', '&amp;').replace('<', '&lt;')
+            .replace('"', '&quot;').replace('>', '&gt;'))
+
+
+class DigestStream:
+    """Text stream wrapper that hashes everything written through it."""
+
+    def __init__(self, stream, digest, encoding='utf-8'):
+        self.stream = stream
+        self.digest = digest
+        self.encoding = encoding
+
+    def write(self, data):
+        self.digest.update(data.encode(self.encoding))
+        return self.stream.write(data)
+
+
+class SVGWriter:
+    """Write an SVG document element by element to a text stream."""
+
+    def __init__(self, stream, pretty=False):
+        self.stream = stream
+        self.pretty = pretty
+        self.indent = '  ' if pretty else ''
+        self.newline = '\n' if pretty else ''
+        self.open_tags = []
+        self.start_pending = False
+        self.buffer = []
+        self.buffered = 0
+
+    def write(self, data):
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Write buffered output to the stream."""
+        if self.buffer:
+            self.stream.write(''.join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+
+    def declaration(self):
+        """Write the XML declaration."""
+        self.write('<?xml version="1.0" ?>' + self.newline)
+
+    def _close_pending_start(self):
+        # A start tag stays open until we know whether the element has children
+        if self.start_pending:
+            self.write('>' + self.newline)
+            self.start_pending = False
+
+    def _start_tag(self, tag, attributes):
+        parts = [self.indent * len(self.open_tags), '<', tag]
+        for name, value in attributes.items():
+            parts.append(f' {name}="{escape(value)}"')
+        self.write(''.join(parts))
+
+    def start(self, tag, attributes):
+        """Open an element whose children will be written next."""
+        self._close_pending_start()
+        self._start_tag(tag, attributes)
+        self.open_tags.append(tag)
+        self.start_pending = True
+
+    def end(self):
+        """Close the most recently opened element."""
+        tag = self.open_tags.pop()
+        if self.start_pending:
+            self.write('/>' + self.newline)
+            self.start_pending = False
+        else:
+            self.write(self.indent * len(self.open_tags) + f'</{tag}>' + self.newline)
+
+    def text_element(self, tag, attributes, text):
+        """Write an element holding only text."""
+        self._close_pending_start()
+        self._start_tag(tag, attributes)
+        if text:
+            self.write(f'>{escape(text)}</{tag}>' + self.newline)
+        else:
+            self.write('/>' + self.newline)
+
+    def element(self, element):
+        """Write an ElementTree element and its children."""
+        children = list(element)
+        if not children:
+            self.text_element(element.tag, element.attrib, element.text)
+            return
+
+        self.start(element.tag, element.attrib)
+        for child in children:
+            self.element(child)
+        self.end()
+
+    def close(self):
+        """Close any open elements and flush to the stream."""
+        while self.open_tags:
+            self.end()
+        self.flush()
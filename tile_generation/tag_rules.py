@@ -0,0 +1,432 @@
+"""OSM tag classification rules for OSMHandler.
+
+Each rule maps tag values to a feature category. Rules are grouped into
+ordered chains; within a chain the first matching rule wins, exactly like the
+if/elif blocks they replace. Chains are compiled once at import into a
+(key, value) -> rule index so classifying an element costs a few dict lookups
+per tag instead of scanning every rule.
+
+Rule fields:
+    category   feature category the element is added to
+    match      {key: values} - the rule matches if any key has one of its
+               values (ANY matches any value, i.e. the key is present)
+    require    optional {key: values} that must all also match
+    exclude    optional {key: values}; the rule is skipped if all match
+    action     way geometry: 'polygon', 'line', 'polygon_or_line', or a
+               special case handled by OSMHandler.way
+    properties extra properties added to the feature
+    derive_healthcare_type  set healthcare_type from the amenity tag
+"""
+
+# Match any value of a key (tag presence)
+ANY = None
+
+
+class TagRuleIndex:
+    """Hashed (key, value) -> rule lookup compiled from ordered rule chains."""
+
+    def __init__(self, chains):
+        self.rules = []
+        self.rule_chains = []
+        value_index = {}
+        key_index = {}
+
+        for chain_number, chain in enumerate(chains):
+            for rule in chain:
+                rule_number = len(self.rules)
+                self.rules.append(rule)
+                self.rule_chains.append(chain_number)
+
+                for key, values in rule['match'].items():
+                    if values is ANY:
+                        key_index.setdefault(key, []).append(rule_number)
+                    else:
+                        for value in values:
+                            value_index.setdefault((key, value), []).append(rule_number)
+
+        self.value_index = {key: tuple(numbers) for key, numbers in value_index.items()}
+        self.key_index = {key: tuple(numbers) for key, numbers in key_index.items()}
+        self.keys = frozenset(key for key, _ in self.value_index) | frozenset(self.key_index)
+
+    def _candidates(self, tags):
+        """Get the numbers of rules whose match terms hit tags, in precedence order."""
+        value_index = self.value_index
+        key_index = self.key_index
+        hits = []
+
+        for key, value in tags.items():
+            numbers = value_index.get((key, value))
+            if numbers:
+                hits.extend(numbers)
+            numbers = key_index.get(key)
+            if numbers:
+                hits.extend(numbers)
+
+        if len(hits) > 1:
+            hits.sort()
+        return hits
+
+    def _conditions_hold(self, rule, tags):
+        require = rule.get('require')
+        if require and not _all_match(require, tags):
+            return False
+        exclude = rule.get('exclude')
+        if exclude and _all_match(exclude, tags):
+            return False
+        return True
+
+    def first(self, tags):
+        """Get the first matching rule, or None. For single-chain indexes."""
+        for rule_number in self._candidates(tags):
+            rule = self.rules[rule_number]
+            if self._conditions_hold(rule, tags):
+                return rule
+        return None
+
+    def match(self, tags):
+        """Get the first matching rule of every chain, in chain order."""
+        candidates = self._candidates(tags)
+        if not candidates:
+            return []
+
+        matched = []
+        matched_chains = set()
+
+        for rule_number in candidates:
+            chain_number = self.rule_chains[rule_number]
+            if chain_number in matched_chains:
+                continue
+            rule = self.rules[rule_number]
+            if self._conditions_hold(rule, tags):
+                matched_chains.add(chain_number)
+                matched.append(rule)
+
+        return matched
+
+
+def _all_match(terms, tags):
+    for key, values in terms.items():
+        if key not in tags or (values is not ANY and tags[key] not in values):
+            return False
+    return True
+
+
+# Point features. The first chain is the main category chain; the rest are
+# independent checks that can add the same node to further categories.
+NODE_RULES = (
+    (
+        # Healthcare facilities (amenity-based)
+        {'category': 'healthcare', 'properties': {'healthcare_type': 'amenity'},
+         'match': {'amenity': ('hospital', 'clinic', 'doctors', 'dentist', 'pharmacy', 'veterinary')}},
+        # Healthcare facilities (healthcare-based)
+        {'category': 'healthcare', 'properties': {'healthcare_type': 'healthcare'},
+         'match': {'healthcare': ('alternative', 'audiologist', 'birthing_centre', 'blood_bank', 'blood_donation', 'centre', 'clinic', 'counselling', 'dentist', 'dialysis', 'doctor', 'hospice', 'hospital', 'laboratory', 'midwife', 'nurse', 'occupational_therapist', 'optometrist', 'pharmacy', 'physiotherapist', 'podiatrist', 'psychotherapist', 'rehabilitation', 'sample_collection', 'speech_therapist', 'vaccination_centre')}},
+        # Food & Sustenance establishments (amenity and shop-based)
+        {'category': 'food_sustenance',
+         'match': {'amenity': ('restaurant', 'cafe', 'fast_food', 'bar', 'pub', 'food_court', 'ice_cream', 'biergarten', 'nightclub'), 'shop': ('alcohol', 'bakery', 'beverages', 'butcher', 'cheese', 'chocolate', 'coffee', 'confectionery', 'convenience', 'deli', 'farm', 'frozen_food', 'greengrocer', 'health_food', 'nuts', 'pastry', 'seafood', 'tea', 'wine', 'supermarket')}},
+        # Financial Services establishments
+        {'category': 'financial_services',
+         'match': {'amenity': ('bank', 'atm', 'post_office', 'bureau_de_change', 'money_transfer', 'payment_centre')}},
+        # Shopping & Retail establishments (shop and amenity-based)
+        {'category': 'shopping_retail',
+         'match': {'shop': ('department_store', 'general', 'kiosk', 'mall', 'supermarket', 'wholesale', 'variety_store', 'second_hand', 'charity', 'clothes', 'shoes', 'bag', 'boutique', 'fabric', 'jewelry', 'leather', 'watches', 'tailor', 'computer', 'electronics', 'mobile_phone', 'hifi', 'telecommunication', 'beauty', 'chemist', 'cosmetics', 'hairdresser', 'massage', 'optician', 'perfumery', 'tattoo', 'furniture', 'garden_centre', 'hardware', 'doityourself', 'florist', 'greengrocer', 'appliance'), 'amenity': ('marketplace', 'vending_machine')}},
+        # Public Facilities - Comprehensive coverage of essential public amenities
+        {'category': 'public_facilities',
+         'match': {'amenity': ('toilets', 'shower', 'drinking_water', 'bench', 'shelter', 'bicycle_repair_station', 'charging_station', 'waste_basket', 'recycling')}},
+        # Emergency Services - Comprehensive coverage of emergency and safety facilities
+        {'category': 'emergency_services',
+         'match': {'amenity': ('police', 'fire_station'), 'emergency': ('phone', 'defibrillator', 'fire_hydrant', 'assembly_point', 'siren')}},
+        # Tourism & Accommodation - Comprehensive coverage of tourist facilities and lodging
+        {'category': 'tourism_accommodation',
+         'match': {'tourism': ('hotel', 'hostel', 'guest_house', 'camp_site', 'attraction', 'museum', 'gallery', 'viewpoint', 'information', 'artwork', 'zoo')}},
+        # Entertainment & Culture - Comprehensive coverage of cultural and recreational facilities
+        {'category': 'entertainment_culture',
+         'match': {'amenity': ('cinema', 'theatre', 'library', 'community_centre', 'arts_centre', 'social_centre'), 'leisure': ('sports_centre', 'swimming_pool', 'golf_course', 'stadium', 'fitness_centre', 'bowling_alley', 'amusement_arcade')}},
+        # Automotive Services - Comprehensive coverage of vehicle-related services and infrastructure
+        {'category': 'automotive_services',
+         'match': {'amenity': ('fuel', 'car_wash', 'car_rental', 'car_sharing', 'vehicle_inspection', 'compressed_air', 'driver_training', 'parking_entrance', 'motorcycle_parking'), 'shop': ('car', 'car_parts', 'car_repair', 'motorcycle', 'motorcycle_repair', 'tyres', 'truck', 'trailer'), 'highway': ('motorway_junction', 'services', 'rest_area', 'emergency_bay', 'toll_gantry')}},
+        # Office & Professional Services - Comprehensive coverage of business and professional facilities
+        {'category': 'office_professional',
+         'match': {'office': ('company', 'government', 'lawyer', 'estate_agent', 'insurance', 'architect', 'accountant', 'employment_agency', 'consulting', 'financial', 'it', 'research', 'ngo', 'association', 'diplomatic', 'educational_institution', 'foundation', 'political_party', 'religion', 'tax_advisor', 'therapist', 'travel_agent', 'physician', 'coworking', 'notary', 'newspaper', 'advertising_agency', 'logistics', 'construction_company', 'energy_supplier', 'guide', 'water_utility', 'property_management', 'telecommunication')}},
+        # Craft & Specialized Services - Workshops, artisans, and small production facilities
+        {'category': 'craft_specialized_services',
+         'match': {'craft': ('brewery', 'carpenter', 'electrician', 'plumber', 'tailor', 'shoemaker')}},
+        # Communication & Technology - Communication infrastructure and technology services
+        {'category': 'communication_technology',
+         'match': {'amenity': ('post_box', 'telephone'), 'telecom': ('data_center',)}},
+        # Education & Childcare - Educational institutions and childcare facilities
+        {'category': 'education_childcare',
+         'match': {'amenity': ('childcare', 'language_school', 'driving_school', 'music_school', 'research_institute')}},
+        # Sports & Fitness Facilities - Sports venues, fitness equipment, and recreational facilities
+        {'category': 'sports_fitness',
+         'match': {'leisure': ('fitness_station', 'track', 'pitch', 'marina', 'slipway'), 'sport': ('tennis', 'football', 'soccer', 'basketball', 'baseball', 'swimming', 'athletics', 'golf', 'hockey', 'volleyball', 'badminton', 'squash', 'table_tennis', 'boxing', 'martial_arts', 'climbing', 'cycling', 'running', 'fitness', 'gym', 'yoga', 'dance', 'skateboard', 'bmx', 'equestrian', 'sailing', 'rowing', 'canoe', 'surfing')}},
+        # Agricultural & Rural Features - Comprehensive coverage of farming, rural infrastructure, and agricultural facilities
+        {'category': 'agricultural_rural',
+         'match': {'landuse': ('orchard', 'vineyard', 'allotments', 'farmyard', 'farmland', 'animal_keeping', 'plant_nursery', 'greenhouse_horticulture', 'aquaculture', 'salt_pond'), 'man_made': ('silo', 'storage_tank', 'bunker_silo', 'windmill', 'watermill', 'windpump', 'watering_place'), 'building': ('farm_auxiliary', 'barn', 'stable', 'sty', 'greenhouse', 'cowshed', 'chicken_coop', 'farm'), 'amenity': ('animal_shelter', 'animal_boarding', 'veterinary'), 'craft': ('agricultural_engines', 'beekeeper', 'distillery', 'winery'), 'shop': ('farm', 'garden_centre', 'agrarian', 'feed'), 'leisure': ('fishing', 'garden'), 'natural': ('tree_row',), 'agriculture': ('greenhouse', 'crop', 'livestock', 'dairy', 'poultry', 'beekeeping'), 'produce': ('fruit', 'vegetable', 'grain', 'dairy', 'meat', 'eggs', 'honey')}},
+        # Military & Government Features - Comprehensive coverage of military installations and government facilities
+        {'category': 'military_government',
+         'match': {'military': ('airfield', 'base', 'bunker', 'barracks', 'checkpoint', 'danger_area', 'nuclear_explosion_site', 'obstacle_course', 'office', 'range', 'training_area', 'naval_base', 'depot', 'academy', 'hospital'), 'government': ('administrative', 'archive', 'courthouse', 'customs', 'diplomatic', 'embassy', 'fire_department', 'legislative', 'library', 'military', 'ministry', 'office', 'parliament', 'police', 'prison', 'public_service', 'register_office', 'social_services', 'taxation', 'town_hall'), 'amenity': ('courthouse', 'prison', 'police', 'fire_station', 'embassy', 'townhall', 'customs', 'ranger_station'), 'building': ('government', 'military', 'courthouse', 'prison', 'fire_station', 'police'), 'landuse': ('military', 'government'), 'office': ('government', 'diplomatic', 'administrative', 'military'), 'diplomatic': ('embassy', 'consulate', 'delegation', 'mission'), 'public_service': ('social_services', 'employment_agency', 'tax_office')}},
+        # Leisure & Entertainment Details - Comprehensive coverage of specialized leisure and entertainment venues
+        {'category': 'leisure_entertainment_details',
+         'match': {'leisure': ('dance', 'escape_game', 'hackerspace', 'adult_gaming_centre', 'miniature_golf', 'arcade', 'bingo_hall', 'casino', 'gambling', 'social_club', 'sauna', 'bandstand', 'bleachers', 'maze', 'shooting_range', 'disc_golf', 'picnic_table', 'firepit', 'bbq'), 'amenity': ('casino', 'gambling', 'game_feeding', 'karaoke_box', 'love_hotel', 'nightclub', 'planetarium', 'social_facility', 'stripclub', 'swingerclub', 'brothel', 'studio'), 'shop': ('games', 'lottery', 'video_games', 'music', 'musical_instrument', 'video', 'books', 'art', 'craft', 'hobby'), 'club': ('sport', 'social', 'veterans', 'youth', 'senior', 'community', 'photography', 'computer', 'automobile'), 'tourism': ('theme_park', 'aquarium', 'zoo'), 'sport': ('billiards', 'darts', 'chess', 'go', 'beachvolleyball'), 'craft': ('brewery', 'distillery', 'winery'), 'entertainment': ('escape_room', 'laser_tag', 'paintball', 'axe_throwing', 'virtual_reality')}},
+        # Power & Utilities Infrastructure - Comprehensive coverage of electrical and utility infrastructure
+        {'category': 'power_utilities',
+         'match': {'power': ('line', 'minor_line', 'cable', 'pole', 'tower', 'substation', 'transformer', 'generator', 'plant', 'switch', 'converter', 'compensator', 'portal', 'terminal', 'insulator', 'busbar', 'bay'), 'utility': ('gas', 'water', 'sewerage', 'telecom', 'electrical', 'power'), 'man_made': ('pipeline', 'pumping_station', 'storage_tank', 'water_tower', 'gasometer', 'silo'), 'pipeline': ('gas', 'oil', 'water', 'sewerage', 'district_heating', 'steam', 'hot_water'), 'telecom': ('data_center', 'exchange', 'service_device')}},
+        # Man-made Structures - Comprehensive coverage of human-built infrastructure and structures
+        {'category': 'man_made_structures',
+         'match': {'man_made': ('bridge', 'tunnel', 'tower', 'mast', 'antenna', 'chimney', 'pier', 'breakwater', 'groyne', 'lighthouse', 'windmill', 'watermill', 'windpump', 'adit', 'mineshaft', 'crane', 'kiln', 'works', 'embankment', 'cutline', 'dyke', 'levee', 'retaining_wall', 'city_wall', 'dike', 'surveillance', 'monitoring_station', 'survey_point', 'beacon', 'communication_tower', 'observatory', 'telescope', 'flagpole', 'cross', 'obelisk', 'column', 'campanile', 'bunker_silo', 'reservoir_covered', 'clearcut')}},
+        # Barriers & Boundaries - Comprehensive coverage of physical barriers and administrative boundaries
+        {'category': 'barriers_boundaries',
+         'match': {'barrier': ('fence', 'wall', 'hedge', 'gate', 'bollard', 'kerb', 'block', 'bollards', 'chain', 'rope', 'handrail', 'guardrail', 'cable_barrier', 'jersey_barrier', 'lift_gate', 'swing_gate', 'toll_booth', 'turnstile', 'stile', 'chicane', 'motorcycle_barrier', 'height_restrictor', 'sally_port', 'tank_trap', 'border_control', 'cycle_barrier', 'entrance', 'ditch', 'debris', 'log', 'spikes'), 'boundary': ('administrative', 'national_park', 'postal_code', 'political', 'civil', 'maritime', 'territorial_waters', 'low_emission_zone', 'traffic_calming', 'census', 'parish', 'statistical', 'lot', 'parcel', 'forest', 'marker')}},
+        # Historic & Cultural Sites - Comprehensive coverage of historical sites, monuments, cultural attractions, and archaeological features
+        {'category': 'historic_cultural',
+         'match': {'historic': ('archaeological_site', 'battlefield', 'boundary_stone', 'building', 'castle', 'church', 'city_gate', 'citywalls', 'fort', 'heritage', 'manor', 'memorial', 'monastery', 'monument', 'ruins', 'tomb', 'tower', 'wayside_cross', 'wayside_shrine', 'wreck', 'pillory', 'stocks', 'gallows', 'aircraft', 'anchor', 'cannon', 'locomotive', 'ship', 'tank', 'vehicle', 'milestone', 'obelisk', 'stone', 'cross', 'statue', 'plaque', 'blue_plaque', 'ghost_sign', 'bunker', 'bridge', 'aqueduct', 'optical_telegraph', 'railway_car', 'highwater_mark', 'pa_system'), 'tourism': ('museum', 'gallery', 'artwork', 'attraction', 'theme_park'), 'amenity': ('grave_yard',), 'cultural': ('museum', 'gallery', 'theatre', 'cinema', 'library', 'archive', 'cultural_centre', 'arts_centre', 'community_centre')}},
+        # Enhanced Natural Features - Comprehensive coverage of terrain, landscape, and landuse features
+        {'category': 'natural_features',
+         'match': {'natural': ('forest', 'wood', 'grassland', 'cliff', 'peak', 'valley', 'scrub', 'heath', 'sand', 'rock', 'scree', 'bare_rock', 'cave_entrance'), 'landuse': ('residential', 'commercial', 'industrial', 'retail', 'farmland', 'forest', 'orchard', 'vineyard', 'cemetery', 'military', 'quarry', 'construction', 'allotments', 'education', 'institutional', 'farmyard', 'brownfield', 'garages', 'greenfield', 'depot', 'port', 'railway', 'religious', 'fairground', 'meadow', 'plant_nursery', 'conservation', 'landfill', 'logging', 'greenhouse_horticulture')}},
+        # Comprehensive Transit Infrastructure
+        {'category': 'transit',
+         'match': {'highway': ('bus_stop', 'platform'), 'railway': ('station', 'halt', 'platform', 'subway', 'tram', 'tram_stop', 'stop', 'subway_entrance'), 'public_transport': ('platform', 'stop_position', 'station'), 'amenity': ('bus_station', 'ferry_terminal'), 'aerialway': ('station', 'loading_point'), 'aeroway': ('terminal', 'gate')}},
+    ),
+    (
+        # Accessibility features
+        {'category': 'accessibility', 'require': {'wheelchair': ('yes',)},
+         'match': {'amenity': ('parking',)}},
+        # Water features (point features)
+        {'category': 'water',
+         'match': {'amenity': ('fountain', 'swimming_pool'), 'natural': ('spring', 'hot_spring', 'geyser'), 'man_made': ('water_tower', 'water_well', 'water_works', 'lighthouse'), 'leisure': ('boat_sharing',), 'waterway': ('waterfall', 'lock_gate', 'fuel')}},
+    ),
+    (
+        # Park amenities (playgrounds)
+        {'category': 'parks',
+         'match': {'amenity': ('playground',)}},
+    ),
+    (
+        # Individual trees
+        {'category': 'vegetation',
+         'match': {'natural': ('tree',)}},
+    ),
+    (
+        # Religious places (nodes)
+        {'category': 'religious',
+         'match': {'amenity': ('place_of_worship',)}},
+    ),
+    (
+        # Parking (nodes - bicycle/motorcycle parking stands)
+        {'category': 'parking', 'exclude': {'amenity': ('parking',), 'wheelchair': ('yes',)},
+         'match': {'amenity': ('parking', 'bicycle_parking', 'motorcycle_parking')}},
+    ),
+    (
+        # Sensory accessibility features
+        {'category': 'sensory_accessibility',
+         'match': {'tactile_paving': ('yes', 'no'), 'traffic_signals:sound': ('yes',), 'traffic_signals:vibration': ('yes',), 'acoustic': ('voice_description',), 'braille': ('yes',), 'audio_loop': ('yes',), 'sign_language': ('yes',)}},
+    ),
+    (
+        # Accessible facilities features
+        {'category': 'accessible_facilities',
+         'match': {'toilets:wheelchair': ('yes', 'no'), 'changing_table': ('yes', 'no'), 'elevator': ('yes', 'no'), 'escalator': ('yes', 'no'), 'conveying': ('yes', 'no'), 'automatic_door': ('yes', 'no'), 'door:width': ANY, 'kerb:height': ANY, 'incline': ANY, 'highway': ('elevator', 'escalator')}},
+    ),
+    (
+        # Mobility access features
+        {'category': 'mobility_access',
+         'match': {'wheelchair': ANY, 'ramp': ('yes',), 'ramp:wheelchair': ('yes',), 'ramp:stroller': ('yes',), 'ramp:bicycle': ('yes',), 'step_count': ANY, 'handrail': ('yes',), 'handrail:center': ('yes',), 'handrail:left': ('yes',), 'handrail:right': ('yes',)}},
+    ),
+    (
+        # Accessible transport features
+        {'category': 'accessible_transport',
+         'match': {'capacity:disabled': ANY, 'parking:disabled': ('yes',), 'priority': ('disabled',), 'bus:wheelchair': ('yes',), 'subway:wheelchair': ('yes',), 'tram:wheelchair': ('yes',), 'train:wheelchair': ('yes',)}},
+    ),
+)
+
+# Way features (lines and closed-way polygons), first match wins
+WAY_RULES = (
+    # Buildings
+    {'category': 'buildings', 'action': 'polygon',
+     'match': {'building': ANY}},
+    # Roads
+    {'category': 'roads', 'action': 'line',
+     'match': {'highway': ('motorway', 'trunk', 'primary', 'secondary', 'tertiary', 'residential', 'service', 'unclassified', 'pedestrian', 'footway', 'cycleway', 'path', 'living_street', 'track', 'bus_guideway', 'escape', 'raceway', 'road', 'busway', 'motorway_link', 'trunk_link', 'primary_link', 'secondary_link', 'tertiary_link', 'bridleway', 'steps', 'corridor', 'sidewalk')}},
+    # Water features (rivers, streams, etc.)
+    {'category': 'water', 'action': 'line',
+     'match': {'waterway': ('river', 'stream', 'canal', 'drain', 'ditch')}},
+    # Transit Infrastructure (lines and areas)
+    {'category': 'transit', 'action': 'line',
+     'match': {'railway': ('rail', 'subway', 'tram', 'light_rail', 'narrow_gauge', 'funicular', 'monorail'), 'highway': ('bus_guideway',), 'aerialway': ('cable_car', 'gondola', 'chair_lift', 'drag_lift', 'rope_tow', 'zip_line')}},
+    # Transit Infrastructure (areas - stations, terminals, platforms)
+    {'category': 'transit', 'action': 'polygon_or_line',
+     'match': {'railway': ('platform',), 'public_transport': ('platform', 'station'), 'amenity': ('bus_station', 'ferry_terminal'), 'aeroway': ('terminal', 'runway', 'taxiway', 'aerodrome'), 'aerialway': ('station',)}},
+    # Healthcare facilities (as areas/buildings)
+    {'category': 'healthcare', 'action': 'polygon', 'derive_healthcare_type': True,
+     'match': {'amenity': ('hospital', 'clinic', 'doctors', 'dentist', 'pharmacy', 'veterinary'), 'healthcare': ('alternative', 'audiologist', 'birthing_centre', 'blood_bank', 'blood_donation', 'centre', 'clinic', 'counselling', 'dentist', 'dialysis', 'doctor', 'hospice', 'hospital', 'laboratory', 'midwife', 'nurse', 'occupational_therapist', 'optometrist', 'pharmacy', 'physiotherapist', 'podiatrist', 'psychotherapist', 'rehabilitation', 'sample_collection', 'speech_therapist', 'vaccination_centre')}},
+    # Food & Sustenance establishments (as areas/buildings)
+    {'category': 'food_sustenance', 'action': 'polygon',
+     'match': {'amenity': ('restaurant', 'cafe', 'fast_food', 'bar', 'pub', 'food_court', 'ice_cream', 'biergarten', 'nightclub'), 'shop': ('alcohol', 'bakery', 'beverages', 'butcher', 'cheese', 'chocolate', 'coffee', 'confectionery', 'convenience', 'deli', 'farm', 'frozen_food', 'greengrocer', 'health_food', 'nuts', 'pastry', 'seafood', 'tea', 'wine', 'supermarket')}},
+    # Financial Services establishments (as areas/buildings)
+    {'category': 'financial_services', 'action': 'polygon',
+     'match': {'amenity': ('bank', 'atm', 'post_office', 'bureau_de_change', 'money_transfer', 'payment_centre')}},
+    # Shopping & Retail establishments (as areas/buildings)
+    {'category': 'shopping_retail', 'action': 'polygon',
+     'match': {'shop': ('department_store', 'general', 'kiosk', 'mall', 'supermarket', 'wholesale', 'variety_store', 'second_hand', 'charity', 'clothes', 'shoes', 'bag', 'boutique', 'fabric', 'jewelry', 'leather', 'watches', 'tailor', 'computer', 'electronics', 'mobile_phone', 'hifi', 'telecommunication', 'beauty', 'chemist', 'cosmetics', 'hairdresser', 'massage', 'optician', 'perfumery', 'tattoo', 'furniture', 'garden_centre', 'hardware', 'doityourself', 'florist', 'appliance'), 'amenity': ('marketplace', 'vending_machine')}},
+    # Public Facilities (as areas/buildings) - Comprehensive coverage
+    {'category': 'public_facilities', 'action': 'polygon',
+     'match': {'amenity': ('toilets', 'shower', 'drinking_water', 'bench', 'shelter', 'bicycle_repair_station', 'charging_station', 'waste_basket', 'recycling')}},
+    # Emergency Services (as areas/buildings) - Comprehensive coverage
+    {'category': 'emergency_services', 'action': 'polygon',
+     'match': {'amenity': ('police', 'fire_station'), 'emergency': ('phone', 'defibrillator', 'fire_hydrant', 'assembly_point', 'siren')}},
+    # Tourism & Accommodation (as areas/buildings) - Comprehensive coverage
+    {'category': 'tourism_accommodation', 'action': 'polygon',
+     'match': {'tourism': ('hotel', 'hostel', 'guest_house', 'camp_site', 'attraction', 'museum', 'gallery', 'viewpoint', 'information', 'artwork', 'zoo')}},
+    # Entertainment & Culture (as areas/buildings) - Comprehensive coverage
+    {'category': 'entertainment_culture', 'action': 'polygon',
+     'match': {'amenity': ('cinema', 'theatre', 'library', 'community_centre', 'arts_centre', 'social_centre'), 'leisure': ('sports_centre', 'swimming_pool', 'golf_course', 'stadium', 'fitness_centre', 'bowling_alley', 'amusement_arcade')}},
+    # Automotive Services (as areas/buildings) - Comprehensive coverage
+    {'category': 'automotive_services', 'action': 'polygon',
+     'match': {'amenity': ('fuel', 'car_wash', 'car_rental', 'car_sharing', 'vehicle_inspection', 'compressed_air', 'driver_training', 'parking', 'parking_entrance', 'motorcycle_parking'), 'shop': ('car', 'car_parts', 'car_repair', 'motorcycle', 'motorcycle_repair', 'tyres', 'truck', 'trailer'), 'highway': ('services', 'rest_area')}},
+    # Office & Professional Services (as areas/buildings) - Comprehensive coverage
+    {'category': 'office_professional', 'action': 'polygon',
+     'match': {'office': ('company', 'government', 'lawyer', 'estate_agent', 'insurance', 'architect', 'accountant', 'employment_agency', 'consulting', 'financial', 'it', 'research', 'ngo', 'association', 'diplomatic', 'educational_institution', 'foundation', 'political_party', 'religion', 'tax_advisor', 'therapist', 'travel_agent', 'physician', 'coworking', 'notary', 'newspaper', 'advertising_agency', 'logistics', 'construction_company', 'energy_supplier', 'guide', 'water_utility', 'property_management', 'telecommunication')}},
+    # Craft & Specialized Services (as areas/workshops) - Workshops, artisans, and small production facilities
+    {'category': 'craft_specialized_services', 'action': 'polygon',
+     'match': {'craft': ('brewery', 'carpenter', 'electrician', 'plumber', 'tailor', 'shoemaker')}},
+    # Communication & Technology (as lines/areas) - Communication infrastructure and technology services
+    {'category': 'communication_technology', 'action': 'communication_line_or_data_center',
+     'match': {'communication': ('line',), 'telecom': ('data_center',)}},
+    # Education & Childcare (as areas/buildings) - Educational institutions and childcare facilities
+    {'category': 'education_childcare', 'action': 'polygon',
+     'match': {'amenity': ('childcare', 'language_school', 'driving_school', 'music_school', 'research_institute')}},
+    # Sports & Fitness Facilities (as areas/tracks) - Sports venues, fitness equipment, and recreational facilities
+    {'category': 'sports_fitness', 'action': 'track_or_polygon',
+     'match': {'leisure': ('fitness_station', 'track', 'pitch', 'marina', 'slipway'), 'sport': ('tennis', 'football', 'soccer', 'basketball', 'baseball', 'swimming', 'athletics', 'golf', 'hockey', 'volleyball', 'badminton', 'squash', 'table_tennis', 'boxing', 'martial_arts', 'climbing', 'cycling', 'running', 'fitness', 'gym', 'yoga', 'dance', 'skateboard', 'bmx', 'equestrian', 'sailing', 'rowing', 'canoe', 'surfing')}},
+    # Agricultural & Rural Features (as areas/facilities) - Comprehensive coverage of farming, rural infrastructure, and agricultural facilities
+    {'category': 'agricultural_rural', 'action': 'tree_row_or_polygon',
+     'match': {'landuse': ('orchard', 'vineyard', 'allotments', 'farmyard', 'farmland', 'animal_keeping', 'plant_nursery', 'greenhouse_horticulture', 'aquaculture', 'salt_pond'), 'man_made': ('silo', 'storage_tank', 'bunker_silo', 'windmill', 'watermill', 'windpump', 'watering_place'), 'building': ('farm_auxiliary', 'barn', 'stable', 'sty', 'greenhouse', 'cowshed', 'chicken_coop', 'farm'), 'amenity': ('animal_shelter', 'animal_boarding', 'veterinary'), 'craft': ('agricultural_engines', 'beekeeper', 'distillery', 'winery'), 'shop': ('farm', 'garden_centre', 'agrarian', 'feed'), 'leisure': ('fishing', 'garden'), 'natural': ('tree_row',), 'agriculture': ('greenhouse', 'crop', 'livestock', 'dairy', 'poultry', 'beekeeping'), 'produce': ('fruit', 'vegetable', 'grain', 'dairy', 'meat', 'eggs', 'honey')}},
+    # Military & Government Features (as areas/facilities) - Comprehensive coverage of military installations and government facilities
+    {'category': 'military_government', 'action': 'polygon',
+     'match': {'military': ('airfield', 'base', 'bunker', 'barracks', 'checkpoint', 'danger_area', 'nuclear_explosion_site', 'obstacle_course', 'office', 'range', 'training_area', 'naval_base', 'depot', 'academy', 'hospital'), 'government': ('administrative', 'archive', 'courthouse', 'customs', 'diplomatic', 'embassy', 'fire_department', 'legislative', 'library', 'military', 'ministry', 'office', 'parliament', 'police', 'prison', 'public_service', 'register_office', 'social_services', 'taxation', 'town_hall'), 'amenity': ('courthouse', 'prison', 'police', 'fire_station', 'embassy', 'townhall', 'customs', 'ranger_station'), 'building': ('government', 'military', 'courthouse', 'prison', 'fire_station', 'police'), 'landuse': ('military', 'government'), 'office': ('government', 'diplomatic', 'administrative', 'military'), 'diplomatic': ('embassy', 'consulate', 'delegation', 'mission'), 'public_service': ('social_services', 'employment_agency', 'tax_office')}},
+    # Leisure & Entertainment Details (as areas/facilities) - Comprehensive coverage of specialized leisure and entertainment venues
+    {'category': 'leisure_entertainment_details', 'action': 'polygon',
+     'match': {'leisure': ('dance', 'escape_game', 'hackerspace', 'adult_gaming_centre', 'miniature_golf', 'arcade', 'bingo_hall', 'casino', 'gambling', 'social_club', 'sauna', 'bandstand', 'bleachers', 'maze', 'shooting_range', 'disc_golf', 'picnic_table', 'firepit', 'bbq'), 'amenity': ('casino', 'gambling', 'game_feeding', 'karaoke_box', 'love_hotel', 'nightclub', 'planetarium', 'social_facility', 'stripclub', 'swingerclub', 'brothel', 'studio'), 'shop': ('games', 'lottery', 'video_games', 'music', 'musical_instrument', 'video', 'books', 'art', 'craft', 'hobby'), 'club': ('sport', 'social', 'veterans', 'youth', 'senior', 'community', 'photography', 'computer', 'automobile'), 'tourism': ('theme_park', 'aquarium', 'zoo'), 'sport': ('billiards', 'darts', 'chess', 'go', 'beachvolleyball'), 'craft': ('brewery', 'distillery', 'winery'), 'entertainment': ('escape_room', 'laser_tag', 'paintball', 'axe_throwing', 'virtual_reality')}},
+    # Power & Utilities Infrastructure (as areas/facilities) - Comprehensive coverage
+    {'category': 'power_utilities', 'action': 'polygon_or_line',
+     'match': {'power': ('substation', 'generator', 'plant', 'transformer'), 'utility': ('gas', 'water', 'sewerage', 'telecom', 'electrical', 'power'), 'man_made': ('pipeline', 'pumping_station', 'storage_tank', 'water_tower', 'gasometer', 'silo', 'wastewater_plant', 'water_works'), 'telecom': ('data_center', 'exchange')}},
+    # Man-made Structures (as areas/linear features) - Comprehensive coverage
+    {'category': 'man_made_structures', 'action': 'polygon_or_line',
+     'match': {'man_made': ('bridge', 'tunnel', 'tower', 'mast', 'antenna', 'chimney', 'pier', 'breakwater', 'groyne', 'lighthouse', 'windmill', 'watermill', 'windpump', 'adit', 'mineshaft', 'crane', 'kiln', 'works', 'embankment', 'cutline', 'dyke', 'levee', 'retaining_wall', 'city_wall', 'dike', 'surveillance', 'monitoring_station', 'survey_point', 'beacon', 'communication_tower', 'observatory', 'telescope', 'flagpole', 'cross', 'obelisk', 'column', 'campanile', 'bunker_silo', 'reservoir_covered', 'clearcut')}},
+    # Barriers & Boundaries (as areas/linear features) - Comprehensive coverage
+    {'category': 'barriers_boundaries', 'action': 'polygon_or_line',
+     'match': {'barrier': ('fence', 'wall', 'hedge', 'gate', 'bollard', 'kerb', 'block', 'bollards', 'chain', 'rope', 'handrail', 'guardrail', 'cable_barrier', 'jersey_barrier', 'lift_gate', 'swing_gate', 'toll_booth', 'turnstile', 'stile', 'chicane', 'motorcycle_barrier', 'height_restrictor', 'sally_port', 'tank_trap', 'border_control', 'cycle_barrier', 'entrance', 'ditch', 'debris', 'log', 'spikes'), 'boundary': ('administrative', 'national_park', 'postal_code', 'political', 'civil', 'maritime', 'territorial_waters', 'low_emission_zone', 'traffic_calming', 'census', 'parish', 'statistical', 'lot', 'parcel', 'forest', 'marker')}},
+    # Historic & Cultural Sites (as areas/linear features) - Comprehensive coverage of historical sites, monuments, and cultural areas
+    {'category': 'historic_cultural', 'action': 'polygon_or_line',
+     'match': {'historic': ('archaeological_site', 'battlefield', 'boundary_stone', 'building', 'castle', 'church', 'city_gate', 'citywalls', 'fort', 'heritage', 'manor', 'memorial', 'monastery', 'monument', 'ruins', 'tomb', 'tower', 'wayside_cross', 'wayside_shrine', 'wreck', 'pillory', 'stocks', 'gallows', 'aircraft', 'anchor', 'cannon', 'locomotive', 'ship', 'tank', 'vehicle', 'milestone', 'obelisk', 'stone', 'cross', 'statue', 'plaque', 'blue_plaque', 'ghost_sign', 'bunker', 'bridge', 'aqueduct', 'optical_telegraph', 'railway_car', 'highwater_mark', 'pa_system'), 'tourism': ('museum', 'gallery', 'artwork', 'attraction', 'theme_park'), 'amenity': ('grave_yard',), 'cultural': ('museum', 'gallery', 'theatre', 'cinema', 'library', 'archive', 'cultural_centre', 'arts_centre', 'community_centre')}},
+    # Enhanced Natural Features (as areas) - Comprehensive coverage of terrain and landuse
+    {'category': 'natural_features', 'action': 'polygon',
+     'match': {'natural': ('forest', 'wood', 'grassland', 'cliff', 'scrub', 'heath', 'sand', 'rock', 'scree', 'bare_rock'), 'landuse': ('residential', 'commercial', 'industrial', 'retail', 'farmland', 'forest', 'orchard', 'vineyard', 'cemetery', 'military', 'quarry', 'construction', 'allotments', 'education', 'institutional', 'farmyard', 'brownfield', 'garages', 'greenfield', 'depot', 'port', 'railway', 'religious', 'fairground', 'meadow', 'plant_nursery', 'conservation', 'landfill', 'logging', 'greenhouse_horticulture')}},
+    # Parks and leisure areas
+    {'category': 'parks', 'action': 'polygon',
+     'match': {'leisure': ('park', 'garden', 'playground', 'dog_park', 'nature_reserve'), 'landuse': ('grass', 'recreation_ground', 'village_green')}},
+    # Linear Water Features (waterways)
+    {'category': 'water', 'action': 'line',
+     'match': {'waterway': ('river', 'stream', 'canal', 'drain', 'ditch', 'rapids', 'dam', 'weir', 'dock', 'boatyard')}},
+    # Water areas - Natural water bodies
+    {'category': 'water', 'action': 'polygon_or_line',
+     'match': {'natural': ('water', 'coastline', 'beach', 'bay', 'strait', 'shoal', 'reef', 'wetland')}},
+    # Man-made Water Features (areas and lines)
+    {'category': 'water', 'action': 'reservoir_or_line',
+     'match': {'man_made': ('reservoir', 'pier', 'breakwater', 'groyne', 'floating_dock')}},
+    # Leisure Water Areas
+    {'category': 'water', 'action': 'polygon_or_line',
+     'match': {'leisure': ('swimming_pool', 'water_park', 'marina', 'slipway')}},
+    # Landuse Water Areas
+    {'category': 'water', 'action': 'polygon',
+     'match': {'landuse': ('reservoir', 'salt_pond', 'aquaculture', 'basin')}},
+    # Amenity Water Areas
+    {'category': 'water', 'action': 'polygon',
+     'match': {'amenity': ('swimming_pool',)}},
+)
+
+# Multipolygon areas from closed ways and relations, first match wins
+AREA_RULES = (
+    # Healthcare facilities (as relations)
+    {'category': 'healthcare', 'derive_healthcare_type': True,
+     'match': {'amenity': ('hospital', 'clinic', 'doctors', 'dentist', 'pharmacy', 'veterinary'), 'healthcare': ('alternative', 'audiologist', 'birthing_centre', 'blood_bank', 'blood_donation', 'centre', 'clinic', 'counselling', 'dentist', 'dialysis', 'doctor', 'hospice', 'hospital', 'laboratory', 'midwife', 'nurse', 'occupational_therapist', 'optometrist', 'pharmacy', 'physiotherapist', 'podiatrist', 'psychotherapist', 'rehabilitation', 'sample_collection', 'speech_therapist', 'vaccination_centre')}},
+    # Food & Sustenance establishments (as relations)
+    {'category': 'food_sustenance',
+     'match': {'amenity': ('restaurant', 'cafe', 'fast_food', 'bar', 'pub', 'food_court', 'ice_cream', 'biergarten', 'nightclub'), 'shop': ('alcohol', 'bakery', 'beverages', 'butcher', 'cheese', 'chocolate', 'coffee', 'confectionery', 'convenience', 'deli', 'farm', 'frozen_food', 'greengrocer', 'health_food', 'nuts', 'pastry', 'seafood', 'tea', 'wine', 'supermarket')}},
+    # Financial Services establishments (as relations)
+    {'category': 'financial_services',
+     'match': {'amenity': ('bank', 'atm', 'post_office', 'bureau_de_change', 'money_transfer', 'payment_centre')}},
+    # Shopping & Retail establishments (as relations)
+    {'category': 'shopping_retail',
+     'match': {'shop': ('department_store', 'general', 'kiosk', 'mall', 'supermarket', 'wholesale', 'variety_store', 'second_hand', 'charity', 'clothes', 'shoes', 'bag', 'boutique', 'fabric', 'jewelry', 'leather', 'watches', 'tailor', 'computer', 'electronics', 'mobile_phone', 'hifi', 'telecommunication', 'beauty', 'chemist', 'cosmetics', 'hairdresser', 'massage', 'optician', 'perfumery', 'tattoo', 'furniture', 'garden_centre', 'hardware', 'doityourself', 'florist', 'appliance'), 'amenity': ('marketplace', 'vending_machine')}},
+    # Public Facilities (as relations) - Comprehensive coverage
+    {'category': 'public_facilities',
+     'match': {'amenity': ('toilets', 'shower', 'drinking_water', 'bench', 'shelter', 'bicycle_repair_station', 'charging_station', 'waste_basket', 'recycling')}},
+    # Emergency Services (as relations) - Comprehensive coverage
+    {'category': 'emergency_services',
+     'match': {'amenity': ('police', 'fire_station'), 'emergency': ('phone', 'defibrillator', 'fire_hydrant', 'assembly_point', 'siren')}},
+    # Tourism & Accommodation (as relations) - Comprehensive coverage
+    {'category': 'tourism_accommodation',
+     'match': {'tourism': ('hotel', 'hostel', 'guest_house', 'camp_site', 'attraction', 'museum', 'gallery', 'viewpoint', 'information', 'artwork', 'zoo')}},
+    # Entertainment & Culture (as relations) - Comprehensive coverage
+    {'category': 'entertainment_culture',
+     'match': {'amenity': ('cinema', 'theatre', 'library', 'community_centre', 'arts_centre', 'social_centre'), 'leisure': ('sports_centre', 'swimming_pool', 'golf_course', 'stadium', 'fitness_centre', 'bowling_alley', 'amusement_arcade')}},
+    # Automotive Services (as relations) - Comprehensive coverage
+    {'category': 'automotive_services',
+     'match': {'amenity': ('fuel', 'car_wash', 'car_rental', 'car_sharing', 'vehicle_inspection', 'compressed_air', 'driver_training', 'parking', 'parking_entrance', 'motorcycle_parking'), 'shop': ('car', 'car_parts', 'car_repair', 'motorcycle', 'motorcycle_repair', 'tyres', 'truck', 'trailer'), 'highway': ('services', 'rest_area')}},
+    # Office & Professional Services (as relations) - Comprehensive coverage
+    {'category': 'office_professional',
+     'match': {'office': ('company', 'government', 'lawyer', 'estate_agent', 'insurance', 'architect', 'accountant', 'employment_agency', 'consulting', 'financial', 'it', 'research', 'ngo', 'association', 'diplomatic', 'educational_institution', 'foundation', 'political_party', 'religion', 'tax_advisor', 'therapist', 'travel_agent', 'physician', 'coworking', 'notary', 'newspaper', 'advertising_agency', 'logistics', 'construction_company', 'energy_supplier', 'guide', 'water_utility', 'property_management', 'telecommunication')}},
+    # Craft & Specialized Services (as relations) - Workshops, artisans, and small production facilities
+    {'category': 'craft_specialized_services',
+     'match': {'craft': ('brewery', 'carpenter', 'electrician', 'plumber', 'tailor', 'shoemaker')}},
+    # Communication & Technology (as relations) - Communication infrastructure and technology services
+    {'category': 'communication_technology',
+     'match': {'telecom': ('data_center',)}},
+    # Education & Childcare (as relations) - Educational institutions and childcare facilities
+    {'category': 'education_childcare',
+     'match': {'amenity': ('childcare', 'language_school', 'driving_school', 'music_school', 'research_institute')}},
+    # Sports & Fitness Facilities (as relations) - Sports venues, fitness equipment, and recreational facilities
+    {'category': 'sports_fitness',
+     'match': {'leisure': ('fitness_station', 'track', 'pitch', 'marina', 'slipway'), 'sport': ('tennis', 'football', 'soccer', 'basketball', 'baseball', 'swimming', 'athletics', 'golf', 'hockey', 'volleyball', 'badminton', 'squash', 'table_tennis', 'boxing', 'martial_arts', 'climbing', 'cycling', 'running', 'fitness', 'gym', 'yoga', 'dance', 'skateboard', 'bmx', 'equestrian', 'sailing', 'rowing', 'canoe', 'surfing')}},
+    # Agricultural & Rural Features (as relations) - Comprehensive coverage of farming, rural infrastructure, and agricultural facilities
+    {'category': 'agricultural_rural',
+     'match': {'landuse': ('orchard', 'vineyard', 'allotments', 'farmyard', 'farmland', 'animal_keeping', 'plant_nursery', 'greenhouse_horticulture', 'aquaculture', 'salt_pond'), 'man_made': ('silo', 'storage_tank', 'bunker_silo', 'windmill', 'watermill', 'windpump', 'watering_place'), 'building': ('farm_auxiliary', 'barn', 'stable', 'sty', 'greenhouse', 'cowshed', 'chicken_coop', 'farm'), 'amenity': ('animal_shelter', 'animal_boarding', 'veterinary'), 'craft': ('agricultural_engines', 'beekeeper', 'distillery', 'winery'), 'shop': ('farm', 'garden_centre', 'agrarian', 'feed'), 'leisure': ('fishing', 'garden'), 'agriculture': ('greenhouse', 'crop', 'livestock', 'dairy', 'poultry', 'beekeeping'), 'produce': ('fruit', 'vegetable', 'grain', 'dairy', 'meat', 'eggs', 'honey')}},
+    # Military & Government Features (as relations) - Comprehensive coverage of military installations and government facilities
+    {'category': 'military_government',
+     'match': {'military': ('airfield', 'base', 'bunker', 'barracks', 'checkpoint', 'danger_area', 'nuclear_explosion_site', 'obstacle_course', 'office', 'range', 'training_area', 'naval_base', 'depot', 'academy', 'hospital'), 'government': ('administrative', 'archive', 'courthouse', 'customs', 'diplomatic', 'embassy', 'fire_department', 'legislative', 'library', 'military', 'ministry', 'office', 'parliament', 'police', 'prison', 'public_service', 'register_office', 'social_services', 'taxation', 'town_hall'), 'amenity': ('courthouse', 'prison', 'police', 'fire_station', 'embassy', 'townhall', 'customs', 'ranger_station'), 'building': ('government', 'military', 'courthouse', 'prison', 'fire_station', 'police'), 'landuse': ('military', 'government'), 'office': ('government', 'diplomatic', 'administrative', 'military'), 'diplomatic': ('embassy', 'consulate', 'delegation', 'mission'), 'public_service': ('social_services', 'employment_agency', 'tax_office')}},
+    # Leisure & Entertainment Details (as relations) - Comprehensive coverage of specialized leisure and entertainment venues
+    {'category': 'leisure_entertainment_details',
+     'match': {'leisure': ('dance', 'escape_game', 'hackerspace', 'adult_gaming_centre', 'miniature_golf', 'arcade', 'bingo_hall', 'casino', 'gambling', 'social_club', 'sauna', 'bandstand', 'bleachers', 'maze', 'shooting_range', 'disc_golf', 'picnic_table', 'firepit', 'bbq'), 'amenity': ('casino', 'gambling', 'game_feeding', 'karaoke_box', 'love_hotel', 'nightclub', 'planetarium', 'social_facility', 'stripclub', 'swingerclub', 'brothel', 'studio'), 'shop': ('games', 'lottery', 'video_games', 'music', 'musical_instrument', 'video', 'books', 'art', 'craft', 'hobby'), 'club': ('sport', 'social', 'veterans', 'youth', 'senior', 'community', 'photography', 'computer', 'automobile'), 'tourism': ('theme_park', 'aquarium', 'zoo'), 'sport': ('billiards', 'darts', 'chess', 'go', 'beachvolleyball'), 'craft': ('brewery', 'distillery', 'winery'), 'entertainment': ('escape_room', 'laser_tag', 'paintball', 'axe_throwing', 'virtual_reality')}},
+    # Power & Utilities Infrastructure (as relations) - Comprehensive coverage
+    {'category': 'power_utilities',
+     'match': {'power': ('substation', 'generator', 'plant', 'transformer'), 'utility': ('gas', 'water', 'sewerage', 'telecom', 'electrical', 'power'), 'man_made': ('pipeline', 'pumping_station', 'storage_tank', 'water_tower', 'gasometer', 'silo', 'wastewater_plant', 'water_works'), 'telecom': ('data_center', 'exchange')}},
+    # Man-made Structures (as relations) - Comprehensive coverage
+    {'category': 'man_made_structures',
+     'match': {'man_made': ('bridge', 'tunnel', 'tower', 'mast', 'antenna', 'chimney', 'pier', 'breakwater', 'groyne', 'lighthouse', 'windmill', 'watermill', 'windpump', 'adit', 'mineshaft', 'crane', 'kiln', 'works', 'embankment', 'cutline', 'dyke', 'levee', 'retaining_wall', 'city_wall', 'dike', 'surveillance', 'monitoring_station', 'survey_point', 'beacon', 'communication_tower', 'observatory', 'telescope', 'flagpole', 'cross', 'obelisk', 'column', 'campanile', 'bunker_silo', 'reservoir_covered', 'clearcut')}},
+    # Barriers & Boundaries (as relations) - Comprehensive coverage
+    {'category': 'barriers_boundaries',
+     'match': {'barrier': ('fence', 'wall', 'hedge', 'gate', 'bollard', 'kerb', 'block', 'bollards', 'chain', 'rope', 'handrail', 'guardrail', 'cable_barrier', 'jersey_barrier', 'lift_gate', 'swing_gate', 'toll_booth', 'turnstile', 'stile', 'chicane', 'motorcycle_barrier', 'height_restrictor', 'sally_port', 'tank_trap', 'border_control', 'cycle_barrier', 'entrance', 'ditch', 'debris', 'log', 'spikes'), 'boundary': ('administrative', 'national_park', 'postal_code', 'political', 'civil', 'maritime', 'territorial_waters', 'low_emission_zone', 'traffic_calming', 'census', 'parish', 'statistical', 'lot', 'parcel', 'forest', 'marker')}},
+    # Historic & Cultural Sites (as relations) - Comprehensive coverage of historical sites, monuments, and cultural areas
+    {'category': 'historic_cultural',
+     'match': {'historic': ('archaeological_site', 'battlefield', 'boundary_stone', 'building', 'castle', 'church', 'city_gate', 'citywalls', 'fort', 'heritage', 'manor', 'memorial', 'monastery', 'monument', 'ruins', 'tomb', 'tower', 'wayside_cross', 'wayside_shrine', 'wreck', 'pillory', 'stocks', 'gallows', 'aircraft', 'anchor', 'cannon', 'locomotive', 'ship', 'tank', 'vehicle', 'milestone', 'obelisk', 'stone', 'cross', 'statue', 'plaque', 'blue_plaque', 'ghost_sign', 'bunker', 'bridge', 'aqueduct', 'optical_telegraph', 'railway_car', 'highwater_mark', 'pa_system'), 'tourism': ('museum', 'gallery', 'artwork', 'attraction', 'theme_park'), 'amenity': ('grave_yard',), 'cultural': ('museum', 'gallery', 'theatre', 'cinema', 'library', 'archive', 'cultural_centre', 'arts_centre', 'community_centre')}},
+    # Enhanced Natural Features (as relations) - Comprehensive coverage of terrain and landuse
+    {'category': 'natural_features',
+     'match': {'natural': ('forest', 'wood', 'grassland', 'cliff', 'scrub', 'heath', 'sand', 'rock', 'scree', 'bare_rock'), 'landuse': ('residential', 'commercial', 'industrial', 'retail', 'farmland', 'forest', 'orchard', 'vineyard', 'cemetery', 'military', 'quarry', 'construction', 'allotments', 'education', 'institutional', 'farmyard', 'brownfield', 'garages', 'greenfield', 'depot', 'port', 'railway', 'religious', 'fairground', 'meadow', 'plant_nursery', 'conservation', 'landfill', 'logging', 'greenhouse_horticulture')}},
+    # Transit Infrastructure (as relations)
+    {'category': 'transit',
+     'match': {'railway': ('station', 'platform'), 'public_transport': ('platform', 'station'), 'amenity': ('bus_station', 'ferry_terminal'), 'aeroway': ('terminal', 'aerodrome'), 'aerialway': ('station',)}},
+    # Buildings
+    {'category': 'buildings',
+     'match': {'building': ANY}},
+    # Parks and leisure areas
+    {'category': 'parks',
+     'match': {'leisure': ('park', 'garden', 'playground', 'dog_park', 'nature_reserve'), 'landuse': ('grass', 'recreation_ground', 'village_green')}},
+    # Water areas - comprehensive coverage
+    {'category': 'water',
+     'match': {'natural': ('water', 'beach', 'bay', 'strait', 'shoal', 'reef', 'wetland'), 'man_made': ('reservoir', 'water_works'), 'leisure': ('swimming_pool', 'water_park', 'marina'), 'landuse': ('reservoir', 'salt_pond', 'aquaculture', 'basin'), 'amenity': ('swimming_pool',)}},
+)
+
+
+NODE_INDEX = TagRuleIndex(NODE_RULES)
+WAY_INDEX = TagRuleIndex((WAY_RULES,))
+AREA_INDEX = TagRuleIndex((AREA_RULES,))
@@ -0,0 +1,49 @@
+"""Content hashes of a region's tiles (tile_hashes.json).
+
+Each tile's hash is the SHA-256 of its uncompressed SVG, recorded by the
+builder as [sha256, mtime_ns, size]: the hash with the stat of the file it
+was computed for. Runs replace tiles as they render but save the hashes
+only when they end, so while a run is in progress, or after one was
+killed, a rewritten tile still has its old hash in the file. A hash is
+therefore only trusted while the tile keeps the recorded mtime and size;
+otherwise callers treat the tile's hash as unknown. Bare hash strings
+written by older versions carry no stat and are never trusted.
+"""
+
+import json
+from pathlib import Path
+
+HASHES_FILE = 'tile_hashes.json'
+
+
+def hash_entry(sha256, stat):
+    """Get the tile_hashes.json entry of a tile with this hash and os.stat() result."""
+    return [sha256, stat.st_mtime_ns, stat.st_size]
+
+
+def verified_hash(entry, stat):
+    """Get an entry's SHA-256 if the tile still has the recorded mtime and size, else None."""
+    if isinstance(entry, list) and len(entry) == 3 and entry[1:] == [stat.st_mtime_ns, stat.st_size]:
+        return entry[0]
+    return None
+
+
+def tile_hash(hashes, tile_file):
+    """Get the verified SHA-256 of a tile file from its region's hashes, or None."""
+    tile_file = Path(tile_file)
+    entry = hashes.get(tile_file.name)
+    if entry is None:
+        return None
+    try:
+        return verified_hash(entry, tile_file.stat())
+    except OSError:
+        return None
+
+
+def read_tile_hashes(region_dir):
+    """Read a region's {tile filename: entry}, or an empty dict."""
+    try:
+        with open(Path(region_dir) / HASHES_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Standalone tile server for map clients.
+
+Serves only tiles, at the same URLs as the Flask apps
+(/api/tile/<region>/<tile> and /tiles/regions/<region>/<tile>), without the
+admin interface or Flask in the request path. Each connection gets a thread
+and is kept alive between requests; with --processes the listening socket
+is shared by forked workers. Loose .svg.gz tiles go to the socket with
+sendfile(), tiles of regions deployed as an archive (tiles/archives/) are
+written from its memory-mapped pages, and ETags come from the region's
+tile hashes held in memory, for tiles that still have the size and mtime
+recorded with their hash. Missing tiles are counted in the missing-tile
+demand table like the tile API does.
+
+Usage:
+    python tile_server.py [--host HOST] [--port PORT] [--processes N] [--tiles-dir DIR]
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import signal
+import socket
+import argparse
+import threading
+import socketserver
+from pathlib import Path
+from email.utils import formatdate, parsedate_to_datetime
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Config
+from tile_generation.archive import open_archive
+from tile_generation.catalog import get_tile_catalog
+from tile_generation.missing_tiles import MissingTileStore, region_contains, tile_key
+from tile_generation.tile_hashes import HASHES_FILE, verified_hash
+
+TILE_PATH = re.compile(r'^/(?:api/tile|tiles/regions)/([\w-]+)/(-?\d+\.\d{3})_(-?\d+\.\d{3})\.svg\.gz$')
+
+# Longest request or header line accepted
+MAX_LINE = 8192
+
+# Seconds an idle keep-alive connection stays open
+KEEPALIVE_TIMEOUT = 15
+
+# Seconds between checks of a region's tile_hashes.json for changes
+HASH_CHECK_INTERVAL = 1.0
+
+# Header bytes sent together with the body that follows (Linux)
+MSG_MORE = getattr(socket, 'MSG_MORE', 0)
+
+STATUS_LINES = {
+    200: b'HTTP/1.1 200 OK\r\n',
+    304: b'HTTP/1.1 304 Not Modified\r\n',
+    400: b'HTTP/1.1 400 Bad Request\r\n',
+    404: b'HTTP/1.1 404 Not Found\r\n',
+    405: b'HTTP/1.1 405 Method Not Allowed\r\n'
+}
+
+
+class TileHashes:
+    """Each region's tile hashes ({tile filename: entry}), re-read when tile_hashes.json changes."""
+
+    def __init__(self, regions_dir):
+        self.regions_dir = regions_dir
+        self._regions = {}
+        self._lock = threading.Lock()
+
+    def get(self, region_name, tile_name):
+        entry = self._regions.get(region_name)
+        now = time.monotonic()
+        if entry is None or now - entry[0] >= HASH_CHECK_INTERVAL:
+            entry = self._refresh(region_name, entry, now)
+        return entry[2].get(tile_name)
+
+    def _refresh(self, region_name, entry, now):
+        hashes_file = self.regions_dir / region_name / HASHES_FILE
+        try:
+            mtime = hashes_file.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if entry and entry[1] == mtime:
+            hashes = entry[2]
+        else:
+            hashes = {}
+            if mtime is not None:
+                try:
+                    with open(hashes_file) as f:
+                        hashes = json.load(f)
+                except (OSError, ValueError):
+                    pass
+
+        entry = (now, mtime, hashes)
+        with self._lock:
+            self._regions[region_name] = entry
+        return entry
+
+
+class TileHTTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Threaded HTTP/1.1 server for .svg.gz tiles."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+    def __init__(self, address, tiles_dir, data_dir, max_age):
+        self.tiles_dir = Path(tiles_dir)
+        self.regions_dir = self.tiles_dir / 'regions'
+        self.data_dir = Path(data_dir)
+        self.max_age = max_age
+        self.hashes = TileHashes(self.regions_dir)
+        self._missing_tiles = None
+        self._missing_lock = threading.Lock()
+        super().__init__(address, TileRequestHandler)
+
+    def missing_tiles(self):
+        # Opened on first use, so every forked worker has its own connection
+        with self._missing_lock:
+            if self._missing_tiles is None:
+                self._missing_tiles = MissingTileStore(self.data_dir / 'missing_tiles.db')
+            return self._missing_tiles
+
+
+class TileRequestHandler(socketserver.StreamRequestHandler):
+    """Answers GET and HEAD requests for tiles on one keep-alive connection."""
+
+    timeout = KEEPALIVE_TIMEOUT
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        try:
+            while self.handle_one_request():
+                pass
+        except (socket.timeout, ConnectionError):
+            pass
+
+    def handle_one_request(self):
+        """Answer one request; return whether the connection stays open."""
+        request_line = self.rfile.readline(MAX_LINE + 1)
+        if not request_line:
+            return False
+        parts = request_line.split()
+        if len(parts) != 3 or len(request_line) > MAX_LINE:
+            self.send_simple(400, b'Bad request', keep_alive=False)
+            return False
+        method, target, version = parts
+
+        headers = {}
+        while True:
+            line = self.rfile.readline(MAX_LINE + 1)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.partition(b':')
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get(b'connection', b'').lower()
+        keep_alive = connection == b'keep-alive' if version == b'HTTP/1.0' else connection != b'close'
+
+        # Bodies are not read, so anything but GET and HEAD ends the connection
+        if method not in (b'GET', b'HEAD'):
+            self.send_simple(405, b'{"error": "Method not allowed"}', keep_alive=False)
+            return False
+
+        path = target.split(b'?', 1)[0].decode('latin-1')
+        head_only = method == b'HEAD'
+        if path == '/health':
+            self.send_simple(200, b'{"status": "healthy", "server": "tile-server"}', keep_alive, head_only)
+            return keep_alive
+
+        match = TILE_PATH.match(path)
+        if not match:
+            self.send_simple(404, b'{"error": "Not found"}', keep_alive, head_only)
+            return keep_alive
+
+        self.serve_tile(match, headers, keep_alive, head_only)
+        return keep_alive
+
+    def serve_tile(self, match, headers, keep_alive, head_only):
+        server = self.server
+        region_name = match.group(1)
+        tile_name = f"{match.group(2)}_{match.group(3)}.svg.gz"
+        gzipped = accepts_gzip(headers.get(b'accept-encoding', b''))
+
+        try:
+            tile_file = open(server.regions_dir / region_name / tile_name, 'rb')
+        except OSError:
+            tile_file = None
+
+        if tile_file:
+            with tile_file:
+                stat = os.fstat(tile_file.fileno())
+                sha256 = verified_hash(server.hashes.get(region_name, tile_name), stat)
+                etag = sha256[:32] if sha256 else f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+                self.send_tile(headers, etag, stat.st_mtime, stat.st_size, gzipped, keep_alive, head_only,
+                               tile_file=tile_file)
+            return
+
+        archive = open_archive(server.tiles_dir, region_name)
+        tile = archive.get(tile_name) if archive else None
+        if tile:
+            data, sha256, modified = tile
+            etag = sha256[:32] if sha256 else f"{int(modified * 1e9):x}-{len(data):x}"
+            self.send_tile(headers, etag, modified, len(data), gzipped, keep_alive, head_only, data=data)
+            return
+
+        try:
+            # Only tiles on a region's grid can be generated, so no others are counted
+            key = tile_key(float(match.group(2)), float(match.group(3)))
+            region = get_tile_catalog(server.tiles_dir).region(region_name)
+            bounds = region and (region['metadata'] or {}).get('bounds')
+            if bounds and region_contains(bounds, *key):
+                server.missing_tiles().record(*key, region_name)
+        except Exception as e:
+            print(f"Error recording missing tile {region_name}/{tile_name}: {e}")
+        self.send_simple(404, b'{"error": "Tile not found"}', keep_alive, head_only)
+
+    def send_tile(self, headers, etag, mtime, size, gzipped, keep_alive, head_only, tile_file=None, data=None):
+        """Send a gzipped tile from an open file (with sendfile) or from bytes."""
+        response_etag = f"{etag}.gz" if gzipped else etag
+        fields = [
+            f"ETag: \"{response_etag}\"",
+            f"Last-Modified: {formatdate(mtime, usegmt=True)}",
+            f"Cache-Control: public, max-age={self.server.max_age}",
+            "Vary: Accept-Encoding"
+        ]
+
+        if not_modified(headers, etag, mtime):
+            self.send_head(304, fields, None, keep_alive)
+            return
+
+        fields.append('Content-Type: image/svg+xml')
+        if not gzipped:
+            # Rare clients without gzip get the tile decompressed
+            data = gzip.decompress(data if data is not None else tile_file.read())
+            self.send_head(200, fields, len(data), keep_alive, more=not head_only)
+            if not head_only:
+                self.connection.sendall(data)
+            return
+
+        fields.append('Content-Encoding: gzip')
+        self.send_head(200, fields, size, keep_alive, more=not head_only)
+        if head_only:
+            return
+        if data is not None:
+            self.connection.sendall(data)
+        else:
+            self.connection.sendfile(tile_file, 0, size)
+
+    def send_simple(self, status, body, keep_alive, head_only=False):
+        self.send_head(status, ['Content-Type: application/json'], len(body), keep_alive, more=not head_only)
+        if not head_only:
+            self.connection.sendall(body)
+
+    def send_head(self, status, fields, content_length, keep_alive, more=False):
+        fields = [*fields, 'Connection: keep-alive' if keep_alive else 'Connection: close']
+        if content_length is not None:
+            fields.append(f"Content-Length: {content_length}")
+        head = STATUS_LINES[status] + '\r\n'.join(fields).encode('latin-1') + b'\r\n\r\n'
+        self.connection.sendall(head, MSG_MORE if more else 0)
+
+
+def accepts_gzip(accept_encoding):
+    """Check whether an Accept-Encoding header value allows gzip."""
+    for coding in accept_encoding.lower().split(b','):
+        name, *params = coding.split(b';')
+        if name.strip() not in (b'gzip', b'*'):
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition(b'=')
+            if key == b'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
+
+
+def not_modified(headers, etag, mtime):
+    """Check conditional request headers against a tile's ETag and mtime."""
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = headers.get(b'if-none-match')
+    if if_none_match:
+        tags = {tag.strip().removeprefix(b'W/').strip(b'"') for tag in if_none_match.split(b',')}
+        return b'*' in tags or etag.encode() in tags or f"{etag}.gz".encode() in tags
+    if_modified_since = headers.get(b'if-modified-since')
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since.decode('latin-1')).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def serve(server, processes):
+    """Serve until interrupted, in this process and processes - 1 forked workers."""
+    workers = []
+    for _ in range(processes - 1):
+        pid = os.fork()
+        if pid == 0:
+            # Workers stop on the parent's SIGTERM, not on a terminal's Ctrl-C
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            run_worker(server)
+            os._exit(0)
+        workers.append(pid)
+
+    try:
+        run_worker(server)
+    finally:
+        for pid in workers:
+            os.kill(pid, signal.SIGTERM)
+        for pid in workers:
+            os.waitpid(pid, 0)
+        server.server_close()
+
+
+def run_worker(server):
+    """Serve in this process until SIGTERM or Ctrl-C, then write pending missing-tile counts."""
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        if server._missing_tiles:
+            server._missing_tiles.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--host', default=Config.TILE_SERVER_HOST)
+    parser.add_argument('--port', type=int, default=Config.TILE_SERVER_PORT)
+    parser.add_argument('--processes', type=int, default=Config.TILE_SERVER_PROCESSES,
+                        help='worker processes sharing the listening socket')
+    parser.add_argument('--tiles-dir', default=str(Config.TILES_DIR))
+    args = parser.parse_args()
+
+    server = TileHTTPServer((args.host, args.port), args.tiles_dir, Config.DATA_DIR, Config.TILE_CACHE_MAX_AGE)
+    processes = max(1, args.processes)
+    print(f"🗺️  Serving tiles from {args.tiles_dir} on http://{args.host}:{args.port} "
+          f"({processes} process{'es' if processes > 1 else ''})")
+    serve(server, processes)
+
+
+if __name__ == '__main__':
+    main()